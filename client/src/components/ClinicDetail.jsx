@@ -8,22 +8,24 @@ import {
   FaEnvelope,
 } from 'react-icons/fa';
 
-import useClinicServices from '../utils/useClinicServices';
+import useClinic from '../utils/useClinic';
 import useReviews from '../utils/useReviews';
 
 const ClinicDetail = () => {
   const { id } = useParams();
-  const { clinics } = useClinicServices();
+  const { clinic, loading } = useClinic(id);
   const { reviews, fetchReviewsByClinic } = useReviews();
 
-  const clinic = clinics.find((c) => String(c.id) === String(id));
-
   useEffect(() => {
     if (id) {
       fetchReviewsByClinic(id);
     }
   }, [id]);
 
+  if (loading) {
+    return <div className="text-center py-10">Loading clinic...</div>;
+  }
+
   if (!clinic) {
     return <div className="text-center py-10">Clinic not found</div>;
   }
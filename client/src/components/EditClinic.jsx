@@ -5,14 +5,15 @@ import { FaTimes } from 'react-icons/fa';
 
 import useInsurances from '../utils/useInsurances.js';
 import useServices from '../utils/useServices.js';
+import useClinic from '../utils/useClinic.js';
 import useClinicServices from '../utils/useClinicServices.js';
 
 const EditClinic = () => {
   const { id } = useParams();
   const navigate = useNavigate();
 
+  const { clinic: foundClinic, loading: clinicLoading } = useClinic(id);
   const {
-    clinics,
     clinicServices,
     loading,
     updateClinic,
@@ -30,9 +31,8 @@ const EditClinic = () => {
   const [isSubmitting, setIsSubmitting] = useState(false);
 
   useEffect(() => {
-    if (loading || !clinics || !allServices) return;
+    if (loading || clinicLoading || !allServices) return;
 
-    const foundClinic = clinics.find(c => c.id === parseInt(id));
     if (!foundClinic) {
       navigate('/manage-clinics');
       return;
@@ -52,7 +52,7 @@ const EditClinic = () => {
           ? foundClinic.insurance_accepted.map(i => i.id || i)
           : [],
     });
-  }, [id, clinics, allServices, navigate, loading]);
+  }, [id, foundClinic, allServices, navigate, loading, clinicLoading]);
 
   const handleChange = (e) => {
     const { name, value } = e.target;
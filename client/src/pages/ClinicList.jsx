@@ -7,10 +7,12 @@ import useClinicServices from "../utils/useClinicServices.js";
 
 
 const ClinicList = () => {
-  const { clinics, loading, error } = useClinicServices();
+  const { clinics, hasMoreClinics, loadMoreClinics, loading, error } = useClinicServices(null, { listClinics: true });
   const { insurances } = useInsurances();
   const { services } = useServices();
   const [filteredClinics, setFilteredClinics] = useState([]);
+  // The last search and the cursor for its next page, while there is one.
+  const [search, setSearch] = useState(null);
 
   useEffect(() => {
     if (clinics) {
@@ -18,31 +20,56 @@ const ClinicList = () => {
     }
   }, [clinics]);
 
-  const handleSearch = (filters) => {
-    let results = [...clinics];
+  const fetchResults = async (filters, after) => {
+    const params = new URLSearchParams({ limit: '30' });
+    if (filters.searchTerm) params.append('q', filters.searchTerm);
+    if (filters.specialty) params.append('specialty', filters.specialty);
+    if (filters.insurance) params.append('insurance_id', filters.insurance);
+    if (after) params.append('after', after);
 
-    if (filters.searchTerm) {
-      const term = filters.searchTerm.toLowerCase();
-      results = results.filter(clinic =>
-          clinic.name.toLowerCase().includes(term) ||
-          clinic.specialty.toLowerCase().includes(term) ||
-          clinic.description.toLowerCase().includes(term)
-      );
+    const response = await fetch(
+        `${import.meta.env.VITE_API_BASE_URL}/api/clinics/search?${params}`,
+        { credentials: 'include' }
+    );
+    if (!response.ok) throw new Error('Failed to search clinics');
+    return { results: await response.json(), next: response.headers.get('X-Next-Cursor') };
+  };
+
+  const handleSearch = async (filters) => {
+    if (!filters.specialty && !filters.insurance && !filters.searchTerm) {
+      setSearch(null);
+      setFilteredClinics(clinics);
+      return;
+    }
+
+    let page;
+    try {
+      page = await fetchResults(filters);
+    } catch (err) {
+      console.error(err);
+      return;
     }
 
-    if (filters.specialty) {
-      results = results.filter(clinic =>
-          clinic.specialty === filters.specialty
-      );
+    setSearch({ filters, next: page.next });
+    setFilteredClinics(page.results);
+  };
+
+  const handleLoadMore = async () => {
+    if (!search) {
+      loadMoreClinics();
+      return;
     }
 
-    if (filters.insurance) {
-      results = results.filter(clinic =>
-          clinic.insurance_accepted.includes(parseInt(filters.insurance))
-      );
+    let page;
+    try {
+      page = await fetchResults(search.filters, search.next);
+    } catch (err) {
+      console.error(err);
+      return;
     }
 
-    setFilteredClinics(results);
+    setSearch({ filters: search.filters, next: page.next });
+    setFilteredClinics(prev => [...prev, ...page.results]);
   };
 
   const specialties = [...new Set(clinics?.map(clinic => clinic.specialty) || [])];
@@ -76,6 +103,17 @@ const ClinicList = () => {
           ))}
         </div>
 
+        {(search ? search.next : hasMoreClinics) && (
+            <div className="text-center mt-8">
+              <button
+                  onClick={handleLoadMore}
+                  className="bg-gray-200 text-gray-800 px-5 py-2 rounded-md hover:bg-gray-300 transition"
+              >
+                Load more
+              </button>
+            </div>
+        )}
+
         {filteredClinics.length === 0 && (
             <div className="text-center py-10 text-gray-500">
               No clinics found matching your criteria. Try adjusting your search filters.
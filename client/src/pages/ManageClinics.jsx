@@ -6,7 +6,9 @@ import useClinicServices from "../utils/useClinicServices.js";
 
 
 const ManageClinics = () => {
-  const { clinics, loading, error, deleteClinic } = useClinicServices();
+  const { clinics, hasMoreClinics, loadMoreClinics, loading, error, deleteClinic } = useClinicServices(
+      null, { listClinics: true }
+  );
   const navigate = useNavigate();
   const [isDeleting, setIsDeleting] = useState(null);
 
@@ -89,6 +91,17 @@ const ManageClinics = () => {
             </table>
           </div>
 
+          {hasMoreClinics && (
+              <div className="text-center py-4">
+                <button
+                    onClick={loadMoreClinics}
+                    className="bg-gray-200 text-gray-800 px-5 py-2 rounded-md hover:bg-gray-300 transition"
+                >
+                  Load more
+                </button>
+              </div>
+          )}
+
           {clinics?.length === 0 && (
               <div className="text-center py-10 text-gray-500">
                 No clinics found. Add a new clinic to get started.
@@ -0,0 +1,45 @@
+import { useState, useEffect } from 'react';
+import { toast } from 'react-toastify';
+
+const API_URL = `${import.meta.env.VITE_API_BASE_URL}/api/clinics`;
+
+const useClinic = (clinicId) => {
+    const [clinic, setClinic] = useState(null);
+    const [loading, setLoading] = useState(true);
+    const [error, setError] = useState(null);
+
+    useEffect(() => {
+        if (!clinicId) return;
+
+        const fetchClinic = async () => {
+            try {
+                setLoading(true);
+                const response = await fetch(`${API_URL}/${clinicId}`, {
+                    credentials: 'include',
+                });
+
+                if (response.status === 404) {
+                    setClinic(null);
+                    return;
+                }
+                if (!response.ok) {
+                    throw new Error('Failed to fetch clinic');
+                }
+
+                const data = await response.json();
+                setClinic(data.clinic);
+            } catch (err) {
+                setError(err.message);
+                toast.error('Failed to load clinic');
+            } finally {
+                setLoading(false);
+            }
+        };
+
+        fetchClinic();
+    }, [clinicId]);
+
+    return { clinic, loading, error };
+};
+
+export default useClinic;
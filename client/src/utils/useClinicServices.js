@@ -3,36 +3,42 @@ import { toast } from 'react-toastify';
 
 const API_URL = `${import.meta.env.VITE_API_BASE_URL}/api`;
 
-const useClinicServices = (clinicId = null) => {
+// clinicId loads that clinic's services; listClinics loads the first page of
+// /api/clinics, with loadMoreClinics fetching the next while hasMoreClinics.
+const useClinicServices = (clinicId = null, { listClinics = false } = {}) => {
     const [clinics, setClinics] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const [clinicServices, setClinicServices] = useState([]);
     const [services, setServices] = useState([]);
     const [loading, setLoading] = useState({
-        clinics: true,
+        clinics: listClinics,
         services: true,
         clinicServices: true
     });
     const [error, setError] = useState(null);
 
-    useEffect(() => {
-        const fetchClinics = async () => {
-            try {
-                const response = await fetch(`${import.meta.env.VITE_API_BASE_URL}/api/clinics`, {
-                    credentials: 'include',
-                });
+    const fetchClinics = async (after = null) => {
+        try {
+            const params = new URLSearchParams({ limit: '30' });
+            if (after) params.append('after', after);
+            const response = await fetch(`${import.meta.env.VITE_API_BASE_URL}/api/clinics?${params}`, {
+                credentials: 'include',
+            });
 
-                if (!response.ok) throw new Error('Failed to fetch clinics');
+            if (!response.ok) throw new Error('Failed to fetch clinics');
 
-                const data = await response.json();
-                setClinics(data);
-                setLoading(prev => ({ ...prev, clinics: false }));
-            } catch (err) {
-                setError(err);
-                toast.error(err.message || 'Failed to load clinics');
-                setLoading(prev => ({ ...prev, clinics: false }));
-            }
-        };
+            const data = await response.json();
+            setClinics(prev => after ? [...prev, ...data] : data);
+            setNextCursor(response.headers.get('X-Next-Cursor'));
+            setLoading(prev => ({ ...prev, clinics: false }));
+        } catch (err) {
+            setError(err);
+            toast.error(err.message || 'Failed to load clinics');
+            setLoading(prev => ({ ...prev, clinics: false }));
+        }
+    };
 
+    useEffect(() => {
         const fetchServices = async () => {
             try {
                 const response = await fetch(`${import.meta.env.VITE_API_BASE_URL}/api/services`, {
@@ -51,7 +57,9 @@ const useClinicServices = (clinicId = null) => {
             }
         };
 
-        fetchClinics();
+        if (listClinics) {
+            fetchClinics();
+        }
         fetchServices();
 
         if (clinicId) {
@@ -59,7 +67,7 @@ const useClinicServices = (clinicId = null) => {
         } else {
             setLoading(prev => ({ ...prev, clinicServices: false }));
         }
-    }, [clinicId]);
+    }, [clinicId, listClinics]);
 
     const fetchClinicServices = async (clinicId) => {
         try {
@@ -233,6 +241,8 @@ const useClinicServices = (clinicId = null) => {
 
     return {
         clinics,
+        hasMoreClinics: Boolean(nextCursor),
+        loadMoreClinics: () => nextCursor && fetchClinics(nextCursor),
         services,
         clinicServices,
         loading: loading.clinics || loading.services || loading.clinicServices,
@@ -2,16 +2,49 @@
 import traceback
 
 from flask_migrate import Migrate
-from models import db, Clinic, Patient, Insurance, Service, User, Booking, Review, ClinicService
+from models import (
+    db, Clinic, Patient, Insurance, Service, User, Booking, Review, ClinicService, OpeningHours, clinic_insurance
+)
+from cache import catalog_cache
+from encoding import init_api
+from engine_profiles import engine_profile
+from export import EXPORTS, FORMATS, stream_export
+from conflicts import conflict_response, violates
+from datagen import DataGenerationError, generate
+from bulk_import import BulkImportError, import_clinics, parse_csv, parse_json
+from availability import (
+    MAX_WINDOW_DAYS, SLOT_FORMAT, earliest_slots, free_slots, is_slot_available, lock_calendar, parse_window
+)
+from metrics import metrics
+from pagination import PaginationError, keyset_page, parse_limit
+from passwords import HashingBusy, password_hasher
+from query_stats import query_stats
+from ratings import apply_rating_change, rebuild_ratings
+from replicas import replica_router
+from rollups import (
+    INTERVALS, apply_booking_change, apply_booking_changes, apply_new_patients, apply_review_change, booking_key,
+    booking_key_from_row, period_count, rebuild_rollups, review_key, source_date_range, time_series, totals
+)
+from search import ranked_matches, tokenize
+from serializers import SerializationError, request_serializer
+from versioning import conditional
 from flask import Flask, request, make_response, jsonify
 from flask_cors import CORS
 from flask_restful import Api, Resource
 from flask_jwt_extended import (
-    JWTManager, create_access_token, jwt_required,
+    JWTManager, create_access_token,
     get_jwt_identity, verify_jwt_in_request, set_access_cookies, unset_jwt_cookies
 )
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from sqlalchemy import case, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
 from functools import wraps
-from datetime import datetime
+import click
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
 import os
 
 # Initialize Flask app
@@ -40,7 +73,7 @@ CORS(app,
         r"/api/*": {
             "origins": ["https://health-hub-lyart.vercel.app","http://localhost:5173"],
             "supports_credentials": True,
-            "expose_headers": ["Content-Type"],
+            "expose_headers": ["Content-Type", "Content-Disposition", "X-Next-Cursor", "ETag", "Last-Modified", "Server-Timing", "X-Query-Count"],
             "allow_headers": ["Content-Type"],
             "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
         }
@@ -48,42 +81,80 @@ CORS(app,
 )
 
 # Initialize extensions
+engine_profile.init_app(app)
+replica_router.init_app(app)
 db.init_app(app)
 jwt = JWTManager(app)
 api = Api(app)
 migrate = Migrate(app, db)
+catalog_cache.init_app(app)
+password_hasher.init_app(app)
+query_stats.init_app(app)
+init_api(app, api)
+metrics.init_app(app, api)
 
 
-# Role-based access decorator
-def role_required(role):
-    def wrapper(fn):
-        @wraps(fn)
-        def decorator(*args, **kwargs):
-            verify_jwt_in_request()
-            identity = get_jwt_identity()
-            if not isinstance(identity, dict) or identity.get('role') != role:
-                return {'message': f'{role.capitalize()} role required!'}, 403
-            return fn(*args, **kwargs)
+BOOKING_STATUSES = ['pending', 'confirmed', 'cancelled', 'completed']
 
-        return decorator
+# Status changes allowed by the batch endpoint; cancelled and completed are final.
+BOOKING_TRANSITIONS = {
+    'pending': {'confirmed', 'completed', 'cancelled'},
+    'confirmed': {'completed', 'cancelled'},
+    'cancelled': set(),
+    'completed': set(),
+}
+MAX_BATCH_SIZE = 500
+
+
+def parse_date_range(args):
+    """Optional inclusive ``from``/``to`` dates (YYYY-MM-DD) as a half-open datetime range."""
+    start = datetime.strptime(args['from'], '%Y-%m-%d') if args.get('from') else None
+    end = datetime.strptime(args['to'], '%Y-%m-%d') + timedelta(days=1) if args.get('to') else None
+    return start, end
+
+
+def cached_dict(key, tables, lookup, serialize=None):
+    """``lookup().to_dict()`` through the catalog cache, or None when not found.
+
+    ``serialize`` replaces ``to_dict`` and must be reflected in ``key``.
+    """
+    def load():
+        obj = lookup()
+        if obj is None:
+            return None
+        return serialize(obj) if serialize else obj.to_dict()
+    return catalog_cache.get_or_set(key, tables, load)
 
-    return wrapper
 
+def sparse_cache_key(key):
+    """Suffix ``key`` with the request's ``fields``/``include`` selection, if any."""
+    selection = [f'{name}={request.args[name]}' for name in ('fields', 'include') if name in request.args]
+    return ':'.join([key] + selection)
 
-# Admin or specific role required decorator
-def admin_or_role_required(allowed_roles):
+
+# Access decorator
+def auth_required(*roles):
+    """Require a valid access token and, when ``roles`` are given, one of them.
+
+    Verifies the token once, instead of ``jwt_required`` followed by a role
+    check that verified it again.
+    """
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
-            verify_jwt_in_request()
-            identity = get_jwt_identity()
-
-            if not isinstance(identity, dict):
-                return {'error': 'Invalid identity format'}, 400
-
-            user_role = identity.get('role')
-            if user_role not in allowed_roles and user_role != 'admin':
-                return {'message': 'Insufficient permissions'}, 403
+            try:
+                verify_jwt_in_request()
+            except (JWTExtendedException, PyJWTError) as exc:
+                return {'message': str(exc)}, 401
+
+            if roles:
+                identity = get_jwt_identity()
+                if not isinstance(identity, dict):
+                    return {'error': 'Invalid identity format'}, 400
+                if identity.get('role') not in roles:
+                    if len(roles) == 1:
+                        return {'message': f'{roles[0].capitalize()} role required!'}, 403
+                    return {'message': 'Insufficient permissions'}, 403
 
             return fn(*args, **kwargs)
 
@@ -92,6 +163,29 @@ def admin_or_role_required(allowed_roles):
     return wrapper
 
 
+def token_identity(user_id, username, role, patient_id=None, clinic_id=None):
+    """The JWT identity: the user and the id of their patient or clinic profile."""
+    identity = {'id': user_id, 'username': username, 'role': role}
+    if role == 'patient':
+        identity['patient_id'] = patient_id
+    elif role == 'clinic':
+        identity['clinic_id'] = clinic_id
+    return identity
+
+
+def current_profile_id(role):
+    """The caller's patient or clinic id, from the token when it carries one.
+
+    Tokens issued before the claim existed, or before the profile was
+    linked, fall back to a lookup.
+    """
+    identity = get_jwt_identity()
+    if identity.get(f'{role}_id') is not None:
+        return identity[f'{role}_id']
+    model = Patient if role == 'patient' else Clinic
+    return db.session.execute(select(model.id).where(model.user_id == identity['id'])).scalar()
+
+
 # Resource: User Registration
 class UserRegistration(Resource):
     def post(self):
@@ -100,54 +194,30 @@ class UserRegistration(Resource):
             if not data or 'username' not in data or 'password' not in data:
                 return {'message': 'Username and password required'}, 400
 
-            if User.query.filter_by(username=data['username']).first():
-                return {'message': 'Username already exists'}, 400
-
             user = User(
                 username=data['username'],
                 role=data.get('role', 'patient')
             )
-            user.set_password(data['password'])
-            db.session.add(user)
-            db.session.flush()
 
             if user.role == 'patient':
                 required_fields = ['name', 'email', 'contact']
                 for f in required_fields:
                     if f not in data:
-                        db.session.rollback()
                         return {'error': f'Missing patient field: {f}'}, 400
 
-                if Patient.query.filter_by(contact=data['contact']).first():
-                    db.session.rollback()
-                    return {'error': 'Contact number already exists'}, 400
-                if Patient.query.filter_by(email=data['email']).first():
-                    db.session.rollback()
-                    return {'error': 'Email already exists'}, 400
-
-                patient = Patient(
+                user.patient = Patient(
                     name=data['name'],
                     email=data['email'],
-                    contact=data['contact'],
-                    user_id=user.id
+                    contact=data['contact']
                 )
-                db.session.add(patient)
 
             elif user.role == 'clinic':
                 required_fields = ['name', 'specialty', 'contact', 'email', 'street', 'city']
                 for f in required_fields:
                     if f not in data:
-                        db.session.rollback()
                         return {'error': f'Missing clinic field: {f}'}, 400
 
-                if Clinic.query.filter_by(contact=data['contact']).first():
-                    db.session.rollback()
-                    return {'error': 'Contact number already exists'}, 400
-                if Clinic.query.filter_by(email=data['email']).first():
-                    db.session.rollback()
-                    return {'error': 'Email already exists'}, 400
-
-                clinic = Clinic(
+                user.clinic = Clinic(
                     name=data['name'],
                     specialty=data['specialty'],
                     description=data.get('description'),
@@ -155,14 +225,25 @@ class UserRegistration(Resource):
                     email=data['email'],
                     street=data['street'],
                     city=data['city'],
-                    image_url=data.get('image_url'),
-                    user_id=user.id
+                    image_url=data.get('image_url')
                 )
-                db.session.add(clinic)
 
+            # Hashed before the session touches the database, so no
+            # connection is held while bcrypt runs. Taken usernames, emails
+            # and contacts are caught by the unique constraints on commit.
+            user.set_password(data['password'])
+            db.session.add(user)
+            if user.patient:
+                apply_new_patients(date.today())
             db.session.commit()
             return {'message': 'User created successfully'}, 201
 
+        except IntegrityError as exc:
+            db.session.rollback()
+            return conflict_response(exc)
+        except HashingBusy as exc:
+            db.session.rollback()
+            return {'error': str(exc)}, 503, {'Retry-After': '1'}
         except Exception as exc:
             db.session.rollback()
             return {'error': str(exc)}, 500
@@ -176,15 +257,29 @@ class UserLogin(Resource):
             if not data or 'username' not in data or 'password' not in data:
                 return {'message': 'Username and password required'}, 400
 
-            user = User.query.filter_by(username=data['username']).first()
-            if not user or not user.check_password(data['password']):
+            # The profile ids go into the token, so later requests need no lookup.
+            user = db.session.execute(
+                select(User.id, User.username, User.role, User.password_hash,
+                       Patient.id.label('patient_id'), Clinic.id.label('clinic_id'))
+                .outerjoin(Patient, Patient.user_id == User.id)
+                .outerjoin(Clinic, Clinic.user_id == User.id)
+                .where(User.username == data['username'])
+            ).first()
+            # Hand the connection back to the pool while bcrypt runs.
+            db.session.rollback()
+            if not user or not password_hasher.verify(user.password_hash, data['password']):
                 return {'message': 'Invalid credentials'}, 401
 
-            identity = {
-                'id': user.id,
-                'username': user.username,
-                'role': user.role
-            }
+            # Upgrade hashes made with a different cost factor.
+            if password_hasher.needs_rehash(user.password_hash):
+                db.session.execute(
+                    update(User)
+                    .where(User.id == user.id, User.password_hash == user.password_hash)
+                    .values(password_hash=password_hasher.rehash(data['password']))
+                )
+                db.session.commit()
+
+            identity = token_identity(user.id, user.username, user.role, user.patient_id, user.clinic_id)
             access_token = create_access_token(identity=identity)
 
             response = make_response(jsonify({
@@ -194,7 +289,10 @@ class UserLogin(Resource):
             set_access_cookies(response, access_token)
             return response
 
+        except HashingBusy as exc:
+            return {'error': str(exc)}, 503, {'Retry-After': '1'}
         except Exception as exc:
+            db.session.rollback()
             return {'error': str(exc)}, 500
 
 
@@ -218,21 +316,18 @@ class UserLogout(Resource):
 
 
 class UserProfile(Resource):
-    @jwt_required()
+    @auth_required()
     def get(self):
         current_user = get_jwt_identity()
-        user = User.query.get(current_user['id'])
-        if not user:
-            return {'message': 'User not found'}, 404
-
         profile_data = {
-            'id': user.id,
-            'username': user.username,
-            'role': user.role
+            'id': current_user['id'],
+            'username': current_user['username'],
+            'role': current_user['role']
         }
 
-        if user.role == 'patient':
-            patient = Patient.query.filter_by(user_id=user.id).first()
+        if current_user['role'] == 'patient':
+            patient_id = current_profile_id('patient')
+            patient = db.session.get(Patient, patient_id) if patient_id else None
             if patient:
                 profile_data.update({
                     'name': patient.name,
@@ -240,8 +335,9 @@ class UserProfile(Resource):
                     'contact': patient.contact
                 })
 
-        elif user.role == 'clinic':
-            clinic = Clinic.query.filter_by(user_id=user.id).first()
+        elif current_user['role'] == 'clinic':
+            clinic_id = current_profile_id('clinic')
+            clinic = db.session.get(Clinic, clinic_id) if clinic_id else None
             if clinic:
                 profile_data.update({
                     'name': clinic.name,
@@ -256,46 +352,36 @@ class UserProfile(Resource):
 
         return {'user': profile_data}, 200
 
-    @jwt_required()
+    @auth_required()
     def put(self):
         current_user = get_jwt_identity()
-        user = User.query.get(current_user['id'])
-        if not user:
-            return {'message': 'User not found'}, 404
-
         data = request.get_json()
 
         try:
-            if user.role == 'patient':
-                patient = Patient.query.filter_by(user_id=user.id).first()
+            if current_user['role'] == 'patient':
+                patient_id = current_profile_id('patient')
+                patient = db.session.get(Patient, patient_id) if patient_id else None
                 if not patient:
                     return {'error': 'Patient profile not found'}, 404
 
-                if 'email' in data and data['email'] != patient.email:
-                    if Patient.query.filter_by(email=data['email']).first():
-                        return {'error': 'Email already exists'}, 400
+                if 'email' in data:
                     patient.email = data['email']
 
-                if 'contact' in data and data['contact'] != patient.contact:
-                    if Patient.query.filter_by(contact=data['contact']).first():
-                        return {'error': 'Contact already exists'}, 400
+                if 'contact' in data:
                     patient.contact = data['contact']
 
                 patient.name = data.get('name', patient.name)
 
-            elif user.role == 'clinic':
-                clinic = Clinic.query.filter_by(user_id=user.id).first()
+            elif current_user['role'] == 'clinic':
+                clinic_id = current_profile_id('clinic')
+                clinic = db.session.get(Clinic, clinic_id) if clinic_id else None
                 if not clinic:
                     return {'error': 'Clinic profile not found'}, 404
 
-                if 'email' in data and data['email'] != clinic.email:
-                    if Clinic.query.filter_by(email=data['email']).first():
-                        return {'error': 'Email already exists'}, 400
+                if 'email' in data:
                     clinic.email = data['email']
 
-                if 'contact' in data and data['contact'] != clinic.contact:
-                    if Clinic.query.filter_by(contact=data['contact']).first():
-                        return {'error': 'Contact already exists'}, 400
+                if 'contact' in data:
                     clinic.contact = data['contact']
 
                 clinic.name = data.get('name', clinic.name)
@@ -308,6 +394,9 @@ class UserProfile(Resource):
             db.session.commit()
             return {'message': 'Profile updated successfully'}, 200
 
+        except IntegrityError as exc:
+            db.session.rollback()
+            return conflict_response(exc)
         except Exception as exc:
             db.session.rollback()
             return {'error': str(exc)}, 500
@@ -315,64 +404,252 @@ class UserProfile(Resource):
 
 # Dashboard Resources
 class PatientDashboard(Resource):
-    @jwt_required()
-    @role_required('patient')
+    @auth_required('patient')
     def get(self):
-        current_user = get_jwt_identity()
-        patient = Patient.query.filter_by(user_id=current_user['id']).first()
+        patient_id = current_profile_id('patient')
+        patient = db.session.get(Patient, patient_id) if patient_id else None
         if not patient:
             return {'error': 'Patient profile not found'}, 404
 
-        bookings = Booking.query.filter_by(patient_id=patient.id).all()
+        try:
+            serialize = request_serializer('booking', request.args)
+        except SerializationError as exc:
+            return {'error': str(exc)}, 400
+
+        bookings = Booking.query.options(*BOOKING_LOAD_OPTIONS).filter_by(patient_id=patient.id).all()
         return {
             'patient': patient.to_dict(),
-            'bookings': [b.to_dict() for b in bookings]
+            'bookings': [serialize(b) for b in bookings]
         }, 200
 
 
 class ClinicDashboard(Resource):
-    @jwt_required()
-    @role_required('clinic')
+    @auth_required('clinic')
     def get(self):
-        current_user = get_jwt_identity()
-        clinic = Clinic.query.filter_by(user_id=current_user['id']).first()
+        clinic_id = current_profile_id('clinic')
+        clinic = db.session.get(Clinic, clinic_id, options=CLINIC_LOAD_OPTIONS) if clinic_id else None
         if not clinic:
             return {'error': 'Clinic profile not found'}, 404
 
-        bookings = []
-        for service in clinic.service_associations:
-            bookings.extend(service.bookings)
+        try:
+            start, end = parse_date_range(request.args)
+        except ValueError:
+            return {'error': 'Invalid date format. Use YYYY-MM-DD'}, 400
+
+        statuses = [s for s in request.args.get('status', '').split(',') if s]
+        if any(s not in BOOKING_STATUSES for s in statuses):
+            return {'error': f'Invalid status. Must be one of: {", ".join(BOOKING_STATUSES)}'}, 400
+
+        order = request.args.get('order', 'asc')
+        if order not in ('asc', 'desc'):
+            return {'error': 'order must be asc or desc'}, 400
+
+        # One SELECT for the whole page: the clinic service, service, patient
+        # and review come back joined to each booking.
+        query = Booking.query.join(Booking.clinic_service).join(ClinicService.service).options(
+            contains_eager(Booking.clinic_service).contains_eager(ClinicService.service),
+            joinedload(Booking.patient),
+            joinedload(Booking.review)
+        ).filter(ClinicService.clinic_id == clinic.id)
+        if start:
+            query = query.filter(Booking.appointment_date >= start)
+        if end:
+            query = query.filter(Booking.appointment_date < end)
+        if statuses:
+            query = query.filter(Booking.status.in_(statuses))
+
+        try:
+            bookings, next_cursor = keyset_page(
+                query,
+                [(Booking.appointment_date, order), (Booking.id, order)],
+                parse_limit(request.args.get('limit')),
+                after=request.args.get('after')
+            )
+        except PaginationError as exc:
+            return {'error': str(exc)}, 400
 
         return {
             'clinic': clinic.to_dict(),
-            'bookings': [b.to_dict() for b in bookings]
+            'bookings': [b.to_summary_dict() for b in bookings],
+            'next_cursor': next_cursor
         }, 200
 
 
 class AdminDashboard(Resource):
-    @jwt_required()
-    @role_required('admin')
+    @auth_required('admin')
     def get(self):
+        # Patients and bookings are the big tables; their totals come from the rollups.
         stats = {
             'users': User.query.count(),
             'clinics': Clinic.query.count(),
-            'patients': Patient.query.count(),
-            'bookings': Booking.query.count()
+            **totals()
         }
         return {'stats': stats}, 200
 
 
+# The most periods one analytics request may ask for.
+MAX_ANALYTICS_PERIODS = 1000
+
+
+class AdminAnalytics(Resource):
+    @auth_required('admin')
+    def get(self):
+        """Bookings, revenue, reviews and new patients per day, week or month."""
+        try:
+            end = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if request.args.get('to') else date.today()
+            start = (datetime.strptime(request.args['from'], '%Y-%m-%d').date() if request.args.get('from')
+                     else end - timedelta(days=29))
+        except ValueError:
+            return {'error': 'Invalid date format. Use YYYY-MM-DD'}, 400
+        if start > end:
+            return {'error': 'from must not be after to'}, 400
+
+        interval = request.args.get('interval', 'day')
+        if interval not in INTERVALS:
+            return {'error': f'interval must be one of: {", ".join(INTERVALS)}'}, 400
+        if period_count(start, end, interval) > MAX_ANALYTICS_PERIODS:
+            return {'error': f'At most {MAX_ANALYTICS_PERIODS} {interval}s per request'}, 400
+
+        try:
+            clinic_id = int(request.args['clinic_id']) if request.args.get('clinic_id') else None
+            service_id = int(request.args['service_id']) if request.args.get('service_id') else None
+        except ValueError:
+            return {'error': 'clinic_id and service_id must be integers'}, 400
+
+        try:
+            series = time_series(start, end, interval, clinic_id=clinic_id, service_id=service_id)
+            return {
+                'from': start.isoformat(),
+                'to': end.isoformat(),
+                'interval': interval,
+                'clinic_id': clinic_id,
+                'service_id': service_id,
+                'series': series
+            }, 200
+        except Exception as exc:
+            return {'error': str(exc)}, 500
+
+
+class AdminExport(Resource):
+    @auth_required('admin')
+    def get(self, kind):
+        if kind not in EXPORTS:
+            return {'error': f'Unknown export. Must be one of: {", ".join(EXPORTS)}'}, 404
+
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in FORMATS:
+            return {'error': f'format must be one of: {", ".join(FORMATS)}'}, 400
+
+        try:
+            start, end = parse_date_range(request.args)
+        except ValueError:
+            return {'error': 'Invalid date format. Use YYYY-MM-DD'}, 400
+
+        try:
+            clinic_id = int(request.args['clinic_id']) if request.args.get('clinic_id') else None
+            after_id = int(request.args['after_id']) if request.args.get('after_id') else None
+        except ValueError:
+            return {'error': 'clinic_id and after_id must be integers'}, 400
+
+        return stream_export(kind, fmt, start=start, end=end, clinic_id=clinic_id, after_id=after_id)
+
+
+class AdminClinicImport(Resource):
+    @auth_required('admin')
+    def post(self):
+        try:
+            upload = request.files.get('file')
+            if upload:
+                raw = upload.read().decode('utf-8-sig')
+                is_csv = (upload.filename or '').lower().endswith('.csv') or upload.mimetype == 'text/csv'
+            else:
+                raw = request.get_data(as_text=True)
+                is_csv = request.mimetype == 'text/csv'
+            records = parse_csv(raw) if is_csv else parse_json(raw)
+        except (BulkImportError, UnicodeDecodeError) as exc:
+            return {'error': str(exc)}, 400
+
+        try:
+            dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+            report = import_clinics(records, dry_run=dry_run)
+            return report, 200 if report['created'] or dry_run or not report['failed'] else 400
+        except Exception as exc:
+            db.session.rollback()
+            return {'error': str(exc)}, 500
+
+
+class CacheStats(Resource):
+    @auth_required('admin')
+    def get(self):
+        return {'catalog_cache': catalog_cache.snapshot()}, 200
+
+
+class PrometheusMetrics(Resource):
+    @auth_required('admin')
+    def get(self):
+        if not metrics.enabled:
+            return {'error': 'Metrics are disabled'}, 503
+        body, content_type = metrics.render()
+        return make_response(body, 200, {'Content-Type': content_type})
+
+
+class PasswordHashingStats(Resource):
+    @auth_required('admin')
+    def get(self):
+        return {'password_hashing': password_hasher.snapshot()}, 200
+
+
 # Clinic resources
+# Batched eager loading for everything Clinic.to_dict() touches, so a page of
+# clinics costs a fixed number of SELECTs regardless of its size.
+CLINIC_LOAD_OPTIONS = (
+    selectinload(Clinic.service_associations).selectinload(ClinicService.service),
+    selectinload(Clinic.insurance_accepted),
+)
+
+
+# Tables behind Clinic.to_dict(), for conditional GETs
+CLINIC_TABLES = ('clinics', 'clinic_service', 'services', 'insurances', 'clinic_insurance')
+
+CLINIC_SORTS = {
+    'id': [(Clinic.id, 'asc')],
+    'rating': [(Clinic.rating_average, 'desc'), (Clinic.rating_count, 'desc'), (Clinic.id, 'desc')],
+}
+
+
 class Clinics(Resource):
+    @conditional(*CLINIC_TABLES)
     def get(self):
         try:
-            clinics = [clinic.to_dict() for clinic in Clinic.query.all()]
-            return clinics, 200
+            query = Clinic.query.options(*CLINIC_LOAD_OPTIONS)
+            serialize = request_serializer('clinic', request.args)
+            limit = parse_limit(request.args.get('limit'))
+            after = request.args.get('after')
+
+            # Free-text search: best matches first, always paginated.
+            if tokenize(request.args.get('q')):
+                matches = ranked_matches(request.args['q'])
+                query = query.join(matches, matches.c.clinic_id == Clinic.id).add_columns(matches.c.rank)
+                rows, next_cursor = keyset_page(
+                    query, [(matches.c.rank, 'asc'), (Clinic.id, 'asc')], limit, after=after,
+                    key=lambda row: (row.rank, row.Clinic.id)
+                )
+                headers = {'X-Next-Cursor': next_cursor} if next_cursor else {}
+                return [serialize(row.Clinic) for row in rows], 200, headers
+
+            sort = request.args.get('sort', 'id')
+            if sort not in CLINIC_SORTS:
+                return {'error': f'sort must be one of: {", ".join(CLINIC_SORTS)}'}, 400
+
+            page, next_cursor = keyset_page(query, CLINIC_SORTS[sort], limit, after=after)
+            headers = {'X-Next-Cursor': next_cursor} if next_cursor else {}
+            return [serialize(clinic) for clinic in page], 200, headers
+        except (PaginationError, SerializationError) as exc:
+            return {'error': str(exc)}, 400
         except Exception as exc:
             return {'error': str(exc)}, 500
 
-    @jwt_required()
-    @admin_or_role_required(['admin', 'clinic'])
+    @auth_required('admin', 'clinic')
     def post(self):
         try:
             data = request.get_json()
@@ -381,11 +658,6 @@ class Clinics(Resource):
                 if field not in data or not data[field]:
                     return {'error': f'Missing or empty required field: {field}'}, 400
 
-            if Clinic.query.filter_by(contact=data['contact']).first():
-                return {'error': 'Contact number already exists'}, 400
-            if Clinic.query.filter_by(email=data['email']).first():
-                return {'error': 'Email already exists'}, 400
-
             clinic = Clinic(
                 name=data['name'],
                 specialty=data['specialty'],
@@ -396,26 +668,46 @@ class Clinics(Resource):
                 city=data['city'],
                 image_url=data.get('image_url')
             )
+            # A clinic account without a clinic yet is creating its own.
+            current_user = get_jwt_identity()
+            claim_profile = current_user['role'] == 'clinic' and not current_profile_id('clinic')
+            if claim_profile:
+                clinic.user_id = current_user['id']
             db.session.add(clinic)
             db.session.commit()
-            return {'message': 'Clinic created successfully', 'clinic': clinic.to_dict()}, 201
+
+            response = api.make_response({'message': 'Clinic created successfully', 'clinic': clinic.to_dict()}, 201)
+            if claim_profile:
+                # Reissue the token so it carries the new clinic_id.
+                identity = token_identity(current_user['id'], current_user['username'], 'clinic', clinic_id=clinic.id)
+                set_access_cookies(response, create_access_token(identity=identity))
+            return response
+        except IntegrityError as exc:
+            db.session.rollback()
+            return conflict_response(exc)
         except Exception as exc:
             db.session.rollback()
             return {'error': str(exc)}, 500
 
 
 class ClinicsById(Resource):
+    @conditional(*CLINIC_TABLES)
     def get(self, id):
         try:
-            clinic = Clinic.query.get(id)
+            clinic = cached_dict(
+                sparse_cache_key(f'clinics:{id}'), CLINIC_TABLES,
+                lambda: Clinic.query.options(*CLINIC_LOAD_OPTIONS).get(id),
+                request_serializer('clinic', request.args)
+            )
             if not clinic:
                 return {'error': 'Clinic not found'}, 404
-            return {'clinic': clinic.to_dict()}, 200
+            return {'clinic': clinic}, 200
+        except SerializationError as exc:
+            return {'error': str(exc)}, 400
         except Exception as exc:
             return {'error': str(exc)}, 500
 
-    @jwt_required()
-    @admin_or_role_required(['admin', 'clinic'])
+    @auth_required('admin', 'clinic')
     def patch(self, id):
         try:
             clinic = Clinic.query.get(id)
@@ -443,8 +735,7 @@ class ClinicsById(Resource):
             db.session.rollback()
             return {'error': str(exc)}, 500
 
-    @jwt_required()
-    @role_required('admin')
+    @auth_required('admin')
     def delete(self, id):
         try:
             clinic = Clinic.query.get(id)
@@ -452,6 +743,7 @@ class ClinicsById(Resource):
                 return {'error': 'Clinic not found'}, 404
 
             db.session.delete(clinic)
+            rebuild_rollups(clinic_ids=[id])
             db.session.commit()
             return {'message': 'Clinic deleted successfully'}, 204
         except Exception as exc:
@@ -459,17 +751,112 @@ class ClinicsById(Resource):
             return {'error': str(exc)}, 500
 
 
+class ClinicSearch(Resource):
+    @conditional(*CLINIC_TABLES)
+    def get(self):
+        try:
+            args = request.args
+            serialize = request_serializer('clinic', args)
+            limit = parse_limit(args.get('limit'))
+            has_text = bool(tokenize(args.get('q')))
+            sort = args.get('sort', 'relevance' if has_text else 'name')
+            if sort not in ('name', 'price', 'rating', 'relevance'):
+                return {'error': 'sort must be one of: name, price, rating, relevance'}, 400
+            if sort == 'relevance' and not has_text:
+                return {'error': 'sort=relevance requires q'}, 400
+
+            try:
+                service_id = int(args['service_id']) if args.get('service_id') else None
+                insurance_ids = [
+                    int(value)
+                    for raw in args.getlist('insurance_id')
+                    for value in raw.split(',') if value
+                ]
+            except ValueError:
+                return {'error': 'service_id and insurance_id must be integers'}, 400
+
+            try:
+                min_price = Decimal(args['min_price']) if args.get('min_price') else None
+                max_price = Decimal(args['max_price']) if args.get('max_price') else None
+            except InvalidOperation:
+                return {'error': 'min_price and max_price must be numbers'}, 400
+
+            query = Clinic.query.options(*CLINIC_LOAD_OPTIONS)
+            if has_text:
+                matches = ranked_matches(args['q'])
+                query = query.join(matches, matches.c.clinic_id == Clinic.id).add_columns(matches.c.rank)
+            if args.get('city'):
+                query = query.filter(Clinic.city == args['city'])
+            if args.get('specialty'):
+                query = query.filter(Clinic.specialty == args['specialty'])
+            if insurance_ids:
+                query = query.filter(Clinic.id.in_(
+                    select(clinic_insurance.c.clinic_id)
+                    .where(clinic_insurance.c.insurance_id.in_(insurance_ids))
+                ))
+
+            # Price filters and price sorting work on each clinic's cheapest
+            # matching ClinicService, so clinics without one are left out.
+            priced = service_id is not None or min_price is not None or max_price is not None
+            if priced or sort == 'price':
+                prices = db.session.query(
+                    ClinicService.clinic_id.label('clinic_id'),
+                    func.min(ClinicService.price).label('price')
+                )
+                if service_id is not None:
+                    prices = prices.filter(ClinicService.service_id == service_id)
+                if min_price is not None:
+                    prices = prices.filter(ClinicService.price >= min_price)
+                if max_price is not None:
+                    prices = prices.filter(ClinicService.price <= max_price)
+                prices = prices.group_by(ClinicService.clinic_id).subquery()
+
+                query = query.join(prices, prices.c.clinic_id == Clinic.id).add_columns(prices.c.price)
+            else:
+                query = query.add_columns(db.literal(None).label('price'))
+
+            if sort == 'price':
+                ordering = [(prices.c.price, 'asc'), (Clinic.id, 'asc')]
+                key = lambda row: (row.price, row.Clinic.id)
+            elif sort == 'relevance':
+                ordering = [(matches.c.rank, 'asc'), (Clinic.id, 'asc')]
+                key = lambda row: (row.rank, row.Clinic.id)
+            elif sort == 'rating':
+                ordering = CLINIC_SORTS['rating']
+                key = lambda row: (row.Clinic.rating_average, row.Clinic.rating_count, row.Clinic.id)
+            else:
+                ordering = [(Clinic.name, 'asc'), (Clinic.id, 'asc')]
+                key = lambda row: (row.Clinic.name, row.Clinic.id)
+
+            rows, next_cursor = keyset_page(query, ordering, limit, after=args.get('after'), key=key)
+
+            results = []
+            for row in rows:
+                result = serialize(row.Clinic)
+                result['price'] = row.price
+                results.append(result)
+
+            headers = {'X-Next-Cursor': next_cursor} if next_cursor else {}
+            return results, 200, headers
+        except (PaginationError, SerializationError) as exc:
+            return {'error': str(exc)}, 400
+        except Exception as exc:
+            return {'error': str(exc)}, 500
+
+
 # Service resources
 class Services(Resource):
+    @conditional('services')
     def get(self):
         try:
-            services = [service.to_dict() for service in Service.query.all()]
+            services = catalog_cache.get_or_set(
+                'services', ('services',), lambda: [service.to_dict() for service in Service.query.all()]
+            )
             return services, 200
         except Exception as exc:
             return {'error': str(exc)}, 500
 
-    @jwt_required()
-    @role_required('admin')
+    @auth_required('admin')
     def post(self):
         try:
             data = request.get_json()
@@ -494,17 +881,17 @@ class Services(Resource):
 
 
 class ServicesById(Resource):
+    @conditional('services')
     def get(self, id):
         try:
-            service = Service.query.get(id)
+            service = cached_dict(f'services:{id}', ('services',), lambda: Service.query.get(id))
             if not service:
                 return {'error': 'Service not found'}, 404
-            return {'service': service.to_dict()}, 200
+            return {'service': service}, 200
         except Exception as exc:
             return {'error': str(exc)}, 500
 
-    @jwt_required()
-    @role_required('admin')
+    @auth_required('admin')
     def patch(self, id):
         try:
             service = Service.query.get(id)
@@ -528,15 +915,17 @@ class ServicesById(Resource):
             db.session.rollback()
             return {'error': str(exc)}, 500
 
-    @jwt_required()
-    @role_required('admin')
+    @auth_required('admin')
     def delete(self, id):
         try:
             service = Service.query.get(id)
             if not service:
                 return {'error': 'Service not found'}, 404
 
+            clinic_ids = [assoc.clinic_id for assoc in service.clinic_associations]
             db.session.delete(service)
+            rebuild_ratings(clinic_ids)
+            rebuild_rollups(clinic_ids=clinic_ids)
             db.session.commit()
             return {'message': 'Service deleted successfully'}, 204
         except Exception as exc:
@@ -544,17 +933,89 @@ class ServicesById(Resource):
             return {'error': str(exc)}, 500
 
 
+class ServiceEarliestSlots(Resource):
+    def get(self, id):
+        try:
+            service = Service.query.get(id)
+            if not service:
+                return {'error': 'Service not found'}, 404
+
+            args = request.args
+            try:
+                limit = parse_limit(args.get('limit'), default=5, maximum=50)
+                insurance_ids = [
+                    int(value)
+                    for raw in args.getlist('insurance_id')
+                    for value in raw.split(',') if value
+                ]
+            except (PaginationError, ValueError):
+                return {'error': 'limit and insurance_id must be positive integers'}, 400
+
+            try:
+                start, end = parse_window(args.get('from'), args.get('to'), default_days=MAX_WINDOW_DAYS)
+            except ValueError as exc:
+                return {'error': str(exc)}, 400
+
+            query = db.session.query(ClinicService.id, ClinicService.clinic_id, ClinicService.price).join(
+                Clinic, ClinicService.clinic_id == Clinic.id
+            ).filter(ClinicService.service_id == service.id)
+            if args.get('city'):
+                query = query.filter(Clinic.city == args['city'])
+            if args.get('specialty'):
+                query = query.filter(Clinic.specialty == args['specialty'])
+            if insurance_ids:
+                query = query.filter(Clinic.id.in_(
+                    select(clinic_insurance.c.clinic_id)
+                    .where(clinic_insurance.c.insurance_id.in_(insurance_ids))
+                ))
+            offers = {clinic_service_id: (clinic_id, price) for clinic_service_id, clinic_id, price in query}
+
+            slots = earliest_slots(
+                {clinic_service_id: clinic_id for clinic_service_id, (clinic_id, _) in offers.items()},
+                service.duration, start, end, limit
+            )
+
+            clinic_ids = {offers[clinic_service_id][0] for _, clinic_service_id in slots}
+            clinics = {
+                clinic.id: clinic
+                for clinic in Clinic.query.filter(Clinic.id.in_(clinic_ids)).all()
+            } if clinic_ids else {}
+
+            step = timedelta(minutes=service.duration)
+            results = []
+            for slot, clinic_service_id in slots:
+                clinic_id, price = offers[clinic_service_id]
+                clinic = clinics[clinic_id]
+                results.append({
+                    'start': slot.strftime(SLOT_FORMAT),
+                    'end': (slot + step).strftime(SLOT_FORMAT),
+                    'clinic_service_id': clinic_service_id,
+                    'price': price,
+                    'clinic': {
+                        'id': clinic.id,
+                        'name': clinic.name,
+                        'street': clinic.street,
+                        'city': clinic.city
+                    }
+                })
+            return {'service': service.to_dict(), 'slots': results}, 200
+        except Exception as exc:
+            return {'error': str(exc)}, 500
+
+
 # Insurance resources
 class Insurances(Resource):
+    @conditional('insurances')
     def get(self):
         try:
-            insurances = [insurance.to_dict() for insurance in Insurance.query.all()]
+            insurances = catalog_cache.get_or_set(
+                'insurances', ('insurances',), lambda: [insurance.to_dict() for insurance in Insurance.query.all()]
+            )
             return insurances, 200
         except Exception as exc:
             return {'error': str(exc)}, 500
 
-    @jwt_required()
-    @role_required('admin')
+    @auth_required('admin')
     def post(self):
         try:
             data = request.get_json()
@@ -574,17 +1035,17 @@ class Insurances(Resource):
 
 
 class InsurancesById(Resource):
+    @conditional('insurances')
     def get(self, id):
         try:
-            insurance = Insurance.query.get(id)
+            insurance = cached_dict(f'insurances:{id}', ('insurances',), lambda: Insurance.query.get(id))
             if not insurance:
                 return {'error': 'Insurance not found'}, 404
-            return {'insurance': insurance.to_dict()}, 200
+            return {'insurance': insurance}, 200
         except Exception as exc:
             return {'error': str(exc)}, 500
 
-    @jwt_required()
-    @role_required('admin')
+    @auth_required('admin')
     def patch(self, id):
         try:
             insurance = Insurance.query.get(id)
@@ -604,8 +1065,7 @@ class InsurancesById(Resource):
             db.session.rollback()
             return {'error': str(exc)}, 500
 
-    @jwt_required()
-    @role_required('admin')
+    @auth_required('admin')
     def delete(self, id):
         try:
             insurance = Insurance.query.get(id)
@@ -622,8 +1082,7 @@ class InsurancesById(Resource):
 
 # Patient resources
 class Patients(Resource):
-    @jwt_required()
-    @admin_or_role_required(['admin', 'clinic'])
+    @auth_required('admin', 'clinic')
     def get(self):
         try:
             patients = [patient.to_dict() for patient in Patient.query.all()]
@@ -633,8 +1092,7 @@ class Patients(Resource):
 
 
 class PatientsById(Resource):
-    @jwt_required()
-    @admin_or_role_required(['admin', 'clinic'])
+    @auth_required('admin', 'clinic')
     def get(self, id):
         try:
             patient = Patient.query.get(id)
@@ -644,8 +1102,7 @@ class PatientsById(Resource):
         except Exception as exc:
             return {'error': str(exc)}, 500
 
-    @jwt_required()
-    @admin_or_role_required(['admin', 'clinic'])
+    @auth_required('admin', 'clinic')
     def patch(self, id):
         try:
             patient = Patient.query.get(id)
@@ -654,14 +1111,6 @@ class PatientsById(Resource):
 
             data = request.get_json()
 
-            if 'contact' in data and data['contact'] != patient.contact:
-                if Patient.query.filter_by(contact=data['contact']).first():
-                    return {'error': 'Contact number already exists'}, 400
-
-            if 'email' in data and data['email'] != patient.email:
-                if Patient.query.filter_by(email=data['email']).first():
-                    return {'error': 'Email already exists'}, 400
-
             fields = ['name', 'contact', 'email']
             for field in fields:
                 if field in data:
@@ -669,19 +1118,29 @@ class PatientsById(Resource):
 
             db.session.commit()
             return {'message': 'Patient updated successfully', 'patient': patient.to_dict()}, 200
+        except IntegrityError as exc:
+            db.session.rollback()
+            return conflict_response(exc)
         except Exception as exc:
             db.session.rollback()
             return {'error': str(exc)}, 500
 
-    @jwt_required()
-    @role_required('admin')
+    @auth_required('admin')
     def delete(self, id):
         try:
             patient = Patient.query.get(id)
             if not patient:
                 return {'error': 'Patient not found'}, 404
 
+            clinic_ids = {b.clinic_service.clinic_id for b in patient.bookings if b.review}
+            apply_booking_changes([(booking_key(booking), None) for booking in patient.bookings])
+            for booking in patient.bookings:
+                if booking.review:
+                    apply_review_change(review_key(booking.review, booking), old_rating=booking.review.rating)
+            if patient.date_joined:
+                apply_new_patients(patient.date_joined.date(), -1)
             db.session.delete(patient)
+            rebuild_ratings(list(clinic_ids))
             db.session.commit()
             return {'message': 'Patient deleted successfully'}, 204
         except Exception as exc:
@@ -690,13 +1149,20 @@ class PatientsById(Resource):
 
 
 # Review resources
+REVIEW_LOAD_OPTIONS = (
+    selectinload(Review.booking).selectinload(Booking.patient),
+    selectinload(Review.booking).joinedload(Booking.clinic_service).selectinload(ClinicService.clinic),
+)
+
+
 class Reviews(Resource):
     def get(self):
         try:
             clinic_id = request.args.get('clinic_id')
             patient_id = request.args.get('patient_id')
 
-            query = Review.query
+            serialize = request_serializer('review', request.args)
+            query = Review.query.options(*REVIEW_LOAD_OPTIONS)
 
             if clinic_id:
                 query = query.join(Booking).join(ClinicService).filter(ClinicService.clinic_id == clinic_id)
@@ -704,12 +1170,14 @@ class Reviews(Resource):
             if patient_id:
                 query = query.join(Booking).filter(Booking.patient_id == patient_id)
 
-            reviews = [review.to_dict() for review in query.all()]
+            reviews = [serialize(review) for review in query.all()]
             return reviews, 200
+        except SerializationError as exc:
+            return {'error': str(exc)}, 400
         except Exception as exc:
             return {'error': str(exc)}, 500
 
-    @jwt_required()
+    @auth_required()
     def post(self):
         try:
             data = request.get_json()
@@ -729,7 +1197,7 @@ class Reviews(Resource):
                 return {'error': 'Booking already has a review'}, 400
 
             current_user = get_jwt_identity()
-            if current_user['role'] == 'patient' and booking.patient_id != current_user['id']:
+            if current_user['role'] == 'patient' and booking.patient_id != current_profile_id('patient'):
                 return {'error': 'You can only review your own bookings'}, 403
 
             review = Review(
@@ -738,6 +1206,8 @@ class Reviews(Resource):
                 booking_id=data['booking_id']
             )
             db.session.add(review)
+            apply_rating_change(booking.clinic_service.clinic_id, new_rating=review.rating)
+            apply_review_change(review_key(review, booking), new_rating=review.rating)
             db.session.commit()
             return {'message': 'Review created successfully', 'review': review.to_dict()}, 201
         except Exception as exc:
@@ -748,14 +1218,17 @@ class Reviews(Resource):
 class ReviewsById(Resource):
     def get(self, id):
         try:
+            serialize = request_serializer('review', request.args)
             review = Review.query.get(id)
             if not review:
                 return {'error': 'Review not found'}, 404
-            return {'review': review.to_dict()}, 200
+            return {'review': serialize(review)}, 200
+        except SerializationError as exc:
+            return {'error': str(exc)}, 400
         except Exception as exc:
             return {'error': str(exc)}, 500
 
-    @jwt_required()
+    @auth_required()
     def patch(self, id):
         try:
             review = Review.query.get(id)
@@ -763,7 +1236,7 @@ class ReviewsById(Resource):
                 return {'error': 'Review not found'}, 404
 
             current_user = get_jwt_identity()
-            if current_user['role'] == 'patient' and review.booking.patient_id != current_user['id']:
+            if current_user['role'] == 'patient' and review.booking.patient_id != current_profile_id('patient'):
                 return {'error': 'You can only edit your own reviews'}, 403
 
             data = request.get_json()
@@ -771,18 +1244,21 @@ class ReviewsById(Resource):
             if 'rating' in data and not (1 <= data['rating'] <= 5):
                 return {'error': 'Rating must be between 1 and 5'}, 400
 
+            old_rating = review.rating
             fields = ['comment', 'rating']
             for field in fields:
                 if field in data:
                     setattr(review, field, data[field])
 
+            apply_rating_change(review.booking.clinic_service.clinic_id, old_rating, review.rating)
+            apply_review_change(review_key(review), old_rating, review.rating)
             db.session.commit()
             return {'message': 'Review updated successfully', 'review': review.to_dict()}, 200
         except Exception as exc:
             db.session.rollback()
             return {'error': str(exc)}, 500
 
-    @jwt_required()
+    @auth_required()
     def delete(self, id):
         try:
             review = Review.query.get(id)
@@ -790,10 +1266,12 @@ class ReviewsById(Resource):
                 return {'error': 'Review not found'}, 404
 
             current_user = get_jwt_identity()
-            if (current_user['role'] == 'patient' and review.booking.patient_id != current_user['id']
+            if (current_user['role'] == 'patient' and review.booking.patient_id != current_profile_id('patient')
                     and current_user['role'] != 'admin'):
                 return {'error': 'You can only delete your own reviews'}, 403
 
+            apply_rating_change(review.booking.clinic_service.clinic_id, old_rating=review.rating)
+            apply_review_change(review_key(review), old_rating=review.rating)
             db.session.delete(review)
             db.session.commit()
             return {'message': 'Review deleted successfully'}, 204
@@ -803,40 +1281,58 @@ class ReviewsById(Resource):
 
 
 # Booking resources
+# The unique index that rejects a second live booking for a slot.
+ACTIVE_SLOT_INDEX = 'uq_bookings_clinic_service_id_appointment_date_active'
+
+# Everything the default booking view reads, in a fixed number of SELECTs.
+BOOKING_LOAD_OPTIONS = (
+    selectinload(Booking.patient),
+    selectinload(Booking.review),
+    joinedload(Booking.clinic_service).selectinload(ClinicService.clinic),
+    joinedload(Booking.clinic_service).selectinload(ClinicService.service),
+)
+
+
 class Bookings(Resource):
-    @jwt_required()
+    @auth_required()
     def get(self):
         try:
             current_user = get_jwt_identity()
             clinic_id = request.args.get('clinic_id')
             patient_id = request.args.get('patient_id')
             status = request.args.get('status')
+            serialize = request_serializer('booking', request.args)
 
-            query = Booking.query
+            query = Booking.query.options(*BOOKING_LOAD_OPTIONS)
+            clinic_filters = []
 
             if current_user['role'] == 'patient':
-                patient = Patient.query.filter_by(user_id=current_user['id']).first()
-                if not patient:
+                own_patient_id = current_profile_id('patient')
+                if not own_patient_id:
                     return {'error': 'Patient profile not found'}, 404
-                query = query.filter_by(patient_id=patient.id)
+                query = query.filter(Booking.patient_id == own_patient_id)
             elif current_user['role'] == 'clinic':
-                clinic = Clinic.query.filter_by(user_id=current_user['id']).first()
-                if clinic:
-                    query = query.join(ClinicService).filter(ClinicService.clinic_id == clinic.id)
+                own_clinic_id = current_profile_id('clinic')
+                if own_clinic_id:
+                    clinic_filters.append(ClinicService.clinic_id == own_clinic_id)
 
             if clinic_id and current_user['role'] != 'patient':
-                query = query.join(ClinicService).filter(ClinicService.clinic_id == clinic_id)
+                clinic_filters.append(ClinicService.clinic_id == clinic_id)
+            if clinic_filters:
+                query = query.join(ClinicService).filter(*clinic_filters)
             if patient_id and current_user['role'] == 'admin':
-                query = query.filter_by(patient_id=patient_id)
+                query = query.filter(Booking.patient_id == patient_id)
             if status:
-                query = query.filter_by(status=status)
+                query = query.filter(Booking.status == status)
 
-            bookings = [booking.to_dict() for booking in query.all()]
+            bookings = [serialize(booking) for booking in query.all()]
             return bookings, 200
+        except SerializationError as exc:
+            return {'error': str(exc)}, 400
         except Exception as exc:
             return {'error': str(exc)}, 500
 
-    @jwt_required()
+    @auth_required()
     def post(self):
         try:
             data = request.get_json()
@@ -856,6 +1352,10 @@ class Bookings(Resource):
             except (ValueError, TypeError):
                 return {'error': 'Invalid appointment date format. Use YYYY-MM-DD HH:MM'}, 400
 
+            # Held until commit so concurrent requests for this calendar
+            # check availability one at a time.
+            lock_calendar(data['clinic_service_id'])
+
             clinic_service = ClinicService.query.get(data['clinic_service_id'])
             if not clinic_service:
                 return {'error': 'Clinic service combination not found'}, 404
@@ -869,6 +1369,9 @@ class Bookings(Resource):
             if status not in statuses:
                 return {'error': f'Invalid status. Must be one of: {", ".join(statuses)}'}, 400
 
+            if status != 'cancelled' and not is_slot_available(clinic_service, appointment_date):
+                return {'error': 'Requested appointment slot is not available'}, 409
+
             booking = Booking(
                 booking_date=datetime.now(),
                 appointment_date=appointment_date,
@@ -879,15 +1382,21 @@ class Bookings(Resource):
             )
 
             db.session.add(booking)
+            apply_booking_change(new=booking_key(booking, clinic_service))
             db.session.commit()
             return {'message': 'Booking created successfully', 'booking': booking.to_dict()}, 201
+        except IntegrityError as exc:
+            db.session.rollback()
+            if violates(exc, ACTIVE_SLOT_INDEX):
+                return {'error': 'Requested appointment slot is not available'}, 409
+            return conflict_response(exc)
         except Exception as exc:
             db.session.rollback()
             return {'error': str(exc)}, 500
 
 
 class BookingsById(Resource):
-    @jwt_required()
+    @auth_required()
     def get(self, id):
         try:
             booking = Booking.query.get(id)
@@ -895,15 +1404,17 @@ class BookingsById(Resource):
                 return {'error': 'Booking not found'}, 404
 
             current_user = get_jwt_identity()
-            if (current_user['role'] == 'patient' and booking.patient_id != current_user['id']
+            if (current_user['role'] == 'patient' and booking.patient_id != current_profile_id('patient')
                     and current_user['role'] != 'admin'):
                 return {'error': 'You can only view your own bookings'}, 403
 
-            return {'booking': booking.to_dict()}, 200
+            return {'booking': request_serializer('booking', request.args)(booking)}, 200
+        except SerializationError as exc:
+            return {'error': str(exc)}, 400
         except Exception as exc:
             return {'error': str(exc)}, 500
 
-    @jwt_required()
+    @auth_required()
     def patch(self, id):
         try:
             booking = Booking.query.get(id)
@@ -911,20 +1422,28 @@ class BookingsById(Resource):
                 return {'error': 'Booking not found'}, 404
 
             current_user = get_jwt_identity()
-            if (current_user['role'] == 'patient' and booking.patient_id != current_user['id']
+            if (current_user['role'] == 'patient' and booking.patient_id != current_profile_id('patient')
                     and current_user['role'] not in ['admin', 'clinic']):
                 return {'error': 'Insufficient permissions to modify this booking'}, 403
 
             data = request.get_json()
+            old_key = booking_key(booking)
 
             if 'appointment_date' in data:
                 try:
                     appointment_date = datetime.strptime(data['appointment_date'], '%Y-%m-%d %H:%M')
                     if appointment_date <= datetime.now():
                         return {'error': 'Appointment date must be in the future'}, 400
-                    booking.appointment_date = appointment_date
                 except (ValueError, TypeError):
                     return {'error': 'Invalid appointment date format. Use YYYY-MM-DD HH:MM'}, 400
+                if appointment_date != booking.appointment_date:
+                    # Re-read under the calendar lock; see Bookings.post.
+                    db.session.rollback()
+                    lock_calendar(booking.clinic_service_id)
+                    if not is_slot_available(booking.clinic_service, appointment_date,
+                                             exclude_booking_id=booking.id):
+                        return {'error': 'Requested appointment slot is not available'}, 409
+                booking.appointment_date = appointment_date
 
             if 'status' in data:
                 statuses = ['pending', 'confirmed', 'cancelled', 'completed']
@@ -935,13 +1454,19 @@ class BookingsById(Resource):
             if 'notes' in data:
                 booking.notes = data['notes']
 
+            apply_booking_change(old_key, booking_key(booking))
             db.session.commit()
             return {'message': 'Booking updated successfully', 'booking': booking.to_dict()}, 200
+        except IntegrityError as exc:
+            db.session.rollback()
+            if violates(exc, ACTIVE_SLOT_INDEX):
+                return {'error': 'Requested appointment slot is not available'}, 409
+            return conflict_response(exc)
         except Exception as exc:
             db.session.rollback()
             return {'error': str(exc)}, 500
 
-    @jwt_required()
+    @auth_required()
     def delete(self, id):
         try:
             booking = Booking.query.get(id)
@@ -949,10 +1474,14 @@ class BookingsById(Resource):
                 return {'error': 'Booking not found'}, 404
 
             current_user = get_jwt_identity()
-            if (current_user['role'] == 'patient' and booking.patient_id != current_user['id']
+            if (current_user['role'] == 'patient' and booking.patient_id != current_profile_id('patient')
                     and current_user['role'] != 'admin'):
                 return {'error': 'You can only delete your own bookings'}, 403
 
+            if booking.review:
+                apply_rating_change(booking.clinic_service.clinic_id, old_rating=booking.review.rating)
+                apply_review_change(review_key(booking.review, booking), old_rating=booking.review.rating)
+            apply_booking_change(old=booking_key(booking))
             db.session.delete(booking)
             db.session.commit()
             return {'message': 'Booking deleted successfully'}, 204
@@ -961,6 +1490,95 @@ class BookingsById(Resource):
             return {'error': str(exc)}, 500
 
 
+class BookingStatusBatch(Resource):
+    @auth_required('admin', 'clinic')
+    def patch(self):
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return {'error': 'Provide ids and status, or updates: [{id, status}]'}, 400
+        if 'updates' in data:
+            updates = data['updates']
+        else:
+            updates = [{'id': id, 'status': data.get('status')} for id in data.get('ids') or []]
+
+        if not isinstance(updates, list) or not updates:
+            return {'error': 'Provide ids and status, or updates: [{id, status}]'}, 400
+        if len(updates) > MAX_BATCH_SIZE:
+            return {'error': f'At most {MAX_BATCH_SIZE} bookings per request'}, 400
+
+        targets = {}
+        for item in updates:
+            # bool is a subclass of int, so true/false would pass as ids.
+            if not isinstance(item, dict) or not isinstance(item.get('id'), int) or isinstance(item['id'], bool):
+                return {'error': 'Every update needs an integer id'}, 400
+            if item.get('status') not in BOOKING_STATUSES:
+                return {'error': f'Invalid status. Must be one of: {", ".join(BOOKING_STATUSES)}'}, 400
+            if item['id'] in targets:
+                return {'error': f'Booking {item["id"]} listed twice'}, 400
+            targets[item['id']] = item['status']
+
+        try:
+            current_user = get_jwt_identity()
+            # One query for the current status and owner of every booking.
+            rows = db.session.execute(
+                select(Booking.id, Booking.status, Clinic.user_id, Booking.appointment_date,
+                       ClinicService.clinic_id, ClinicService.service_id, ClinicService.price)
+                .join(ClinicService, ClinicService.id == Booking.clinic_service_id)
+                .join(Clinic, Clinic.id == ClinicService.clinic_id)
+                .where(Booking.id.in_(targets))
+            ).all()
+            found = {row.id: (row.status, row.user_id) for row in rows}
+            by_id = {row.id: row for row in rows}
+
+            results, changes = {}, {}
+            for id, target in targets.items():
+                if id not in found:
+                    results[id] = {'id': id, 'result': 'not_found'}
+                    continue
+                status, owner = found[id]
+                if current_user['role'] != 'admin' and owner != current_user['id']:
+                    results[id] = {'id': id, 'result': 'forbidden'}
+                elif status == target:
+                    results[id] = {'id': id, 'status': status, 'result': 'unchanged'}
+                elif target not in BOOKING_TRANSITIONS[status]:
+                    results[id] = {'id': id, 'status': status, 'result': 'invalid_transition'}
+                else:
+                    changes[id] = (status, target)
+
+            updated = set()
+            if changes:
+                # One UPDATE for the whole batch. Rows whose status changed
+                # since the SELECT are left alone and reported as conflicts.
+                expected = {id: status for id, (status, _) in changes.items()}
+                new = {id: target for id, (_, target) in changes.items()}
+                updated = set(db.session.execute(
+                    update(Booking)
+                    .where(Booking.id.in_(changes), Booking.status == case(expected, value=Booking.id))
+                    .values(status=case(new, value=Booking.id))
+                    .returning(Booking.id)
+                    .execution_options(synchronize_session=False)
+                ).scalars())
+                apply_booking_changes(
+                    (booking_key_from_row(by_id[id]), booking_key_from_row(by_id[id], status=changes[id][1]))
+                    for id in updated
+                )
+                db.session.commit()
+
+            for id, (status, target) in changes.items():
+                if id in updated:
+                    results[id] = {'id': id, 'status': target, 'result': 'updated'}
+                else:
+                    results[id] = {'id': id, 'result': 'conflict'}
+
+            return {
+                'updated': len(updated),
+                'results': [results[id] for id in targets]
+            }, 200
+        except Exception as exc:
+            db.session.rollback()
+            return {'error': str(exc)}, 500
+
+
 # ClinicService management resources
 class ClinicServices(Resource):
     def get(self, clinic_id):
@@ -969,13 +1587,14 @@ class ClinicServices(Resource):
             if not clinic:
                 return {'error': 'Clinic not found'}, 404
 
-            clinic_services = ClinicService.query.filter_by(clinic_id=clinic_id).all()
+            clinic_services = ClinicService.query.options(
+                selectinload(ClinicService.service)
+            ).filter_by(clinic_id=clinic_id).all()
             return [cs.to_dict() for cs in clinic_services], 200
         except Exception as exc:
             return {'error': str(exc)}, 500
 
-    @jwt_required()
-    @admin_or_role_required(['admin', 'clinic'])
+    @auth_required('admin', 'clinic')
     def post(self, clinic_id):
         try:
             data = request.get_json()
@@ -992,14 +1611,6 @@ class ClinicServices(Resource):
             if not service:
                 return {'error': 'Service not found'}, 404
 
-            existing = ClinicService.query.filter_by(
-                clinic_id=clinic_id,
-                service_id=data['service_id']
-            ).first()
-
-            if existing:
-                return {'error': 'Service already offered by this clinic'}, 400
-
             clinic_service = ClinicService(
                 clinic_id=clinic_id,
                 service_id=data['service_id'],
@@ -1009,13 +1620,15 @@ class ClinicServices(Resource):
             db.session.add(clinic_service)
             db.session.commit()
             return {'message': 'Service added to clinic successfully', 'clinic_service': clinic_service.to_dict()}, 201
+        except IntegrityError as exc:
+            db.session.rollback()
+            return conflict_response(exc)
         except Exception as exc:
             db.session.rollback()
             return {'error': str(exc)}, 500
 
 class ClinicServicesByClinicId(Resource):
-    @jwt_required()
-    @admin_or_role_required(['admin', 'clinic'])
+    @auth_required('admin', 'clinic')
     def post(self, clinic_id):
         try:
             data = request.get_json()
@@ -1031,12 +1644,6 @@ class ClinicServicesByClinicId(Resource):
             if not clinic or not service:
                 return {'error': 'Clinic or service not found'}, 404
 
-            existing = ClinicService.query.filter_by(
-                clinic_id=clinic_id, service_id=service_id
-            ).first()
-            if existing:
-                return {'error': 'Service already added to clinic'}, 400
-
             clinic_service = ClinicService(
                 clinic_id=clinic_id,
                 service_id=service_id,
@@ -1051,6 +1658,9 @@ class ClinicServicesByClinicId(Resource):
                 'clinic_service': clinic_service.to_dict()
             }, 201
 
+        except IntegrityError as exc:
+            db.session.rollback()
+            return conflict_response(exc)
         except Exception as exc:
             db.session.rollback()
             print("ERROR:", exc)
@@ -1058,8 +1668,7 @@ class ClinicServicesByClinicId(Resource):
 
 
 class ClinicServiceById(Resource):
-    @jwt_required()
-    @admin_or_role_required(['admin', 'clinic'])
+    @auth_required('admin', 'clinic')
     def patch(self, clinic_service_id):
         try:
             clinic_service = ClinicService.query.get(clinic_service_id)
@@ -1077,15 +1686,17 @@ class ClinicServiceById(Resource):
             db.session.rollback()
             return {'error': str(exc)}, 500
 
-    @jwt_required()
-    @admin_or_role_required(['admin', 'clinic'])
+    @auth_required('admin', 'clinic')
     def delete(self, clinic_service_id):
         try:
             clinic_service = ClinicService.query.get(clinic_service_id)
             if not clinic_service:
                 return {'error': 'Clinic service not found'}, 404
 
+            # Its bookings and their reviews go with it.
             db.session.delete(clinic_service)
+            rebuild_ratings([clinic_service.clinic_id])
+            rebuild_rollups(clinic_ids=[clinic_service.clinic_id])
             db.session.commit()
             return {'message': 'Service removed from clinic successfully'}, 204
         except Exception as exc:
@@ -1093,10 +1704,85 @@ class ClinicServiceById(Resource):
             return {'error': str(exc)}, 500
 
 
+class ClinicServiceAvailability(Resource):
+    def get(self, clinic_service_id):
+        try:
+            clinic_service = ClinicService.query.get(clinic_service_id)
+            if not clinic_service:
+                return {'error': 'Clinic service not found'}, 404
+
+            try:
+                start, end = parse_window(request.args.get('from'), request.args.get('to'))
+            except ValueError as exc:
+                return {'error': str(exc)}, 400
+
+            step = timedelta(minutes=clinic_service.service.duration)
+            slots = [
+                {'start': slot.strftime(SLOT_FORMAT), 'end': (slot + step).strftime(SLOT_FORMAT)}
+                for slot in free_slots(clinic_service, start, end)
+            ]
+            return {
+                'clinic_service_id': clinic_service.id,
+                'duration': clinic_service.service.duration,
+                'slots': slots
+            }, 200
+        except Exception as exc:
+            return {'error': str(exc)}, 500
+
+
+# Opening hours management for clinics
+class ClinicOpeningHours(Resource):
+    def get(self, clinic_id):
+        try:
+            clinic = Clinic.query.get(clinic_id)
+            if not clinic:
+                return {'error': 'Clinic not found'}, 404
+            return [hours.to_dict() for hours in clinic.opening_hours], 200
+        except Exception as exc:
+            return {'error': str(exc)}, 500
+
+    @auth_required('admin', 'clinic')
+    def put(self, clinic_id):
+        try:
+            clinic = Clinic.query.get(clinic_id)
+            if not clinic:
+                return {'error': 'Clinic not found'}, 404
+
+            data = request.get_json()
+            if not data or not isinstance(data.get('opening_hours'), list):
+                return {'error': 'Missing required field: opening_hours'}, 400
+
+            opening_hours = []
+            for entry in data['opening_hours']:
+                for field in ['weekday', 'opens_at', 'closes_at']:
+                    if field not in entry:
+                        return {'error': f'Missing required field: {field}'}, 400
+                try:
+                    opens_at = datetime.strptime(entry['opens_at'], '%H:%M').time()
+                    closes_at = datetime.strptime(entry['closes_at'], '%H:%M').time()
+                except (ValueError, TypeError):
+                    return {'error': 'Invalid time format. Use HH:MM'}, 400
+                try:
+                    opening_hours.append(OpeningHours(
+                        weekday=int(entry['weekday']), opens_at=opens_at, closes_at=closes_at
+                    ))
+                except ValueError as exc:
+                    return {'error': str(exc)}, 400
+
+            clinic.opening_hours = opening_hours
+            db.session.commit()
+            return {
+                'message': 'Opening hours updated successfully',
+                'opening_hours': [hours.to_dict() for hours in clinic.opening_hours]
+            }, 200
+        except Exception as exc:
+            db.session.rollback()
+            return {'error': str(exc)}, 500
+
+
 # Insurance management for clinics
 class ClinicInsurancesById(Resource):
-    @jwt_required()
-    @admin_or_role_required(['admin', 'clinic'])
+    @auth_required('admin', 'clinic')
     def post(self, clinic_id):
         try:
             data = request.get_json()
@@ -1121,8 +1807,7 @@ class ClinicInsurancesById(Resource):
             db.session.rollback()
             return {'error': str(exc)}, 500
 
-    @jwt_required()
-    @admin_or_role_required(['admin', 'clinic'])
+    @auth_required('admin', 'clinic')
     def delete(self, clinic_id):
         try:
             data = request.get_json()
@@ -1156,12 +1841,20 @@ api.add_resource(UserProfile, '/api/profile')
 api.add_resource(PatientDashboard, '/api/patient-dashboard')
 api.add_resource(ClinicDashboard, '/api/clinic-dashboard')
 api.add_resource(AdminDashboard, '/api/admin-dashboard')
+api.add_resource(AdminAnalytics, '/api/admin/analytics')
+api.add_resource(CacheStats, '/api/admin/cache-stats')
+api.add_resource(PasswordHashingStats, '/api/admin/password-hashing-stats')
+api.add_resource(PrometheusMetrics, '/api/admin/metrics')
+api.add_resource(AdminExport, '/api/admin/exports/<string:kind>')
+api.add_resource(AdminClinicImport, '/api/admin/imports/clinics')
 
 # Main resource endpoints
 api.add_resource(Clinics, '/api/clinics')
 api.add_resource(ClinicsById, '/api/clinics/<int:id>')
+api.add_resource(ClinicSearch, '/api/clinics/search')
 api.add_resource(Services, '/api/services')
 api.add_resource(ServicesById, '/api/services/<int:id>')
+api.add_resource(ServiceEarliestSlots, '/api/services/<int:id>/earliest-slots')
 api.add_resource(Insurances, '/api/insurances')
 api.add_resource(InsurancesById, '/api/insurances/<int:id>')
 api.add_resource(Patients, '/api/patients')
@@ -1170,15 +1863,95 @@ api.add_resource(Reviews, '/api/reviews')
 api.add_resource(ReviewsById, '/api/reviews/<int:id>')
 api.add_resource(Bookings, '/api/bookings')
 api.add_resource(BookingsById, '/api/bookings/<int:id>')
+api.add_resource(BookingStatusBatch, '/api/bookings/status')
 
 # ClinicService management routes
 api.add_resource(ClinicServices, '/api/clinics/<int:clinic_id>/services')
 api.add_resource(ClinicServiceById, '/api/clinic-services/<int:clinic_service_id>')
 api.add_resource(ClinicServicesByClinicId, '/api/clinics/<int:clinic_id>/services')
+api.add_resource(ClinicServiceAvailability, '/api/clinic-services/<int:clinic_service_id>/availability')
+api.add_resource(ClinicOpeningHours, '/api/clinics/<int:clinic_id>/opening-hours')
 
 # Insurance management for clinics
 api.add_resource(ClinicInsurancesById, '/api/clinics/<int:clinic_id>/insurances')
 
+@app.cli.command('rebuild-ratings')
+def rebuild_ratings_command():
+    """Recompute clinic rating aggregates from the reviews table."""
+    count = rebuild_ratings()
+    db.session.commit()
+    click.echo(f'Rebuilt ratings for {count} clinics with reviews')
+
+
+@app.cli.command('rebuild-rollups')
+@click.option('--from', 'start', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='First day to rebuild; defaults to the earliest data.')
+@click.option('--to', 'end', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Last day to rebuild; defaults to the latest data.')
+@click.option('--days', default=31, show_default=True, help='Days per transaction.')
+def rebuild_rollups_command(start, end, days):
+    """Backfill or repair the daily analytics rollups from bookings, reviews and patients."""
+    bounds = source_date_range()
+    if bounds is None and not (start and end):
+        click.echo('Nothing to rebuild')
+        return
+    start = start.date() if start else bounds[0]
+    end = end.date() if end else bounds[1]
+    current = start
+    while current <= end:
+        window_end = min(current + timedelta(days=days), end + timedelta(days=1))
+        rebuild_rollups(current, window_end)
+        db.session.commit()
+        click.echo(f'Rebuilt {current} to {window_end - timedelta(days=1)}')
+        current = window_end
+
+
+@app.cli.command('import-clinics')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--dry-run', is_flag=True, help='Validate only; write nothing.')
+@click.option('--chunk-size', default=1000, show_default=True, help='Clinics per transaction.')
+def import_clinics_command(path, dry_run, chunk_size):
+    """Import clinics, price lists and insurances from a CSV or JSON file."""
+    with open(path, encoding='utf-8-sig') as handle:
+        raw = handle.read()
+    try:
+        records = parse_csv(raw) if path.lower().endswith('.csv') else parse_json(raw)
+    except BulkImportError as exc:
+        raise click.ClickException(str(exc))
+
+    report = import_clinics(records, dry_run=dry_run, chunk_size=chunk_size)
+    for error in report['errors']:
+        click.echo(f"row {error['row']}: {error['errors']}", err=True)
+    click.echo(f"{report['created']} created, {report['failed']} failed of {report['total']} rows")
+
+
+@app.cli.command('generate-data')
+@click.option('--clinics', default=1000, show_default=True)
+@click.option('--patients', default=10000, show_default=True)
+@click.option('--bookings', default=100000, show_default=True)
+@click.option('--seed', default=0, show_default=True, help='Same seed, sizes and --today give the same data.')
+@click.option('--skew', default=1.1, show_default=True, help='Zipf exponent of clinic popularity.')
+@click.option('--review-rate', default=0.35, show_default=True, help='Share of completed bookings with a review.')
+@click.option('--today', type=click.DateTime(formats=['%Y-%m-%d']), help='Reference date; defaults to today.')
+@click.option('--chunk-size', default=10000, show_default=True, help='Rows per transaction.')
+@click.option('--manifest', type=click.Path(dir_okay=False, writable=True), default='loadtest-manifest.json',
+              show_default=True, help='Where to write ids and logins for benchmarks/load_test.py.')
+def generate_data_command(clinics, patients, bookings, seed, skew, review_rate, today, chunk_size, manifest):
+    """Fill an empty database with synthetic clinics, patients, bookings and reviews."""
+    try:
+        result = generate(
+            clinics=clinics, patients=patients, bookings=bookings, seed=seed, skew=skew,
+            review_rate=review_rate, today=today.date() if today else None, chunk_size=chunk_size,
+            echo=click.echo
+        )
+    except DataGenerationError as exc:
+        raise click.ClickException(str(exc))
+
+    with open(manifest, 'w') as handle:
+        json.dump(result, handle, indent=2)
+    click.echo(f'Wrote {manifest}')
+
+
 # Initialize DB and run app
 if __name__ == '__main__':
     with app.app_context():
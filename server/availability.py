@@ -0,0 +1,197 @@
+import heapq
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from models import db, Booking, ClinicService, OpeningHours
+
+# Used for clinics that have not configured their own opening hours:
+# Monday to Saturday, 08:00 to 17:00.
+DEFAULT_OPENING_HOURS = [(weekday, time(8, 0), time(17, 0)) for weekday in range(6)]
+
+SLOT_FORMAT = '%Y-%m-%d %H:%M'
+MAX_WINDOW_DAYS = 62
+
+
+def parse_window(raw_from, raw_to, default_days=7):
+    """Turn inclusive ``YYYY-MM-DD`` bounds into a ``[start, end)`` datetime window."""
+    try:
+        start = datetime.strptime(raw_from, '%Y-%m-%d') if raw_from else datetime.combine(datetime.now().date(), time.min)
+        end = (datetime.strptime(raw_to, '%Y-%m-%d') if raw_to else start + timedelta(days=default_days - 1)) + timedelta(days=1)
+    except ValueError:
+        raise ValueError('Invalid date format. Use YYYY-MM-DD')
+    if end <= start:
+        raise ValueError('to must not be before from')
+    if end - start > timedelta(days=MAX_WINDOW_DAYS):
+        raise ValueError(f'Date range cannot exceed {MAX_WINDOW_DAYS} days')
+    # Slots in the past are never offered.
+    return max(start, datetime.now()), end
+
+
+def load_opening_hours(clinic_ids):
+    """Weekly hours as ``(weekday, opens_at, closes_at)`` tuples per clinic id."""
+    hours = {clinic_id: [] for clinic_id in clinic_ids}
+    rows = db.session.query(
+        OpeningHours.clinic_id, OpeningHours.weekday, OpeningHours.opens_at, OpeningHours.closes_at
+    ).filter(OpeningHours.clinic_id.in_(list(hours))).all()
+    for clinic_id, weekday, opens_at, closes_at in rows:
+        hours[clinic_id].append((weekday, opens_at, closes_at))
+    return {clinic_id: rows or DEFAULT_OPENING_HOURS for clinic_id, rows in hours.items()}
+
+
+def load_busy_intervals(durations, start, end, exclude_booking_id=None):
+    """Sorted ``(start, end)`` intervals of live bookings per clinic service.
+
+    ``durations`` maps clinic service ids to their service duration in
+    minutes. All bookings are fetched with a single range query.
+    """
+    busy = {clinic_service_id: [] for clinic_service_id in durations}
+    if not durations:
+        return busy
+
+    longest = timedelta(minutes=max(durations.values()))
+    query = db.session.query(Booking.clinic_service_id, Booking.appointment_date).filter(
+        Booking.clinic_service_id.in_(list(durations)),
+        Booking.status != 'cancelled',
+        Booking.appointment_date > start - longest,
+        Booking.appointment_date < end,
+    )
+    if exclude_booking_id is not None:
+        query = query.filter(Booking.id != exclude_booking_id)
+
+    for clinic_service_id, appointment_date in query.order_by(Booking.appointment_date):
+        length = timedelta(minutes=durations[clinic_service_id])
+        busy[clinic_service_id].append((appointment_date, appointment_date + length))
+    return busy
+
+
+def opening_intervals(hours, start, end):
+    """Yield each day's ``(opens, closes)`` datetimes that overlap ``[start, end)``."""
+    by_weekday = {}
+    for weekday, opens_at, closes_at in hours:
+        by_weekday.setdefault(weekday, []).append((opens_at, closes_at))
+    for intervals in by_weekday.values():
+        intervals.sort()
+
+    day = start.date()
+    while datetime.combine(day, time.min) < end:
+        for opens_at, closes_at in by_weekday.get(day.weekday(), ()):
+            opens = datetime.combine(day, opens_at)
+            closes = datetime.combine(day, closes_at)
+            if opens < end and closes > start:
+                yield opens, closes
+        day += timedelta(days=1)
+
+
+def _grid(anchor, lo, hi, step, start, end):
+    # Slots sit on a grid of `step` anchored at the opening time, so a gap
+    # left by a cancelled or odd-length booking does not shift the day.
+    lo = max(lo, start)
+    offset = (lo - anchor) % step
+    slot = lo + (step - offset) if offset else lo
+    while slot + step <= hi and slot < end:
+        yield slot
+        slot += step
+
+
+def iter_free_slots(hours, busy, start, end, duration):
+    """Lazily yield free slot start times in ``[start, end)`` in chronological order.
+
+    ``busy`` must be sorted by start. Each opening interval has the busy
+    intervals subtracted from it and the remaining free intervals are cut
+    into ``duration``-minute slots.
+    """
+    step = timedelta(minutes=duration)
+    first = 0
+    for opens, closes in opening_intervals(hours, start, end):
+        while first < len(busy) and busy[first][1] <= opens:
+            first += 1
+
+        cursor = opens
+        for index in range(first, len(busy)):
+            busy_start, busy_end = busy[index]
+            if busy_start >= closes:
+                break
+            if busy_start > cursor:
+                yield from _grid(opens, cursor, busy_start, step, start, end)
+            cursor = max(cursor, busy_end)
+        if cursor < closes:
+            yield from _grid(opens, cursor, closes, step, start, end)
+
+
+def free_slots(clinic_service, start, end):
+    duration = clinic_service.service.duration
+    hours = load_opening_hours([clinic_service.clinic_id])[clinic_service.clinic_id]
+    busy = load_busy_intervals({clinic_service.id: duration}, start, end)[clinic_service.id]
+    return list(iter_free_slots(hours, busy, start, end, duration))
+
+
+def lock_calendar(clinic_service_id):
+    """Serialize bookings for one clinic service until the transaction ends.
+
+    Must run before anything else is read in the transaction. Postgres takes
+    a row lock on the clinic service; SQLite has no row locks, so a no-op
+    UPDATE takes the database write lock instead, which also makes the
+    following availability check read the latest committed bookings.
+    """
+    if db.session.get_bind().dialect.name == 'sqlite':
+        table = ClinicService.__table__
+        db.session.execute(
+            table.update().where(table.c.id == clinic_service_id).values(id=table.c.id)
+        )
+    else:
+        db.session.query(ClinicService.id).filter_by(id=clinic_service_id).with_for_update().first()
+
+
+def is_slot_available(clinic_service, appointment_date, exclude_booking_id=None):
+    """Whether a booking at ``appointment_date`` fits the clinic's hours and calendar."""
+    duration = clinic_service.service.duration
+    finish = appointment_date + timedelta(minutes=duration)
+
+    hours = load_opening_hours([clinic_service.clinic_id])[clinic_service.clinic_id]
+    if not any(opens <= appointment_date and finish <= closes
+               for opens, closes in opening_intervals(hours, appointment_date, finish)):
+        return False
+
+    busy = load_busy_intervals(
+        {clinic_service.id: duration}, appointment_date, finish, exclude_booking_id=exclude_booking_id
+    )[clinic_service.id]
+    return not any(busy_start < finish and busy_end > appointment_date for busy_start, busy_end in busy)
+
+
+def _tagged(slots, clinic_service_id):
+    for slot in slots:
+        yield slot, clinic_service_id
+
+
+def earliest_slots(candidates, duration, start, end, limit):
+    """The ``limit`` earliest free slots across several clinic services.
+
+    ``candidates`` maps clinic service ids to their clinic id. Each clinic
+    service contributes a lazy stream of free slots and the streams are
+    merged through a heap, so only as many slots are generated as needed.
+    The search window starts at one day and doubles until enough slots are
+    found or ``end`` is reached, loading bookings for one window at a time.
+
+    Returns ``(slot_start, clinic_service_id)`` pairs in chronological order.
+    """
+    if not candidates:
+        return []
+
+    hours = load_opening_hours(set(candidates.values()))
+    durations = {clinic_service_id: duration for clinic_service_id in candidates}
+
+    found = []
+    window_start, days = start, 1
+    while window_start < end and len(found) < limit:
+        window_end = min(datetime.combine(window_start.date(), time.min) + timedelta(days=days), end)
+        busy = load_busy_intervals(durations, window_start, window_end)
+
+        streams = [
+            _tagged(iter_free_slots(hours[clinic_id], busy[clinic_service_id], window_start, window_end, duration),
+                    clinic_service_id)
+            for clinic_service_id, clinic_id in candidates.items()
+        ]
+        found.extend(islice(heapq.merge(*streams), limit - len(found)))
+
+        window_start, days = window_end, days * 2
+    return found
@@ -0,0 +1,113 @@
+"""Concurrent reads and writes on SQLite under each engine profile.
+
+Run from server/:  python benchmarks/bench_db_concurrency.py [threads] [seconds]
+
+Each profile runs in a fresh process against a fresh database file. Half
+the threads book appointments (read the slot, then insert, like
+Bookings.post); the rest read a patient's bookings. Reports throughput and
+how many transactions failed with "database is locked".
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+PROFILES = ('default', 'development', 'web')
+DATABASE = '/tmp/healthhub-concurrency.db'
+HISTORY = 50000  # past bookings, so reads hold their lock for a while
+
+
+def child(threads, seconds):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from sqlalchemy import insert, select
+    from sqlalchemy.exc import OperationalError
+
+    from app import app
+    from models import db, Booking, Clinic, ClinicService, Patient, Service
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        service = Service(name='Consultation', duration=30)
+        clinic = Clinic(name='Clinic', specialty='General', contact='0700000000', email='clinic@example.com',
+                        street='Main St', city='Nairobi')
+        clinic.service_associations.append(ClinicService(service=service, price=Decimal(1000)))
+        db.session.add_all([clinic] + [
+            Patient(name=f'Patient {i}', contact=f'07{i:08d}', email=f'p{i}@example.com') for i in range(1, threads + 1)
+        ])
+        db.session.commit()
+        clinic_service_id = clinic.service_associations[0].id
+        db.session.execute(insert(Booking), [
+            {'patient_id': 1 + i % threads, 'clinic_service_id': clinic_service_id,
+             'appointment_date': datetime(2020, 1, 1) + timedelta(minutes=30 * i), 'status': 'completed'}
+            for i in range(HISTORY)
+        ])
+        db.session.commit()
+        options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+
+    counts = {'reads': 0, 'writes': 0, 'locked': 0}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + seconds
+    start = datetime(2030, 1, 1)
+
+    def worker(number):
+        writer = number % 2 == 0
+        slot = number
+        with app.app_context():
+            while time.monotonic() < stop_at:
+                try:
+                    if writer:
+                        appointment = start + timedelta(minutes=30 * slot)
+                        slot += threads
+                        taken = db.session.execute(select(Booking.id).where(
+                            Booking.clinic_service_id == clinic_service_id,
+                            Booking.appointment_date == appointment
+                        )).first()
+                        if not taken:
+                            db.session.add(Booking(patient_id=number + 1, clinic_service_id=clinic_service_id,
+                                                   appointment_date=appointment))
+                        db.session.commit()
+                        key = 'writes'
+                    else:
+                        db.session.execute(select(Booking.id, Booking.status).where(Booking.patient_id == number)).all()
+                        db.session.commit()
+                        key = 'reads'
+                except OperationalError as exc:
+                    db.session.rollback()
+                    if 'locked' not in str(exc):
+                        raise
+                    key = 'locked'
+                with lock:
+                    counts[key] += 1
+
+    workers = [threading.Thread(target=worker, args=(number,)) for number in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    pool = {key: options[key] for key in ('pool_size', 'max_overflow') if key in options}
+    print(f'{app.config["DB_PROFILE"]:12} writes/s {counts["writes"] / seconds:8.1f}  reads/s {counts["reads"] / seconds:8.1f}  '
+          f'locked {counts["locked"]:5}  {pool or "SQLAlchemy defaults"}')
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f'{threads} threads, {seconds:g} s per profile')
+    for profile in PROFILES:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(DATABASE + suffix):
+                os.remove(DATABASE + suffix)
+        env = dict(os.environ, DB_PROFILE=profile, DATABASE_URL=f'sqlite:///{DATABASE}', GUNICORN_THREADS=str(threads))
+        subprocess.run([sys.executable, __file__, '--child', str(threads), str(seconds)], env=env, check=True)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        child(int(sys.argv[2]), float(sys.argv[3]))
+    else:
+        main()
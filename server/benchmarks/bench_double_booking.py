@@ -0,0 +1,106 @@
+"""Many clients booking the same slot at once: exactly one may win.
+
+Run from server/:  python benchmarks/bench_double_booking.py [threads] [rounds]
+
+Uses a scratch SQLite database in WAL mode unless DATABASE_URL points
+elsewhere (for example a Postgres test database). Each round the threads
+wait on a barrier and then all POST /api/bookings for the same new slot.
+Exits with status 1 unless every round ends with one 201 and only 409s
+otherwise, or when the slowest round takes more than MAX_SPREAD times the
+fastest.
+"""
+import os
+import sys
+import threading
+import time
+from datetime import datetime, time as clock, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/healthhub-double-booking.db')
+os.environ.setdefault('DB_PROFILE', 'web')
+os.environ['BCRYPT_LOG_ROUNDS'] = '4'
+
+from app import app  # noqa: E402
+from models import db, Clinic, ClinicService, OpeningHours, Patient, Service, User  # noqa: E402
+
+BASE_URL = 'https://localhost'
+MAX_SPREAD = 3.0
+
+
+def setup():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        service = Service(name='Consultation', duration=30)
+        clinic = Clinic(name='Clinic', specialty='General', contact='0700000000', email='clinic@example.com',
+                        street='Main St', city='Nairobi')
+        clinic.service_associations.append(ClinicService(service=service, price=Decimal(1000)))
+        clinic.opening_hours = [OpeningHours(weekday=day, opens_at=clock(8), closes_at=clock(18)) for day in range(7)]
+        admin = User(username='admin', role='admin')
+        admin.set_password('secret')
+        patient = User(username='patient', role='patient')
+        patient.set_password('secret')
+        patient.patient = Patient(name='Patient', contact='0711111111', email='patient@example.com')
+        db.session.add_all([clinic, admin, patient])
+        db.session.commit()
+        return clinic.service_associations[0].id, patient.id
+
+
+def run_round(clients, clinic_service_id, user_id, appointment):
+    barrier = threading.Barrier(len(clients))
+    statuses = []
+    lock = threading.Lock()
+
+    def book(client):
+        barrier.wait()
+        status = client.post('/api/bookings', json={
+            'appointment_date': appointment.strftime('%Y-%m-%d %H:%M'),
+            'clinic_service_id': clinic_service_id,
+            'patient_id': user_id,
+        }, base_url=BASE_URL).status_code
+        with lock:
+            statuses.append(status)
+
+    threads = [threading.Thread(target=book, args=(client,)) for client in clients]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses, time.perf_counter() - started
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    clinic_service_id, user_id = setup()
+
+    clients = []
+    for _ in range(threads):
+        client = app.test_client()
+        client.post('/api/login', json={'username': 'admin', 'password': 'secret'}, base_url=BASE_URL)
+        clients.append(client)
+
+    print(f'{app.config["SQLALCHEMY_DATABASE_URI"].split(":")[0]}, profile {app.config["DB_PROFILE"]}, '
+          f'{threads} threads per slot')
+    failed = False
+    elapsed = []
+    start = (datetime.now() + timedelta(days=7)).replace(hour=8, minute=0, second=0, microsecond=0)
+    for number in range(rounds):
+        statuses, seconds = run_round(clients, clinic_service_id, user_id, start + timedelta(minutes=30 * number))
+        elapsed.append(seconds)
+        counts = {status: statuses.count(status) for status in sorted(set(statuses))}
+        ok = counts.get(201) == 1 and counts.get(409) == threads - 1
+        failed = failed or not ok
+        print(f'{"ok  " if ok else "FAIL"} round {number + 1}: {counts}  {seconds * 1000:7.1f} ms  '
+              f'{threads / seconds:7.1f} req/s')
+
+    spread = max(elapsed) / min(elapsed)
+    print(f'slowest round / fastest round: {spread:.2f} (limit {MAX_SPREAD})')
+    if failed or spread > MAX_SPREAD:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
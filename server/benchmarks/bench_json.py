@@ -0,0 +1,37 @@
+"""Response encoding: orjson vs. the stdlib json module on a booking list.
+
+Run from server/:  python benchmarks/bench_json.py [bookings]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from app import app  # noqa: E402
+from bench_serializers import seed  # noqa: E402
+from encoding import BACKENDS  # noqa: E402
+from models import db, Booking  # noqa: E402
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with app.app_context():
+        db.create_all()
+        seed(count)
+        payload = [booking.to_dict() for booking in Booking.query.all()]
+
+    if 'orjson' not in BACKENDS:
+        print('orjson is not installed; only the stdlib encoder is available')
+
+    baseline = None
+    for name, dumps in BACKENDS.items():
+        seconds = min(timeit.repeat(lambda: dumps(payload), number=10, repeat=5)) / 10
+        baseline = baseline or seconds
+        size = len(dumps(payload))
+        print(f'{name:8} {seconds * 1000:8.2f} ms  {baseline / seconds:5.1f}x  {size} bytes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Catalog read latency during a login storm, with and without the hashing cap.
+
+Run from server/:  python benchmarks/bench_login_storm.py [login threads] [seconds]
+
+Login threads hammer /api/login while one reader times GET /api/services.
+This mirrors a gthread worker whose threads share one process.
+"""
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite:////tmp/healthhub-login-storm.db'
+
+from app import app  # noqa: E402
+from models import db, Service, User  # noqa: E402
+from passwords import password_hasher  # noqa: E402
+
+BASE_URL = 'https://localhost'
+
+
+def setup():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([Service(name=f'Service {i}', duration=30) for i in range(20)])
+        user = User(username='storm', role='admin')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+
+
+def run(label, login_threads, seconds, workers):
+    password_hasher.workers = workers
+    password_hasher._executor_pid = None  # new pool with the new size
+    stop = threading.Event()
+    logins = []
+
+    def login():
+        client = app.test_client()
+        while not stop.is_set():
+            client.post('/api/login', json={'username': 'storm', 'password': 'secret'}, base_url=BASE_URL)
+            logins.append(1)
+
+    threads = [threading.Thread(target=login) for _ in range(login_threads)]
+    for thread in threads:
+        thread.start()
+
+    client = app.test_client()
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        client.get('/api/services', base_url=BASE_URL)
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.01)
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f'{label:28} reads {len(latencies):5}  p50 {statistics.median(latencies):7.2f} ms  '
+          f'p95 {p95:7.2f} ms  logins {len(logins)}')
+
+
+def main():
+    login_threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    setup()
+    print(f'{os.cpu_count()} CPUs, bcrypt cost {password_hasher.rounds}, {login_threads} login threads')
+    run('no logins', 0, seconds, 2)
+    run(f'storm, {login_threads} hashing threads', login_threads, seconds, login_threads)
+    run('storm, capped at 1', login_threads, seconds, 1)
+
+
+if __name__ == '__main__':
+    main()
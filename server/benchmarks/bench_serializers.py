@@ -0,0 +1,119 @@
+"""Booking list serialization: compiled views vs. the old recursive to_dict chain.
+
+Run from server/:  python benchmarks/bench_serializers.py [bookings]
+"""
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from app import app  # noqa: E402
+from models import db, Booking, Clinic, ClinicService, Insurance, Patient, Review, Service  # noqa: E402
+from serializers import serializer  # noqa: E402
+
+
+def legacy_clinic(clinic):
+    return {
+        'id': clinic.id, 'name': clinic.name, 'specialty': clinic.specialty,
+        'description': clinic.description, 'contact': clinic.contact, 'email': clinic.email,
+        'street': clinic.street, 'city': clinic.city, 'image_url': clinic.image_url,
+        'user_id': clinic.user_id, 'rating_count': clinic.rating_count or 0,
+        'rating_average': round(clinic.rating_average, 2) if clinic.rating_count else None,
+        'rating_histogram': {str(s): getattr(clinic, f'rating_{s}') or 0 for s in range(1, 6)},
+        'services': [{'id': s.id, 'name': s.name, 'duration': s.duration} for s in clinic.services],
+        'insurance_accepted': [{'id': i.id, 'name': i.name} for i in clinic.insurance_accepted],
+    }
+
+
+def legacy_patient(patient):
+    return {
+        'id': patient.id, 'name': patient.name, 'contact': patient.contact, 'email': patient.email,
+        'date_joined': patient.date_joined.isoformat() if patient.date_joined else None,
+        'user_id': patient.user_id,
+    }
+
+
+def legacy_booking(booking):
+    cs = booking.clinic_service
+    review = booking.review
+    return {
+        'id': booking.id,
+        'booking_date': booking.booking_date.isoformat(),
+        'appointment_date': booking.appointment_date.isoformat(),
+        'status': booking.status, 'notes': booking.notes,
+        'patient_id': booking.patient_id, 'clinic_service_id': booking.clinic_service_id,
+        'patient': legacy_patient(booking.patient),
+        'clinic_service': {
+            'id': cs.id, 'clinic_id': cs.clinic_id, 'service_id': cs.service_id,
+            'price': float(cs.price), 'clinic': legacy_clinic(cs.clinic),
+            'service': {'id': cs.service.id, 'name': cs.service.name, 'duration': cs.service.duration},
+        },
+        'clinic': legacy_clinic(booking.clinic),
+        'service': {'id': booking.service.id, 'name': booking.service.name, 'duration': booking.service.duration},
+        'review': {
+            'id': review.id, 'comment': review.comment, 'rating': review.rating,
+            'date': review.date.isoformat(), 'booking_id': review.booking_id,
+            'clinic': legacy_clinic(review.clinic), 'patient': legacy_patient(review.patient),
+        } if review else None,
+    }
+
+
+def seed(count):
+    services = [Service(name=f'Service {i}', duration=30) for i in range(8)]
+    insurances = [Insurance(name=f'Insurance {i}') for i in range(6)]
+    clinics = []
+    for i in range(20):
+        clinic = Clinic(name=f'Clinic {i}', specialty='General', contact=f'07{i:08d}',
+                        email=f'clinic{i}@example.com', street='Main St', city='Nairobi')
+        clinic.service_associations = [ClinicService(service=s, price=Decimal('1500.00')) for s in services]
+        clinic.insurance_accepted = list(insurances)
+        clinics.append(clinic)
+    patients = [Patient(name=f'Patient {i}', contact=f'08{i:08d}', email=f'patient{i}@example.com')
+                for i in range(50)]
+    db.session.add_all(services + insurances + clinics + patients)
+    db.session.flush()
+
+    start = datetime(2030, 1, 1, 8)
+    for i in range(count):
+        booking = Booking(
+            appointment_date=start + timedelta(minutes=30 * i),
+            patient=patients[i % len(patients)],
+            clinic_service=clinics[i % len(clinics)].service_associations[i % len(services)],
+            status='completed'
+        )
+        if i % 3 == 0:
+            booking.review = Review(rating=4, comment='Good')
+        db.session.add(booking)
+    db.session.commit()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with app.app_context():
+        db.create_all()
+        seed(count)
+        bookings = Booking.query.all()
+        # Touch every relation first so both sides time serialization only.
+        for booking in bookings:
+            legacy_booking(booking)
+
+        compiled = serializer('booking')
+        sparse = serializer('booking', fields='id,appointment_date,status,clinic.name,service.name')
+        cases = [
+            ('legacy to_dict chain', lambda: [legacy_booking(b) for b in bookings]),
+            ('compiled default view', lambda: [compiled(b) for b in bookings]),
+            ('compiled sparse view', lambda: [sparse(b) for b in bookings]),
+        ]
+        baseline = None
+        for label, run in cases:
+            seconds = min(timeit.repeat(run, number=5, repeat=5)) / 5
+            baseline = baseline or seconds
+            print(f'{label:24} {seconds * 1000:8.2f} ms  {baseline / seconds:5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Signup throughput: pre-check SELECTs vs constraint-driven registration.
+
+Run from server/:  python benchmarks/bench_signup.py [signups]
+
+Both flows are served through the test client. The legacy flow is the old
+UserRegistration.post (a SELECT per unique field plus a flush), mounted on a
+scratch route. bcrypt runs at cost 4 so database work dominates. A tenth of
+the signups reuse a taken email to exercise the conflict path.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite:////tmp/healthhub-signup.db'
+os.environ['BCRYPT_LOG_ROUNDS'] = '4'
+
+from flask import request  # noqa: E402
+from flask_restful import Resource  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app import api, app  # noqa: E402
+from models import db, Patient, User  # noqa: E402
+
+BASE_URL = 'https://localhost'
+
+
+class LegacyRegistration(Resource):
+    def post(self):
+        try:
+            data = request.get_json()
+            if User.query.filter_by(username=data['username']).first():
+                return {'message': 'Username already exists'}, 400
+            user = User(username=data['username'], role=data.get('role', 'patient'))
+            user.set_password(data['password'])
+            db.session.add(user)
+            db.session.flush()
+            if Patient.query.filter_by(contact=data['contact']).first():
+                db.session.rollback()
+                return {'error': 'Contact number already exists'}, 400
+            if Patient.query.filter_by(email=data['email']).first():
+                db.session.rollback()
+                return {'error': 'Email already exists'}, 400
+            db.session.add(Patient(name=data['name'], email=data['email'], contact=data['contact'], user_id=user.id))
+            db.session.commit()
+            return {'message': 'User created successfully'}, 201
+        except Exception as exc:
+            db.session.rollback()
+            return {'error': str(exc)}, 500
+
+
+api.add_resource(LegacyRegistration, '/bench/legacy-register')
+
+
+def payloads(prefix, count):
+    for i in range(count):
+        email = f'{prefix}0@example.com' if i % 10 == 9 else f'{prefix}{i}@example.com'
+        yield {
+            'username': f'{prefix}{i}', 'password': 'secret', 'role': 'patient',
+            'name': f'Patient {i}', 'email': email, 'contact': f'{prefix}{i:07d}',
+        }
+
+
+def run(label, path, prefix, count):
+    statements = []
+
+    def count_statement(*args):
+        statements.append(1)
+
+    client = app.test_client()
+    codes = {}
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+    started = time.perf_counter()
+    for data in payloads(prefix, count):
+        status = client.post(path, json=data, base_url=BASE_URL).status_code
+        codes[status] = codes.get(status, 0) + 1
+    elapsed = time.perf_counter() - started
+    with app.app_context():
+        event.remove(db.engine, 'before_cursor_execute', count_statement)
+    print(f'{label:12} {count / elapsed:8.1f} signups/s  {len(statements) / count:5.2f} statements/signup  {codes}')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    run('pre-checks', '/bench/legacy-register', 'a', count)
+    run('constraints', '/api/register', 'b', count)
+
+
+if __name__ == '__main__':
+    main()
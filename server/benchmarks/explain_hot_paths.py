@@ -0,0 +1,186 @@
+"""Fail when a filtered endpoint's query scans a whole hot table.
+
+Run from server/:  python benchmarks/explain_hot_paths.py [DATABASE_URL]
+
+Seeds a scratch database, calls each endpoint that filters bookings, and
+runs EXPLAIN (EXPLAIN QUERY PLAN on SQLite) on every statement it issues
+against bookings. Then calls /api/clinics/search with the location,
+specialty and price filters and checks that its statements use the
+composite clinic indexes instead of scanning clinics or clinic_service.
+Exits with status 1 and prints the plan for any sequential scan or missing
+index. Defaults to a SQLite file; pass a Postgres URL to check the
+production planner (the database is dropped and recreated).
+"""
+import os
+import re
+import sys
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = sys.argv[1] if len(sys.argv) > 1 else 'sqlite:////tmp/healthhub-explain.db'
+os.environ['BCRYPT_LOG_ROUNDS'] = '4'
+
+from sqlalchemy import event, text  # noqa: E402
+
+from app import app  # noqa: E402
+from models import db, Booking, Clinic, ClinicService, Patient, Service, User  # noqa: E402
+
+BASE_URL = 'https://localhost'
+BOOKINGS = re.compile(r'\bbookings\b')
+CLINICS = re.compile(r'\bclinics\b|\bclinic_service\b')
+# A bare "SCAN table" on SQLite reads the table itself; "SCAN table USING
+# ... INDEX" walks an index and is fine.
+SEQUENTIAL_SCAN = {
+    'sqlite': lambda table: re.compile(rf'^SCAN {table}\b(?! USING)', re.M),
+    'postgresql': lambda table: re.compile(rf'Seq Scan on {table}\b'),
+}
+# Bookings start tomorrow: availability windows are clamped to now, so a
+# window in the past would plan no bookings query at all.
+START = datetime.combine(date.today() + timedelta(days=1), time(8))
+CITIES = ('Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret')
+SPECIALTIES = ('General', 'Dental', 'Pediatrics', 'Cardiology', 'Dermatology', 'Optometry', 'Physiotherapy')
+
+
+def seed(clinics=300, patients=200, per_patient=20):
+    db.drop_all()
+    db.create_all()
+    services = [Service(name=f'Service {i}', duration=30) for i in range(5)]
+    db.session.add_all(services)
+    for i in range(clinics):
+        clinic = Clinic(name=f'Clinic {i}', specialty=SPECIALTIES[i % len(SPECIALTIES)], contact=f'07{i:08d}',
+                        email=f'clinic{i}@example.com', street='Main St', city=CITIES[i % len(CITIES)])
+        clinic.service_associations = [
+            ClinicService(service=s, price=Decimal(1000 + 10 * i + 100 * n)) for n, s in enumerate(services)
+        ]
+        db.session.add(clinic)
+    db.session.flush()
+    offered = ClinicService.query.all()
+    for i in range(patients):
+        patient = Patient(name=f'Patient {i}', email=f'patient{i}@example.com', contact=f'08{i:08d}')
+        db.session.add(patient)
+        for j in range(per_patient):
+            patient.bookings.append(Booking(
+                clinic_service=offered[(i * per_patient + j) % len(offered)],
+                appointment_date=START + timedelta(hours=i * per_patient + j),
+                status=('pending', 'confirmed', 'completed', 'cancelled')[j % 4]
+            ))
+
+    for username, role in (('admin', 'admin'), ('patient', 'patient'), ('clinic', 'clinic')):
+        user = User(username=username, role=role)
+        user.set_password('secret')
+        db.session.add(user)
+    db.session.flush()
+    Patient.query.first().user_id = User.query.filter_by(username='patient').one().id
+    Clinic.query.first().user_id = User.query.filter_by(username='clinic').one().id
+    db.session.commit()
+    with db.engine.begin() as connection:
+        connection.execute(text('ANALYZE'))
+
+
+def client(username):
+    client = app.test_client()
+    client.post('/api/login', json={'username': username, 'password': 'secret'}, base_url=BASE_URL)
+    return client
+
+
+def day(offset):
+    return (START + timedelta(days=offset)).strftime('%Y-%m-%d')
+
+
+def endpoints():
+    clinic_service_id = ClinicService.query.first().id
+    patient_id = Patient.query.offset(5).first().id
+    return [
+        ('patient', 'get', '/api/patient-dashboard', None),
+        ('patient', 'get', '/api/bookings', None),
+        ('clinic', 'get', f'/api/clinic-dashboard?from={day(0)}&to={day(31)}&status=pending,confirmed', None),
+        ('clinic', 'get', '/api/bookings?status=pending', None),
+        ('admin', 'get', f'/api/bookings?patient_id={patient_id}', None),
+        ('admin', 'get', '/api/bookings?clinic_id=2&status=pending', None),
+        ('admin', 'get', f'/api/admin/exports/bookings?from={day(0)}&to={day(7)}', None),
+        ('admin', 'get', f'/api/clinic-services/{clinic_service_id}/availability?from={day(4)}&to={day(6)}', None),
+        ('admin', 'get', f'/api/services/1/earliest-slots?from={day(4)}&to={day(6)}', None),
+        ('admin', 'patch', '/api/bookings/status', {'updates': [{'id': 1, 'status': 'cancelled'}]}),
+    ]
+
+
+def searches():
+    """``(path, index names the plans must use)`` for the clinic search filters."""
+    service_id = Service.query.first().id
+    price = f'service_id={service_id}&min_price=1500&max_price=2500'
+    return [
+        ('/api/clinics/search?city=Mombasa&specialty=Dental', {'ix_clinics_city_specialty_name'}),
+        ('/api/clinics/search?city=Mombasa', {'ix_clinics_city_specialty_name'}),
+        ('/api/clinics/search?specialty=Dental', {'ix_clinics_specialty_name'}),
+        (f'/api/clinics/search?{price}', {'ix_clinic_service_service_id_price_clinic_id'}),
+        (f'/api/clinics/search?{price}&sort=price', {'ix_clinic_service_service_id_price_clinic_id'}),
+        (f'/api/clinics/search?city=Mombasa&specialty=Dental&{price}',
+         {'ix_clinics_city_specialty_name', 'ix_clinic_service_service_id_price_clinic_id'}),
+    ]
+
+
+def explained(client, method, path, body, tables, prefix):
+    """Call an endpoint; its response and ``(statement, plan)`` for each query matching ``tables``."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE')) \
+                and tables.search(statement):
+            captured.append((statement, parameters))
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', capture)
+    response = getattr(client, method)(path, json=body, base_url=BASE_URL)
+    response.get_data()
+    with app.app_context():
+        event.remove(db.engine, 'before_cursor_execute', capture)
+        with db.engine.connect() as connection:
+            plans = []
+            for statement, parameters in captured:
+                rows = connection.exec_driver_sql(prefix + statement, parameters).fetchall()
+                plans.append((statement, '\n'.join(str(row[-1]) for row in rows)))
+    return response, plans
+
+
+def main():
+    with app.app_context():
+        seed()
+        dialect = db.engine.dialect.name
+        prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+        scans = {table: SEQUENTIAL_SCAN[dialect](table) for table in ('bookings', 'clinics', 'clinic_service')}
+        clients = {name: client(name) for name in ('admin', 'patient', 'clinic')}
+        calls = endpoints()
+        search_calls = searches()
+
+    failures = 0
+    for role, method, path, body in calls:
+        response, plans = explained(clients[role], method, path, body, BOOKINGS, prefix)
+        if not plans:
+            failures += 1
+            print(f'FAIL {method.upper()} {path} ({response.status_code}) issued no bookings query')
+        for statement, plan in plans:
+            if scans['bookings'].search(plan):
+                failures += 1
+                print(f'FAIL {method.upper()} {path}\n{statement}\n{plan}\n')
+        print(f'{response.status_code} {method.upper():5} {path}  {len(plans)} bookings queries')
+
+    for path, indexes in search_calls:
+        response, plans = explained(clients['admin'], 'get', path, None, CLINICS, prefix)
+        # The first statement is the search itself; the rest load relationships.
+        statement, plan = plans[0]
+        missing = sorted(index for index in indexes if index not in plan)
+        scanned = [table for table in ('clinics', 'clinic_service') if scans[table].search(plan)]
+        if missing or scanned or response.status_code != 200:
+            failures += 1
+            print(f'FAIL GET {path}: missing {missing}, scans {scanned}\n{statement}\n{plan}\n')
+        print(f'{response.status_code} GET   {path}  uses {", ".join(sorted(indexes))}')
+
+    if failures:
+        print(f'{failures} queries scan a hot table or miss their index')
+        sys.exit(1)
+    print('no sequential scans over bookings; clinic search uses its indexes')
+
+
+if __name__ == '__main__':
+    main()
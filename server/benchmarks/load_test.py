@@ -0,0 +1,247 @@
+"""Replay a weighted mix of API requests against a running server.
+
+Run from server/ against data made by ``flask generate-data``:
+
+    python benchmarks/load_test.py --url http://localhost:5000 \\
+        --manifest loadtest-manifest.json --clients 16 --duration 60 --output run.json
+    python benchmarks/load_test.py ... --output after.json --compare run.json
+
+Each client thread keeps one HTTP connection, logs in once as the role its
+requests need, and draws requests from MIX with its own seeded random
+generator. With the same seed, manifest and client count every run sends
+the same request sequence, so runs can be compared. Reports p50/p95/p99
+latency and throughput per endpoint after the warm-up; --output saves them
+as JSON and --compare prints the change against a saved run.
+"""
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+
+def _id(rng, bounds):
+    return rng.randint(bounds[0], bounds[1])
+
+
+def _clinic(rng, manifest):
+    # Most traffic goes to popular clinics, as in production.
+    if rng.random() < 0.6:
+        return rng.choice(manifest['popular_clinics'])
+    return _id(rng, manifest['clinics'])
+
+
+def _window(manifest, days):
+    start = date.fromisoformat(manifest['today']) + timedelta(days=1)
+    return f'from={start}&to={start + timedelta(days=days - 1)}'
+
+
+# name -> (weight, role, request builder returning (method, path, body))
+MIX = {
+    'clinics_page': (12, None, lambda rng, m: ('GET', f'/api/clinics?limit=20&sort={rng.choice(["id", "rating"])}', None)),
+    'clinic_detail': (20, None, lambda rng, m: ('GET', f'/api/clinics/{_clinic(rng, m)}', None)),
+    'clinic_search': (10, None, lambda rng, m: (
+        'GET', f'/api/clinics/search?city={rng.choice(m["cities"])}&specialty={rng.choice(m["specialties"])}&limit=20', None
+    )),
+    'clinic_text_search': (5, None, lambda rng, m: ('GET', f'/api/clinics?q={rng.choice(m["specialties"])}&limit=20', None)),
+    'services': (6, None, lambda rng, m: ('GET', '/api/services', None)),
+    'earliest_slots': (6, None, lambda rng, m: (
+        'GET', f'/api/services/{rng.choice(m["services"])}/earliest-slots?{_window(m, 7)}', None
+    )),
+    'availability': (8, None, lambda rng, m: (
+        'GET', f'/api/clinic-services/{_id(rng, m["clinic_services"])}/availability?{_window(m, 7)}', None
+    )),
+    'clinic_reviews': (4, None, lambda rng, m: ('GET', f'/api/reviews?clinic_id={_id(rng, m["clinics"])}', None)),
+    'patient_dashboard': (8, 'patient', lambda rng, m: ('GET', '/api/patient-dashboard', None)),
+    'patient_bookings': (6, 'patient', lambda rng, m: ('GET', '/api/bookings', None)),
+    'clinic_dashboard': (8, 'clinic', lambda rng, m: (
+        'GET', f'/api/clinic-dashboard?{_window(m, 30)}&status=pending,confirmed&limit=50', None
+    )),
+    'me': (5, 'patient', lambda rng, m: ('GET', '/api/me', None)),
+    'login': (2, None, lambda rng, m: (
+        'POST', '/api/login', {'username': rng.choice(m['users']['patient']), 'password': m['password']}
+    )),
+}
+
+
+class Client:
+    def __init__(self, url, manifest, number):
+        parts = urlsplit(url)
+        connection = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection(parts.netloc, timeout=60)
+        self.manifest = manifest
+        self.number = number
+        self.cookies = {}
+
+    def request(self, method, path, body=None, cookie=None):
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        if cookie:
+            headers['Cookie'] = cookie
+        try:
+            self.connection.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = self.connection.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            self.connection.close()
+            raise
+        return response
+
+    def cookie(self, role):
+        if role not in self.cookies:
+            users = self.manifest['users'][role]
+            username = users[self.number % len(users)]
+            response = self.request('POST', '/api/login', {'username': username, 'password': self.manifest['password']})
+            if response.status != 200:
+                raise RuntimeError(f'Login as {username} failed with {response.status}')
+            # The cookie is marked Secure; send it back by hand so plain
+            # http works against a local server.
+            token = next(
+                value.split(';')[0] for name, value in response.getheaders()
+                if name.lower() == 'set-cookie' and value.startswith('access_token_cookie=')
+            )
+            self.cookies[role] = token
+        return self.cookies[role]
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))]
+
+
+def run(args, manifest):
+    names = list(MIX)
+    weights = [MIX[name][0] for name in names]
+    results = {name: {'latencies': [], 'errors': 0, 'statuses': {}} for name in names}
+    lock = threading.Lock()
+    started = time.monotonic()
+    measure_from = started + args.warmup
+    stop_at = measure_from + args.duration
+
+    def worker(number):
+        rng = random.Random(f'{args.seed}-{number}')
+        client = Client(args.url, manifest, number)
+        local = {name: {'latencies': [], 'errors': 0, 'statuses': {}} for name in names}
+        while True:
+            now = time.monotonic()
+            if now >= stop_at:
+                break
+            name = rng.choices(names, weights)[0]
+            _, role, build = MIX[name]
+            method, path, body = build(rng, manifest)
+            try:
+                cookie = client.cookie(role) if role else None
+                began = time.perf_counter()
+                status = client.request(method, path, body, cookie).status
+                elapsed = time.perf_counter() - began
+            except (http.client.HTTPException, OSError, RuntimeError):
+                status, elapsed = 'error', None
+            if now < measure_from:
+                continue
+            stats = local[name]
+            stats['statuses'][str(status)] = stats['statuses'].get(str(status), 0) + 1
+            if elapsed is None or status >= 500:
+                stats['errors'] += 1
+            else:
+                stats['latencies'].append(elapsed * 1000)
+        with lock:
+            for name, stats in local.items():
+                merged = results[name]
+                merged['latencies'].extend(stats['latencies'])
+                merged['errors'] += stats['errors']
+                for status, count in stats['statuses'].items():
+                    merged['statuses'][status] = merged['statuses'].get(status, 0) + count
+
+    threads = [threading.Thread(target=worker, args=(number,)) for number in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report = {}
+    for name, stats in results.items():
+        latencies = sorted(stats['latencies'])
+        count = len(latencies) + stats['errors']
+        report[name] = {
+            'requests': count,
+            'errors': stats['errors'],
+            'statuses': stats['statuses'],
+            'rps': round(count / args.duration, 2),
+            'p50_ms': percentile(latencies, 0.50),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+        }
+    total = sum(stats['requests'] for stats in report.values())
+    all_latencies = sorted(latency for stats in results.values() for latency in stats['latencies'])
+    report['TOTAL'] = {
+        'requests': total,
+        'errors': sum(stats['errors'] for stats in report.values()),
+        'rps': round(total / args.duration, 2),
+        'p50_ms': percentile(all_latencies, 0.50),
+        'p95_ms': percentile(all_latencies, 0.95),
+        'p99_ms': percentile(all_latencies, 0.99),
+    }
+    return report
+
+
+def _fmt(value):
+    return f'{value:9.1f}' if value is not None else '        -'
+
+
+def print_report(report, baseline=None):
+    print(f'{"endpoint":20} {"reqs":>7} {"err":>5} {"req/s":>8} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}')
+    for name, stats in report.items():
+        print(f'{name:20} {stats["requests"]:7} {stats["errors"]:5} {stats["rps"]:8.1f} '
+              f'{_fmt(stats["p50_ms"])} {_fmt(stats["p95_ms"])} {_fmt(stats["p99_ms"])}')
+        old = (baseline or {}).get(name)
+        if old:
+            changes = []
+            for key in ('rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+                if old.get(key) and stats.get(key) is not None:
+                    changes.append(f'{key} {100 * (stats[key] - old[key]) / old[key]:+.0f}%')
+            print(f'{"":20} vs baseline: {", ".join(changes)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--manifest', default='loadtest-manifest.json')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=30, help='Measured seconds, after the warm-up.')
+    parser.add_argument('--warmup', type=float, default=5)
+    parser.add_argument('--seed', default='0')
+    parser.add_argument('--output', help='Save the report as JSON.')
+    parser.add_argument('--compare', help='A saved report to compare against.')
+    args = parser.parse_args()
+
+    with open(args.manifest) as handle:
+        manifest = json.load(handle)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as handle:
+            saved = json.load(handle)
+        if saved['config'] != _config(args, manifest):
+            print('warning: the baseline was recorded with different settings', file=sys.stderr)
+        baseline = saved['results']
+
+    report = run(args, manifest)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({'config': _config(args, manifest), 'results': report}, handle, indent=2)
+
+
+def _config(args, manifest):
+    return {
+        'clients': args.clients, 'duration': args.duration, 'warmup': args.warmup, 'seed': args.seed,
+        'mix': {name: weight for name, (weight, _, _) in MIX.items()},
+        'data': {key: manifest[key] for key in ('seed', 'today', 'clinics', 'patients', 'bookings')},
+    }
+
+
+if __name__ == '__main__':
+    main()
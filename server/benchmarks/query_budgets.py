@@ -0,0 +1,152 @@
+"""Pin each endpoint to a maximum number of SQL statements.
+
+Run from server/:  python benchmarks/query_budgets.py
+
+Seeds a scratch SQLite database with enough rows that an N+1 pattern would
+blow the budget, calls every read endpoint once with the catalog cache off,
+then the write endpoints in write_budgets(), and exits with status 1 when one
+issues more statements than its budget allows or answers with an unexpected
+status. Raise a budget only together with the change that needs it.
+"""
+import os
+import sys
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite:////tmp/healthhub-query-budgets.db'
+os.environ['BCRYPT_LOG_ROUNDS'] = '4'
+
+from app import app  # noqa: E402
+from cache import catalog_cache  # noqa: E402
+from models import db, Booking, Clinic, ClinicService, Insurance, Patient, Review, Service, User  # noqa: E402
+from query_stats import assert_max_queries  # noqa: E402
+
+BASE_URL = 'https://localhost'
+
+# (role, path) -> statement budget
+BUDGETS = {
+    ('admin', '/api/me'): 0,
+    ('admin', '/api/profile'): 0,
+    ('patient', '/api/profile'): 1,
+    ('patient', '/api/patient-dashboard'): 6,
+    ('clinic', '/api/clinic-dashboard'): 5,
+    ('admin', '/api/admin-dashboard'): 4,
+    ('admin', '/api/admin/analytics?interval=week'): 3,
+    ('admin', '/api/clinics'): 5,
+    ('admin', '/api/clinics/1'): 5,
+    ('admin', '/api/clinics/search?q=clinic'): 5,
+    ('admin', '/api/services'): 2,
+    ('admin', '/api/services/1'): 2,
+    ('admin', '/api/services/1/earliest-slots'): 6,
+    ('admin', '/api/insurances'): 2,
+    ('admin', '/api/insurances/1'): 2,
+    ('admin', '/api/patients'): 1,
+    ('admin', '/api/patients/1'): 1,
+    ('admin', '/api/reviews'): 4,
+    ('admin', '/api/reviews/1'): 4,
+    ('patient', '/api/bookings'): 5,
+    ('clinic', '/api/bookings'): 5,
+    ('admin', '/api/bookings'): 5,
+    ('admin', '/api/bookings/1'): 5,
+    ('admin', '/api/clinics/1/services'): 3,
+    ('admin', '/api/clinic-services/1/availability'): 4,
+    ('admin', '/api/clinics/1/opening-hours'): 2,
+}
+
+
+def write_budgets():
+    """``(role, method, path, body, expected status, budget)`` for the write paths.
+
+    Call inside an app context after seed().
+    """
+    patient = Patient.query.filter(Patient.user_id.is_not(None)).one()
+    unreviewed = [booking.id for booking in patient.bookings if booking.review is None]
+    # A Tuesday a month out, inside the default opening hours.
+    day = date.today() + timedelta(days=30)
+    day += timedelta(days=(1 - day.weekday()) % 7)
+    return [
+        ('anonymous', 'post', '/api/register', {
+            'username': 'newpatient', 'password': 'secret', 'name': 'New Patient',
+            'email': 'newpatient@example.com', 'contact': '0799999999',
+        }, 201, 3),
+        ('admin', 'patch', '/api/bookings/status', {
+            'updates': [{'id': id, 'status': 'confirmed'} for id in unreviewed[:2]],
+        }, 200, 3),
+        ('patient', 'post', '/api/bookings', {
+            'appointment_date': f'{day:%Y-%m-%d} 10:00', 'clinic_service_id': 1, 'patient_id': patient.user_id,
+        }, 201, 13),
+        ('patient', 'post', '/api/reviews', {'booking_id': unreviewed[-1], 'rating': 4, 'comment': 'Good'}, 201, 10),
+    ]
+
+
+def seed(clinics=10, patients=20, per_patient=5):
+    db.drop_all()
+    db.create_all()
+    services = [Service(name=f'Service {i}', duration=30) for i in range(4)]
+    insurances = [Insurance(name=f'Insurance {i}') for i in range(3)]
+    db.session.add_all(services + insurances)
+    for i in range(clinics):
+        clinic = Clinic(name=f'Clinic {i}', specialty='General', contact=f'07{i:08d}',
+                        email=f'clinic{i}@example.com', street='Main St', city='Nairobi')
+        clinic.service_associations = [ClinicService(service=s, price=Decimal(1000 + i)) for s in services]
+        clinic.insurance_accepted = insurances[:1 + i % 3]
+        db.session.add(clinic)
+    db.session.flush()
+    offered = ClinicService.query.all()
+    start = datetime.now() - timedelta(days=3)
+    for i in range(patients):
+        patient = Patient(name=f'Patient {i}', email=f'patient{i}@example.com', contact=f'08{i:08d}')
+        db.session.add(patient)
+        for j in range(per_patient):
+            booking = Booking(
+                clinic_service=offered[(i * per_patient + j) % len(offered)],
+                appointment_date=start + timedelta(hours=i * per_patient + j),
+                status='completed' if j % 2 else 'pending'
+            )
+            if j % 2:
+                booking.review = Review(rating=1 + j % 5, comment='Fine')
+            patient.bookings.append(booking)
+
+    for username, role in (('admin', 'admin'), ('patient', 'patient'), ('clinic', 'clinic')):
+        user = User(username=username, role=role)
+        user.set_password('secret')
+        db.session.add(user)
+    db.session.flush()
+    db.session.get(Patient, 1).user_id = User.query.filter_by(username='patient').one().id
+    db.session.get(Clinic, 1).user_id = User.query.filter_by(username='clinic').one().id
+    db.session.commit()
+
+
+def main():
+    catalog_cache.enabled = False
+    with app.app_context():
+        seed()
+        calls = [(role, 'get', path, None, 200, budget) for (role, path), budget in BUDGETS.items()]
+        calls += write_budgets()
+    clients = {'anonymous': app.test_client()}
+    for role in ('admin', 'patient', 'clinic'):
+        clients[role] = app.test_client()
+        clients[role].post('/api/login', json={'username': role, 'password': 'secret'}, base_url=BASE_URL)
+
+    failed = 0
+    for role, method, path, body, expected, budget in calls:
+        try:
+            with assert_max_queries(budget) as recorder:
+                status = getattr(clients[role], method)(path, json=body, base_url=BASE_URL).status_code
+        except AssertionError as exc:
+            failed += 1
+            print(f'OVER {role:9} {method.upper():5} {path}: {exc}')
+            continue
+        # An endpoint that fails early would otherwise look cheap.
+        ok = status == expected
+        failed += not ok
+        print(f'{"" if ok else "FAIL "}{recorder.count:3} / {budget:<3} {status} {role:9} {method.upper():5} {path}')
+
+    if failed:
+        print(f'{failed} endpoints over budget or with an unexpected status')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Check read-replica routing with two SQLite files.
+
+Run from server/:  python benchmarks/replica_routing.py
+
+Seeds a primary database, copies it to a "replica" file and then never
+replicates again, so the replica stands for one that lags behind. Checks
+that anonymous and patient GETs read from the replica, that writes go to
+the primary, that the patient who just booked is pinned to the primary and
+sees the new booking, and that reads return to the replica once the pin
+expires. Exits with status 1 on the first check that fails.
+"""
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+PRIMARY = '/tmp/healthhub-primary.db'
+REPLICA = '/tmp/healthhub-replica.db'
+os.environ['DATABASE_URL'] = f'sqlite:///{PRIMARY}'
+os.environ['DATABASE_REPLICA_URLS'] = f'sqlite:///{REPLICA}'
+os.environ['BCRYPT_LOG_ROUNDS'] = '4'
+
+from sqlalchemy import event  # noqa: E402
+
+from app import app  # noqa: E402
+from cache import catalog_cache  # noqa: E402
+from models import db  # noqa: E402
+from query_budgets import BASE_URL, seed  # noqa: E402
+from replicas import replica_router  # noqa: E402
+
+
+class Counter:
+    def __init__(self):
+        self.counts = {}
+
+    def listen(self, name, engine):
+        def count(*args):
+            self.counts[name] = self.counts.get(name, 0) + 1
+        event.listen(engine, 'before_cursor_execute', count)
+
+    def take(self):
+        counts, self.counts = self.counts, {}
+        return counts
+
+
+def check(description, ok, counts):
+    print(f'{"ok  " if ok else "FAIL"} {description}: {counts}')
+    if not ok:
+        sys.exit(1)
+
+
+def main():
+    catalog_cache.enabled = False
+    replica_router.sticky_seconds = 2
+    for path in (PRIMARY, REPLICA):
+        if os.path.exists(path):
+            os.remove(path)
+    with app.app_context():
+        seed()
+        db.session.remove()
+        counter = Counter()
+        counter.listen('primary', db.engines[None])
+        counter.listen('replica', db.engines['replica_0'])
+    source, target = sqlite3.connect(PRIMARY), sqlite3.connect(REPLICA)
+    source.backup(target)
+    source.close()
+    target.close()
+
+    client = app.test_client()
+    status = client.get('/api/clinics', base_url=BASE_URL).status_code
+    counts = counter.take()
+    check(f'anonymous GET /api/clinics ({status}) reads the replica', status == 200 and set(counts) == {'replica'}, counts)
+
+    status = client.post('/api/login', json={'username': 'patient', 'password': 'secret'}, base_url=BASE_URL).status_code
+    counts = counter.take()
+    check(f'POST /api/login ({status}) uses the primary', status == 200 and set(counts) == {'primary'}, counts)
+
+    response = client.get('/api/bookings', base_url=BASE_URL)
+    before = len(response.get_json())
+    counts = counter.take()
+    check(f'patient GET /api/bookings ({response.status_code}) reads the replica',
+          response.status_code == 200 and set(counts) == {'replica'}, counts)
+
+    appointment = (datetime.now() + timedelta(days=30)).replace(hour=10, minute=0)
+    with app.app_context():
+        user_id = db.session.execute(db.text("SELECT id FROM users WHERE username = 'patient'")).scalar()
+    response = client.post('/api/bookings', json={
+        'appointment_date': appointment.strftime('%Y-%m-%d %H:%M'), 'clinic_service_id': 1, 'patient_id': user_id,
+    }, base_url=BASE_URL)
+    counts = counter.take()
+    check(f'POST /api/bookings ({response.status_code}) writes to the primary',
+          response.status_code == 201 and set(counts) == {'primary'}, counts)
+    check('the response pins the client to the primary',
+          app.config['REPLICA_STICKY_COOKIE'] in response.headers.get('Set-Cookie', ''), counts)
+
+    response = client.get('/api/bookings', base_url=BASE_URL)
+    after = len(response.get_json())
+    counts = counter.take()
+    check(f'the next GET /api/bookings reads the primary and sees the booking ({before} -> {after})',
+          after == before + 1 and set(counts) == {'primary'}, counts)
+
+    other = app.test_client()
+    status = other.get('/api/clinics', base_url=BASE_URL).status_code
+    counts = counter.take()
+    check(f'another client GET /api/clinics ({status}) still reads the replica', set(counts) == {'replica'}, counts)
+
+    time.sleep(replica_router.sticky_seconds)
+    response = client.get('/api/bookings', base_url=BASE_URL)
+    counts = counter.take()
+    check(f'once the pin expires GET /api/bookings reads the (stale) replica again: {len(response.get_json())}',
+          len(response.get_json()) == before and set(counts) == {'replica'}, counts)
+
+
+if __name__ == '__main__':
+    main()
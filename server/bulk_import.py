@@ -0,0 +1,322 @@
+import csv
+import io
+import json
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import insert, select, text
+
+from models import db, Clinic, ClinicService, Insurance, Service, clinic_insurance, email_pattern
+from versioning import bump_versions
+
+# Batch import of clinics with their price lists and accepted insurances.
+#
+# The whole batch is parsed and validated in memory first; uniqueness of
+# emails and contacts is checked with a few set-based queries. Valid rows
+# are then written in chunks, each in its own transaction, with one
+# executemany per table (COPY on Postgres).
+CHUNK_SIZE = 1000
+LOOKUP_CHUNK = 900  # stay under SQLite's bound-parameter limit
+
+CLINIC_FIELDS = ('name', 'specialty', 'description', 'contact', 'email', 'street', 'city', 'image_url')
+REQUIRED_FIELDS = ('name', 'specialty', 'contact', 'email', 'street', 'city')
+MAX_LENGTHS = {
+    column.name: column.type.length
+    for column in Clinic.__table__.columns
+    if column.name in CLINIC_FIELDS and getattr(column.type, 'length', None)
+}
+
+
+class BulkImportError(ValueError):
+    pass
+
+
+def parse_json(raw):
+    try:
+        data = json.loads(raw)
+    except ValueError as exc:
+        raise BulkImportError(f'Invalid JSON: {exc}')
+    if isinstance(data, dict):
+        data = data.get('clinics')
+    if not isinstance(data, list):
+        raise BulkImportError('Expected a list of clinics or {"clinics": [...]}')
+    return data
+
+
+def parse_csv(raw):
+    """One clinic per line.
+
+    ``services`` holds ``name:price`` (or ``name:price:duration`` to create a
+    new service) entries separated by ``;``, and ``insurances`` holds
+    insurance names separated by ``;``.
+    """
+    records = []
+    for row in csv.DictReader(io.StringIO(raw)):
+        record = {field: row.get(field) for field in CLINIC_FIELDS}
+        record['services'] = [
+            dict(zip(('name', 'price', 'duration'), entry.split(':')))
+            for entry in (row.get('services') or '').split(';') if entry.strip()
+        ]
+        record['insurances'] = [
+            name for name in (row.get('insurances') or '').split(';') if name.strip()
+        ]
+        records.append(record)
+    return records
+
+
+def _clean(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _existing(column, values):
+    found = set()
+    values = list(values)
+    for i in range(0, len(values), LOOKUP_CHUNK):
+        found.update(db.session.execute(
+            select(column).where(column.in_(values[i:i + LOOKUP_CHUNK]))
+        ).scalars())
+    return found
+
+
+def validate(records):
+    """Return ``(rows, errors)`` for raw clinic records.
+
+    ``rows`` holds ``(index, clinic, services, insurances)`` for every valid
+    record. Services are ``(key, name, price, duration)`` and insurances
+    ``(key, name)``, where a key is an id or a lower-cased name. ``errors``
+    maps a record's index to ``{field: message}``.
+    """
+    rows, errors = [], {}
+    emails, contacts = {}, {}
+
+    for index, record in enumerate(records):
+        problems = {}
+        if not isinstance(record, dict):
+            errors[index] = {'row': 'Expected an object'}
+            continue
+
+        clinic = {field: _clean(record.get(field)) for field in CLINIC_FIELDS}
+        for field in REQUIRED_FIELDS:
+            if not clinic[field]:
+                problems[field] = 'Missing or empty required field'
+        for field, length in MAX_LENGTHS.items():
+            if clinic[field] and len(clinic[field]) > length:
+                problems[field] = f'Must be at most {length} characters'
+        if clinic['email']:
+            clinic['email'] = clinic['email'].lower()
+            if not re.match(email_pattern, clinic['email']):
+                problems['email'] = 'Invalid email format'
+
+        services, seen = [], set()
+        for entry in record.get('services') or []:
+            if not isinstance(entry, dict):
+                problems['services'] = 'Each service needs a name or service_id and a price'
+                break
+            name = _clean(entry.get('name'))
+            try:
+                key = int(entry['service_id']) if entry.get('service_id') else (name or '').lower()
+                price = Decimal(str(entry.get('price')).strip())
+                duration = int(entry['duration']) if entry.get('duration') else None
+            except (InvalidOperation, ValueError, TypeError):
+                problems['services'] = f'Invalid service_id, price or duration for service {name!r}'
+                break
+            if not key or not price.is_finite() or price < 0:
+                problems['services'] = 'Each service needs a name or service_id and a non-negative price'
+                break
+            if key in seen:
+                problems['services'] = f'Service {key!r} listed twice'
+                break
+            seen.add(key)
+            services.append((key, name, price.quantize(Decimal('0.01')), duration))
+
+        insurances, seen = [], set()
+        for entry in record.get('insurances') or []:
+            name = None if isinstance(entry, int) else _clean(entry)
+            key = entry if isinstance(entry, int) else (name or '').lower()
+            if key and key not in seen:
+                seen.add(key)
+                insurances.append((key, name))
+
+        for field, seen_values in (('email', emails), ('contact', contacts)):
+            value = clinic[field]
+            if value and value in seen_values:
+                problems[field] = f'Duplicate of row {seen_values[value]}'
+            elif value:
+                seen_values[value] = index
+
+        if problems:
+            errors[index] = problems
+        else:
+            rows.append((index, clinic, services, insurances))
+
+    # Uniqueness against the database, one IN query per chunk of values.
+    taken = {
+        'email': _existing(Clinic.email, emails),
+        'contact': _existing(Clinic.contact, contacts),
+    }
+    valid = []
+    for row in rows:
+        index, clinic = row[0], row[1]
+        problems = {field: 'Already exists' for field, values in taken.items() if clinic[field] in values}
+        if problems:
+            errors[index] = problems
+        else:
+            valid.append(row)
+    return valid, errors
+
+
+def _resolve(rows, errors):
+    """Look up service and insurance keys and collect the ones to create.
+
+    A new service needs a duration; rows naming an unknown service without
+    one are moved to ``errors``.
+    """
+    services = {name.lower(): id for id, name in db.session.execute(select(Service.id, Service.name))}
+    service_ids = set(services.values())
+    insurances = {name.lower(): id for id, name in db.session.execute(select(Insurance.id, Insurance.name))}
+    insurance_ids = set(insurances.values())
+
+    new_services, new_insurances, resolved = {}, {}, []
+    for index, clinic, offered, accepted in rows:
+        problems, row_services, row_insurances = {}, {}, {}
+        for key, name, _, duration in offered:
+            if isinstance(key, int):
+                if key not in service_ids:
+                    problems['services'] = f'Unknown service_id {key}'
+            elif key not in services:
+                if duration is None or duration <= 0:
+                    problems['services'] = f'Unknown service {name!r}; give a duration to create it'
+                else:
+                    row_services[key] = (name, duration)
+        for key, name in accepted:
+            if isinstance(key, int):
+                if key not in insurance_ids:
+                    problems['insurances'] = f'Unknown insurance id {key}'
+            elif key not in insurances:
+                row_insurances[key] = name
+        if problems:
+            errors[index] = problems
+            continue
+        for key, value in row_services.items():
+            new_services.setdefault(key, value)
+        for key, value in row_insurances.items():
+            new_insurances.setdefault(key, value)
+        resolved.append((index, clinic, offered, accepted))
+
+    return resolved, new_services, new_insurances, services, insurances
+
+
+def copy_rows(connection, table, columns, rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f'COPY {table} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer
+        )
+    finally:
+        cursor.close()
+
+
+def _write_chunk(chunk, services, insurances):
+    connection = db.session.connection()
+    now = datetime.now()
+
+    if connection.dialect.name == 'postgresql':
+        # Reserve ids up front so every table can be loaded with COPY.
+        ids = connection.execute(
+            text("SELECT nextval(pg_get_serial_sequence('clinics', 'id')) FROM generate_series(1, :n)"),
+            {'n': len(chunk)}
+        ).scalars().all()
+        copy_rows(connection, 'clinics', ('id',) + CLINIC_FIELDS, [
+            [clinic_id] + [clinic[field] for field in CLINIC_FIELDS]
+            for clinic_id, (_, clinic, _, _) in zip(ids, chunk)
+        ])
+    else:
+        ids = connection.execute(
+            insert(Clinic.__table__).returning(Clinic.id, sort_by_parameter_order=True),
+            [clinic for _, clinic, _, _ in chunk]
+        ).scalars().all()
+
+    # A row may name the same service or insurance by id and by name; the
+    # first entry wins.
+    prices, accepted = [], []
+    for clinic_id, (_, _, offered, keys) in zip(ids, chunk):
+        by_service = {}
+        for key, _, price, _ in offered:
+            by_service.setdefault(key if isinstance(key, int) else services[key], price)
+        prices.extend(
+            {'clinic_id': clinic_id, 'service_id': service_id, 'price': price}
+            for service_id, price in by_service.items()
+        )
+        insurance_ids = dict.fromkeys(key if isinstance(key, int) else insurances[key] for key, _ in keys)
+        accepted.extend(
+            {'clinic_id': clinic_id, 'insurance_id': insurance_id, 'created_at': now}
+            for insurance_id in insurance_ids
+        )
+
+    if connection.dialect.name == 'postgresql':
+        copy_rows(connection, 'clinic_service', ('clinic_id', 'service_id', 'price'),
+                  [[row['clinic_id'], row['service_id'], row['price']] for row in prices])
+        copy_rows(connection, 'clinic_insurance', ('clinic_id', 'insurance_id', 'created_at'),
+                  [[row['clinic_id'], row['insurance_id'], row['created_at']] for row in accepted])
+    else:
+        if prices:
+            connection.execute(insert(ClinicService.__table__), prices)
+        if accepted:
+            connection.execute(insert(clinic_insurance), accepted)
+
+    bump_versions('clinics', 'clinic_service', 'clinic_insurance')
+    return ids
+
+
+def import_clinics(records, dry_run=False, chunk_size=CHUNK_SIZE):
+    """Validate and insert ``records``; returns a report of what happened.
+
+    Each chunk commits on its own, so a failing chunk only loses its own
+    rows, which are reported with the database error.
+    """
+    rows, errors = validate(records)
+    rows, new_services, new_insurances, services, insurances = _resolve(rows, errors)
+
+    if dry_run:
+        db.session.rollback()
+        return _report(records, 0, errors, dry_run=True)
+
+    if new_services or new_insurances:
+        created_services = {key: Service(name=name, duration=duration) for key, (name, duration) in new_services.items()}
+        created_insurances = {key: Insurance(name=name) for key, name in new_insurances.items()}
+        db.session.add_all(list(created_services.values()) + list(created_insurances.values()))
+        db.session.commit()
+        services.update({key: service.id for key, service in created_services.items()})
+        insurances.update({key: insurance.id for key, insurance in created_insurances.items()})
+
+    created = 0
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        try:
+            _write_chunk(chunk, services, insurances)
+            db.session.commit()
+            created += len(chunk)
+        except Exception as exc:
+            db.session.rollback()
+            for index, _, _, _ in chunk:
+                errors[index] = {'row': f'Not imported: {getattr(exc, "orig", None) or exc}'}
+
+    return _report(records, created, errors)
+
+
+def _report(records, created, errors, dry_run=False):
+    return {
+        'total': len(records),
+        'created': created,
+        'valid': len(records) - len(errors),
+        'failed': len(errors),
+        'dry_run': dry_run,
+        'errors': [{'row': index, 'errors': errors[index]} for index in sorted(errors)],
+    }
@@ -0,0 +1,197 @@
+import logging
+import os
+import select
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db
+from versioning import NOTIFY_CHANNEL, VERSIONED_TABLES, current_versions, version_observers
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogCache:
+    """Process-local LRU/TTL cache for serialized catalog data.
+
+    Every entry records the tables it was built from. Entries are evicted
+    when one of those tables changes:
+
+    * right after commit in the worker that made the write,
+    * through Postgres LISTEN/NOTIFY in every other worker, and
+    * by polling ``table_versions`` every ``CATALOG_CACHE_POLL_INTERVAL``
+      seconds whenever no listener is connected (always on SQLite), and
+    * whenever a conditional GET reads newer versions than the cache has seen.
+
+    So a write is visible in all workers within the poll interval at worst.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        self._versions = None
+        self._polled_at = 0.0
+        self._listener_pid = None
+        self._listening = False
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.setdefault('CATALOG_CACHE_ENABLED', True)
+        self.maxsize = app.config.setdefault('CATALOG_CACHE_SIZE', 1024)
+        self.ttl = app.config.setdefault('CATALOG_CACHE_TTL', 300)
+        self.poll_interval = app.config.setdefault('CATALOG_CACHE_POLL_INTERVAL', 1.0)
+        app.extensions['catalog_cache'] = self
+
+    def get_or_set(self, key, tables, loader):
+        """Return the cached value for ``key`` or build it with ``loader()``.
+
+        Values are shared between requests and must not be mutated.
+        """
+        if not self.enabled:
+            return loader()
+
+        self._start_listener()
+        self._poll()
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return value
+                del self._entries[key]
+            self.stats['misses'] += 1
+
+        value = loader()
+
+        with self._lock:
+            self._entries[key] = (value, now + self.ttl, frozenset(tables))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+        return value
+
+    def invalidate(self, tables=None):
+        """Drop entries built from any of ``tables`` (everything when None)."""
+        with self._lock:
+            if tables is None:
+                stale = list(self._entries)
+            else:
+                tables = set(tables)
+                stale = [key for key, (_, _, deps) in self._entries.items() if deps & tables]
+            for key in stale:
+                del self._entries[key]
+            self.stats['invalidations'] += len(stale)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_ratio': round(self.stats['hits'] / lookups, 4) if lookups else None,
+                'invalidation': 'notify' if self._listening else 'poll',
+                'poll_interval': self.poll_interval,
+            }
+
+    def _poll(self):
+        if self._listening:
+            return
+        now = time.monotonic()
+        if now - self._polled_at < self.poll_interval:
+            return
+        self._polled_at = now
+
+        current_versions(VERSIONED_TABLES)
+
+    def observe_versions(self, versions):
+        """Evict entries for tables whose version is newer than the last one seen.
+
+        Versions only grow; an older one comes from a lagging read replica
+        and is ignored.
+        """
+        with self._lock:
+            if self._versions is None:
+                self._versions = {}
+            changed = [
+                name for name, version in versions.items()
+                if name in self._versions and version > self._versions[name]
+            ]
+            for name, version in versions.items():
+                self._versions[name] = max(version, self._versions.get(name, version))
+        if changed:
+            self.invalidate(changed)
+
+    def _start_listener(self):
+        # One listener thread per process, started lazily so that it is
+        # created after gunicorn forks its workers.
+        if self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+            self._listening = False
+            engine = db.engine
+            if engine.dialect.name == 'postgresql':
+                thread = threading.Thread(target=self._listen, args=(engine,), daemon=True, name='catalog-cache-listener')
+                thread.start()
+
+    def _listen(self, engine):
+        while True:
+            connection = None
+            try:
+                connection = engine.raw_connection()
+                connection.detach()
+                dbapi = connection.driver_connection
+                dbapi.autocommit = True
+                dbapi.cursor().execute(f'LISTEN {NOTIFY_CHANNEL}')
+
+                # Anything could have changed while we were not listening.
+                self.invalidate()
+                self._listening = True
+
+                while True:
+                    if select.select([dbapi], [], [], 30) == ([], [], []):
+                        continue
+                    dbapi.poll()
+                    while dbapi.notifies:
+                        notify = dbapi.notifies.pop(0)
+                        self.invalidate(notify.payload.split(','))
+            except Exception:
+                logger.exception('Catalog cache listener disconnected; falling back to polling')
+            finally:
+                self._listening = False
+                self._polled_at = 0.0
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+            time.sleep(5)
+
+
+catalog_cache = CatalogCache()
+version_observers.append(catalog_cache.observe_versions)
+
+
+@event.listens_for(Session, 'after_commit')
+def evict_committed(session):
+    tables = session.info.pop('bumped_tables', None)
+    if tables:
+        catalog_cache.invalidate(tables)
+
+
+@event.listens_for(Session, 'after_rollback')
+def forget_rolled_back(session):
+    session.info.pop('bumped_tables', None)
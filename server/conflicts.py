@@ -0,0 +1,73 @@
+import re
+
+# Turns unique-constraint violations into field-level 400 responses.
+#
+# Writes that must not duplicate a username, email or contact go straight to
+# the database and let its unique constraints decide, instead of checking
+# with a SELECT first (which also leaves a race between check and insert).
+# The violated table and column are read from the driver's error.
+
+# (table, column) -> (request field, message)
+MESSAGES = {
+    ('users', 'username'): ('username', 'Username already exists'),
+    ('patients', 'contact'): ('contact', 'Contact number already exists'),
+    ('patients', 'email'): ('email', 'Email already exists'),
+    ('patients', 'user_id'): ('user_id', 'User already has a patient profile'),
+    ('clinics', 'contact'): ('contact', 'Contact number already exists'),
+    ('clinics', 'email'): ('email', 'Email already exists'),
+    ('clinics', 'user_id'): ('user_id', 'User already has a clinic profile'),
+    ('clinic_service', 'clinic_id'): ('service_id', 'Service already offered by this clinic'),
+    ('clinic_service', 'service_id'): ('service_id', 'Service already offered by this clinic'),
+}
+
+# Unique indexes by name -> (table, columns). SQLite names only the columns
+# of a violated index, Postgres names the index itself.
+UNIQUE_INDEXES = {
+    'uq_bookings_clinic_service_id_appointment_date_active': ('bookings', ['clinic_service_id', 'appointment_date']),
+}
+
+_SQLITE_UNIQUE = re.compile(r'UNIQUE constraint failed: (.+)$')
+_POSTGRES_KEY = re.compile(r'Key \(([^)]*)\)=')
+_POSTGRES_UNIQUE_VIOLATION = '23505'
+
+
+def unique_violation(exc):
+    """``(table, [columns])`` for a unique violation, otherwise None.
+
+    ``exc`` is an IntegrityError or the DBAPI error it wraps.
+    """
+    orig = getattr(exc, 'orig', exc)
+    if getattr(orig, 'pgcode', None) == _POSTGRES_UNIQUE_VIOLATION:
+        diag = orig.diag
+        match = _POSTGRES_KEY.search(diag.message_detail or '')
+        columns = [column.strip() for column in match.group(1).split(',')] if match else []
+        return diag.table_name, columns
+    match = _SQLITE_UNIQUE.search(str(orig))
+    if match:
+        qualified = [name.strip().split('.', 1) for name in match.group(1).split(',')]
+        return qualified[0][0], [column for _, column in qualified]
+    return None
+
+
+def violates(exc, index_name):
+    """Whether ``exc`` is a violation of the unique index ``index_name``."""
+    orig = getattr(exc, 'orig', exc)
+    if getattr(orig, 'pgcode', None) == _POSTGRES_UNIQUE_VIOLATION:
+        return orig.diag.constraint_name == index_name
+    violation = unique_violation(orig)
+    return violation is not None and violation == UNIQUE_INDEXES.get(index_name)
+
+
+def conflict_response(exc):
+    """The 400 response for an IntegrityError raised on commit.
+
+    The body names every conflicting field under ``fields``; ``error`` holds
+    the first message, as the pre-check responses did.
+    """
+    violation = unique_violation(exc)
+    if violation is None:
+        return {'error': str(getattr(exc, 'orig', exc))}, 400
+    table, columns = violation
+    fields = dict(MESSAGES.get((table, column), (column, f'{column} already exists')) for column in columns)
+    error = next(iter(fields.values()), f'Duplicate {table} record')
+    return {'error': error, 'fields': fields}, 400
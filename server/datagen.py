@@ -0,0 +1,300 @@
+import random
+from bisect import bisect
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from math import gcd
+
+from sqlalchemy import func, insert, select, text
+
+from bulk_import import copy_rows
+from models import (
+    db, Booking, Clinic, ClinicService, Insurance, OpeningHours, Patient, Review, Service, User, clinic_insurance
+)
+from passwords import password_hasher
+from ratings import rebuild_ratings
+from rollups import rebuild_rollups
+from versioning import VERSIONED_TABLES, bump_versions
+
+# Synthetic data at capacity-planning volumes.
+#
+# Every value comes from one random.Random(seed), drawn in a fixed order, and
+# ids are assigned here rather than by the database, so the same seed, sizes
+# and ``today`` give the same rows on every run and backend. Rows are written
+# in chunks with executemany (COPY on Postgres), one transaction per chunk.
+#
+# Popularity is skewed: clinics are ranked in a shuffled order and drawn with
+# Zipf weights, so a few clinics take most of the bookings, as in production.
+CHUNK_SIZE = 10000
+
+SERVICES = [
+    ('General Consultation', 30, 1500), ('Dental Checkup', 45, 2500), ('Pediatrics', 40, 2000),
+    ('Cardiology', 60, 6000), ('Therapist', 60, 4000), ('Gynaecologist', 60, 4500),
+    ('Dermatology', 30, 3500), ('Physiotherapy', 45, 3000), ('Eye Examination', 30, 2000),
+    ('Laboratory Tests', 15, 1200), ('Vaccination', 15, 800), ('Antenatal Care', 45, 2500),
+]
+INSURANCES = ['NHIF', 'Jubilee Insurance', 'AAR Insurance', 'SHA', 'UAP', 'Britam', 'CIC', 'Madison']
+SPECIALTIES = ['General', 'Dental', 'Pediatrics', 'Cardiology', 'Dermatology', 'Maternity', 'Optical', 'Wellness']
+# City names with relative weights.
+CITIES = [
+    ('Nairobi', 40), ('Mombasa', 15), ('Kisumu', 10), ('Nakuru', 9), ('Eldoret', 8),
+    ('Thika', 5), ('Machakos', 4), ('Nyeri', 3), ('Meru', 3), ('Kakamega', 3),
+]
+CLINIC_WORDS = ['Afya', 'Uzima', 'Tumaini', 'Baraka', 'Neema', 'Imani', 'Upendo', 'Amani', 'Jamii', 'Faraja', 'Riverside', 'Hillview']
+CLINIC_KINDS = ['Clinic', 'Medical Centre', 'Health Centre', 'Family Clinic', 'Hospital', 'Specialist Centre']
+FIRST_NAMES = ['Achieng', 'Wanjiru', 'Kamau', 'Otieno', 'Njeri', 'Mwangi', 'Akinyi', 'Kiprop', 'Chebet', 'Omondi',
+               'Wambui', 'Mutua', 'Nafula', 'Barasa', 'Atieno', 'Kariuki', 'Jepkosgei', 'Ouma', 'Wairimu', 'Kilonzo']
+LAST_NAMES = ['Kamau', 'Odhiambo', 'Wanjiku', 'Kiptoo', 'Mutiso', 'Onyango', 'Njoroge', 'Cherono', 'Wekesa',
+              'Maina', 'Owino', 'Kimani', 'Rotich', 'Nyambura', 'Ochieng', 'Mwende', 'Koech', 'Gitau']
+STREETS = ['Moi Avenue', 'Kenyatta Avenue', 'Ngong Road', 'Oginga Odinga Street', 'Uhuru Highway', 'Haile Selassie Avenue']
+COMMENTS = ['Great service', 'Friendly staff', 'Long wait but good care', 'Very professional', 'Clean facility',
+            'Would recommend', 'Expensive', 'Doctor was rushed', 'Excellent follow-up', None]
+
+# Appointments sit on a weekday grid of 30 minute slots from 08:00 to 18:00.
+SLOT_MINUTES = 30
+DAY_SLOTS = 20
+OPENING_HOURS = [(weekday, time(8), time(18)) for weekday in range(5)] + [(5, time(9), time(13))]
+
+
+class DataGenerationError(ValueError):
+    pass
+
+
+def _zipf(rng, size, skew):
+    """Zipf weights for ``size`` items, ranked in a random order."""
+    ranks = list(range(1, size + 1))
+    rng.shuffle(ranks)
+    return [1.0 / rank ** skew for rank in ranks]
+
+
+def _busiest(weights, count):
+    return sorted(range(len(weights)), key=weights.__getitem__, reverse=True)[:count]
+
+
+def _pick(rng, cumulative):
+    return bisect(cumulative, rng.random() * cumulative[-1])
+
+
+def _write(table, columns, rows):
+    if not rows:
+        return
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql':
+        copy_rows(connection, table.name, columns, rows)
+    else:
+        connection.execute(insert(table), [dict(zip(columns, row)) for row in rows])
+
+
+def _next_id(table):
+    return (db.session.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def _catalog(model, names, make):
+    """Ids of ``names`` in ``model``, creating the missing ones."""
+    existing = dict(db.session.execute(select(model.name, model.id).where(model.name.in_(names))).all())
+    missing = [make(name) for name in names if name not in existing]
+    if missing:
+        db.session.add_all(missing)
+        db.session.flush()
+        existing.update({row.name: row.id for row in missing})
+    return [existing[name] for name in names]
+
+
+class _Slots:
+    """Hands out distinct slots per clinic service.
+
+    Slot ``k`` of a clinic service is ``(offset + k * step) % size`` with
+    ``step`` coprime to ``size``, so the first ``size`` are all different
+    without remembering which were taken. Past that the grid is full.
+    """
+
+    def __init__(self, rng, days):
+        self.rng = rng
+        self.days = days
+        self.size = len(days) * DAY_SLOTS
+        self.steps = [step for step in range(self.size // 3, self.size // 3 + 200) if gcd(step, self.size) == 1]
+        self.state = {}
+
+    def take(self, clinic_service_id):
+        offset, step, taken = self.state.get(clinic_service_id) or (
+            self.rng.randrange(self.size), self.rng.choice(self.steps), 0
+        )
+        self.state[clinic_service_id] = (offset, step, taken + 1)
+        slot = (offset + taken * step) % self.size
+        day = self.days[slot // DAY_SLOTS]
+        minutes = 8 * 60 + (slot % DAY_SLOTS) * SLOT_MINUTES
+        return datetime.combine(day, time(minutes // 60, minutes % 60)), taken >= self.size
+
+
+def generate(clinics=1000, patients=10000, bookings=100000, seed=0, skew=1.1, review_rate=0.35,
+             history_days=730, future_days=60, today=None, login_users=20, password='loadtest',
+             chunk_size=CHUNK_SIZE, echo=None):
+    """Write a synthetic data set and return its manifest.
+
+    The manifest records the parameters and the id ranges and logins the
+    load test draws from. The clinics and patients tables must be empty.
+    """
+    echo = echo or (lambda message: None)
+    rng = random.Random(seed)
+    today = today or date.today()
+    now = datetime.combine(today, time(0))
+
+    if db.session.execute(select(func.count()).select_from(Clinic)).scalar() or \
+            db.session.execute(select(func.count()).select_from(Patient)).scalar():
+        raise DataGenerationError('The clinics and patients tables must be empty')
+
+    durations = {name: duration for name, duration, _ in SERVICES}
+    service_ids = _catalog(Service, list(durations), lambda name: Service(name=name, duration=durations[name]))
+    base_prices = dict(zip(service_ids, (price for _, _, price in SERVICES)))
+    insurance_ids = _catalog(Insurance, INSURANCES, lambda name: Insurance(name=name))
+    db.session.commit()
+
+    # Clinics, their price lists, insurances and opening hours.
+    city_weights = list(accumulate(weight for _, weight in CITIES))
+    first_clinic = clinic_id = _next_id(Clinic.__table__)
+    clinic_service_id = _next_id(ClinicService.__table__)
+    opening_id = _next_id(OpeningHours.__table__)
+    offered = []    # clinic index -> clinic service ids
+    quality = []    # clinic index -> mean rating
+    clinic_columns = ('id', 'name', 'specialty', 'description', 'contact', 'email', 'street', 'city')
+    for start in range(0, clinics, chunk_size):
+        clinic_rows, price_rows, insurance_rows, hours_rows = [], [], [], []
+        for _ in range(min(chunk_size, clinics - start)):
+            city = CITIES[_pick(rng, city_weights)][0]
+            specialty = rng.choice(SPECIALTIES)
+            name = f'{rng.choice(CLINIC_WORDS)} {rng.choice(CLINIC_WORDS)} {rng.choice(CLINIC_KINDS)}'
+            clinic_rows.append((
+                clinic_id, name, specialty, f'{specialty} care in {city}.',
+                f'+2541{clinic_id:08d}', f'clinic{clinic_id}@example.org',
+                f'{rng.randint(1, 400)} {rng.choice(STREETS)}', city,
+            ))
+            ids = []
+            for service_id in sorted(rng.sample(service_ids, rng.randint(2, 6))):
+                price = Decimal(round(base_prices[service_id] * rng.uniform(0.7, 1.6) / 50) * 50)
+                price_rows.append((clinic_service_id, clinic_id, service_id, price))
+                ids.append(clinic_service_id)
+                clinic_service_id += 1
+            offered.append(ids)
+            quality.append(rng.uniform(2.5, 4.8))
+            for insurance_id in sorted(rng.sample(insurance_ids, rng.randint(1, 4))):
+                insurance_rows.append((clinic_id, insurance_id, now))
+            for weekday, opens_at, closes_at in OPENING_HOURS:
+                hours_rows.append((opening_id, clinic_id, weekday, opens_at, closes_at))
+                opening_id += 1
+            clinic_id += 1
+        _write(Clinic.__table__, clinic_columns, clinic_rows)
+        _write(ClinicService.__table__, ('id', 'clinic_id', 'service_id', 'price'), price_rows)
+        _write(clinic_insurance, ('clinic_id', 'insurance_id', 'created_at'), insurance_rows)
+        _write(OpeningHours.__table__, ('id', 'clinic_id', 'weekday', 'opens_at', 'closes_at'), hours_rows)
+        db.session.commit()
+        echo(f'clinics: {start + len(clinic_rows)}/{clinics}')
+
+    # Patients.
+    first_patient = patient_id = _next_id(Patient.__table__)
+    for start in range(0, patients, chunk_size):
+        rows = []
+        for _ in range(min(chunk_size, patients - start)):
+            rows.append((
+                patient_id, f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                f'+2547{patient_id:08d}', f'patient{patient_id}@example.net',
+                now - timedelta(minutes=rng.randrange(history_days * 24 * 60)),
+            ))
+            patient_id += 1
+        _write(Patient.__table__, ('id', 'name', 'contact', 'email', 'date_joined'), rows)
+        db.session.commit()
+        echo(f'patients: {start + len(rows)}/{patients}')
+
+    # Bookings with reviews on some of the completed ones.
+    days = [today + timedelta(days=offset) for offset in range(-history_days, future_days)]
+    slots = _Slots(rng, [day for day in days if day.weekday() < 5])
+    clinic_weights = _zipf(rng, clinics, skew)
+    patient_weights = _zipf(rng, patients, skew / 2)
+    clinic_cumulative = list(accumulate(clinic_weights))
+    patient_cumulative = list(accumulate(patient_weights))
+    first_booking = booking_id = _next_id(Booking.__table__)
+    first_review = review_id = _next_id(Review.__table__)
+    booking_columns = ('id', 'booking_date', 'appointment_date', 'status', 'notes', 'patient_id', 'clinic_service_id')
+    for start in range(0, bookings, chunk_size):
+        booking_rows, review_rows = [], []
+        for _ in range(min(chunk_size, bookings - start)):
+            clinic = _pick(rng, clinic_cumulative)
+            clinic_service = rng.choice(offered[clinic])
+            appointment, full = slots.take(clinic_service)
+            if full:
+                status = 'cancelled'    # cancelled bookings do not hold their slot
+            elif appointment < now:
+                status = 'completed' if rng.random() < 0.82 else 'cancelled'
+            else:
+                status = rng.choices(('pending', 'confirmed', 'cancelled'), (6, 3, 1))[0]
+            booked = min(appointment - timedelta(minutes=rng.randrange(1, 30 * 24 * 60)), now)
+            booking_rows.append((
+                booking_id, booked, appointment, status, None,
+                first_patient + _pick(rng, patient_cumulative), clinic_service,
+            ))
+            if status == 'completed' and rng.random() < review_rate:
+                rating = min(5, max(1, round(rng.gauss(quality[clinic], 1.0))))
+                review_rows.append((
+                    review_id, rng.choice(COMMENTS), rating,
+                    min(appointment + timedelta(hours=rng.randint(1, 72)), now), booking_id,
+                ))
+                review_id += 1
+            booking_id += 1
+        _write(Booking.__table__, booking_columns, booking_rows)
+        _write(Review.__table__, ('id', 'comment', 'rating', 'date', 'booking_id'), review_rows)
+        db.session.commit()
+        echo(f'bookings: {start + len(booking_rows)}/{bookings}')
+
+    # Logins for the load test: one admin, and clinic and patient users
+    # attached to the busiest clinics and patients.
+    password_hash = password_hasher.hash(password)
+    popular_clinics = _busiest(clinic_weights, login_users)
+    popular_patients = _busiest(patient_weights, login_users)
+    users = {'admin': ['loadtest-admin'], 'clinic': [], 'patient': []}
+    user_id = _next_id(User.__table__)
+    user_rows = [(user_id, 'loadtest-admin', password_hash, 'admin', now)]
+    links = []
+    for role, indexes, model, first in (('clinic', popular_clinics, Clinic, first_clinic),
+                                        ('patient', popular_patients, Patient, first_patient)):
+        for number, index in enumerate(indexes):
+            user_id += 1
+            username = f'loadtest-{role}-{number}'
+            user_rows.append((user_id, username, password_hash, role, now))
+            users[role].append(username)
+            links.append((model, first + index, user_id))
+    _write(User.__table__, ('id', 'username', 'password_hash', 'role', 'created_at'), user_rows)
+    for model, row_id, linked_user in links:
+        db.session.execute(model.__table__.update().where(model.id == row_id).values(user_id=linked_user))
+    db.session.commit()
+
+    if db.engine.dialect.name == 'postgresql':
+        for table in ('clinics', 'clinic_service', 'opening_hours', 'patients', 'bookings', 'reviews', 'users'):
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+            ))
+
+    echo('rebuilding rating aggregates and analytics rollups')
+    rebuild_ratings()
+    rebuild_rollups()
+    bump_versions(*VERSIONED_TABLES)
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+
+    return {
+        'seed': seed,
+        'today': today.isoformat(),
+        'skew': skew,
+        'review_rate': review_rate,
+        'clinics': [first_clinic, first_clinic + clinics - 1],
+        'clinic_services': [offered[0][0] if offered else None, clinic_service_id - 1],
+        'patients': [first_patient, first_patient + patients - 1],
+        'bookings': [first_booking, booking_id - 1],
+        'reviews': [first_review, review_id - 1],
+        'services': service_ids,
+        'insurances': insurance_ids,
+        'cities': [city for city, _ in CITIES],
+        'specialties': SPECIALTIES,
+        'popular_clinics': [first_clinic + index for index in popular_clinics],
+        'password': password,
+        'users': users,
+    }
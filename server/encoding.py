@@ -0,0 +1,64 @@
+import json
+import os
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from flask import current_app, make_response
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used instead
+    orjson = None
+
+# JSON encoding for flask_restful responses. orjson is used when installed,
+# otherwise the stdlib json module. Both emit datetimes as ISO 8601 strings
+# and Decimals as numbers, so models can return them unconverted.
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps_stdlib(data, pretty=False):
+    if pretty:
+        text = json.dumps(data, default=_default, indent=4)
+    else:
+        text = json.dumps(data, default=_default, separators=(',', ':'))
+    return (text + '\n').encode('utf-8')
+
+
+def dumps_orjson(data, pretty=False):
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+    if pretty:
+        options |= orjson.OPT_INDENT_2
+    return orjson.dumps(data, default=_default, option=options)
+
+
+BACKENDS = {'json': dumps_stdlib}
+if orjson is not None:
+    BACKENDS['orjson'] = dumps_orjson
+
+DEFAULT_BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def backend_name(app):
+    """The configured JSON_BACKEND, or the default when it is unset or unavailable."""
+    name = app.config.get('JSON_BACKEND') or os.environ.get('JSON_BACKEND') or DEFAULT_BACKEND
+    return name if name in BACKENDS else 'json'
+
+
+def output_json(data, code, headers=None):
+    """flask_restful representation for application/json."""
+    dumps = current_app.extensions['json_backend']
+    response = make_response(dumps(data, pretty=current_app.debug), code)
+    response.headers.extend(headers or {})
+    return response
+
+
+def init_api(app, api):
+    app.extensions['json_backend'] = BACKENDS[backend_name(app)]
+    api.representation('application/json')(output_json)
@@ -0,0 +1,159 @@
+import os
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+# Named engine and pool settings, picked with DB_PROFILE.
+#
+# ``web`` is for gunicorn: one pooled connection per request thread plus a
+# little headroom, pre-ping and recycling so connections dropped by the
+# server are not handed out, and Postgres timeouts so a stuck query cannot
+# hold a thread forever (streamed exports relax the idle-in-transaction
+# timeout for their own transaction, see export.py). ``development`` is the same without the statement
+# timeout, ``batch`` is for CLI imports and backfills, and ``default`` leaves
+# SQLAlchemy's own defaults. Every profile but ``default`` puts SQLite in WAL
+# mode with a busy timeout, so concurrent local runs wait for the write lock
+# instead of failing with "database is locked".
+_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+    'cache_size': -16000,
+}
+
+PROFILES = {
+    'default': {},
+    'web': {
+        'headroom': 2,
+        'max_overflow': 4,
+        'pool_timeout': 10,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+        'sqlite_pragmas': _SQLITE_PRAGMAS,
+        'postgres_settings': {
+            'statement_timeout': '5s',
+            'lock_timeout': '2s',
+            'idle_in_transaction_session_timeout': '30s',
+        },
+    },
+    'development': {
+        'headroom': 2,
+        'max_overflow': 8,
+        'pool_timeout': 30,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+        'sqlite_pragmas': _SQLITE_PRAGMAS,
+        'postgres_settings': {'lock_timeout': '10s', 'idle_in_transaction_session_timeout': '5min'},
+    },
+    'batch': {
+        'headroom': 1,
+        'max_overflow': 0,
+        'pool_timeout': 60,
+        'pool_recycle': 3600,
+        'pool_pre_ping': True,
+        'sqlite_pragmas': dict(_SQLITE_PRAGMAS, busy_timeout=60000),
+        'postgres_settings': {'statement_timeout': '0', 'lock_timeout': '60s'},
+    },
+}
+
+
+def _int_env(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def profile_name(app):
+    """DB_PROFILE, or ``web`` under gunicorn and ``development`` otherwise."""
+    name = app.config.get('DB_PROFILE') or os.environ.get('DB_PROFILE')
+    if not name:
+        name = 'web' if os.environ.get('GUNICORN_WORKERS') else 'development'
+    if name not in PROFILES:
+        raise ValueError(f'Unknown DB_PROFILE {name!r}; expected one of: {", ".join(PROFILES)}')
+    return name
+
+
+def pool_size(profile, threads, workers, max_connections=None):
+    """``(pool_size, max_overflow)`` for one worker process.
+
+    Each request thread can hold one connection; ``headroom`` covers the
+    catalog cache listener and other background users. With
+    ``max_connections`` (the database's budget for this service) the total
+    across ``workers`` is kept under it.
+    """
+    size = threads + profile['headroom']
+    overflow = profile['max_overflow']
+    if max_connections:
+        per_worker = max(1, max_connections // max(1, workers))
+        size = min(size, per_worker)
+        overflow = max(0, min(overflow, per_worker - size))
+    return size, overflow
+
+
+def engine_options(app):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured profile and server size."""
+    profile = PROFILES[profile_name(app)]
+    if not profile:
+        return {}
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    options = {'pool_pre_ping': profile['pool_pre_ping']}
+
+    # In-memory SQLite uses a single shared connection, not a sized pool.
+    if not (url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')):
+        size, overflow = pool_size(
+            profile,
+            threads=_int_env('GUNICORN_THREADS', 1),
+            workers=_int_env('GUNICORN_WORKERS', 1),
+            max_connections=_int_env('DB_MAX_CONNECTIONS', None),
+        )
+        options.update(
+            pool_size=size, max_overflow=overflow,
+            pool_timeout=profile['pool_timeout'], pool_recycle=profile['pool_recycle'],
+        )
+
+    settings = profile['postgres_settings']
+    if url.get_backend_name() == 'postgresql' and settings:
+        options['connect_args'] = {
+            'options': ' '.join(f'-c {name}={value}' for name, value in settings.items()),
+            'application_name': os.environ.get('DB_APPLICATION_NAME', 'healthhub'),
+        }
+    return options
+
+
+class EngineProfile:
+    """Applies the DB_PROFILE settings. Call init_app before db.init_app."""
+
+    def __init__(self, app=None):
+        self.name = None
+        self.pragmas = {}
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.name = profile_name(app)
+        self.pragmas = PROFILES[self.name].get('sqlite_pragmas', {})
+        options = engine_options(app)
+        configured = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        for key, value in options.items():
+            configured.setdefault(key, value)
+        app.config['DB_PROFILE'] = self.name
+        app.extensions['engine_profile'] = self
+        if not self._listening:
+            event.listen(Engine, 'connect', self._on_connect)
+            self._listening = True
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        if not self.pragmas or not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in self.pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+engine_profile = EngineProfile()
@@ -0,0 +1,111 @@
+import csv
+import io
+
+from flask import Response, current_app, stream_with_context
+from sqlalchemy import select, text
+
+from models import db, Booking, Clinic, ClinicService, Patient, Review, Service
+
+# Bulk exports stream flat rows straight from a server-side cursor, one
+# batch at a time, so memory use does not grow with the size of the export.
+# Rows come out in id order; a dropped download resumes with ``after_id``
+# set to the last id received.
+BATCH_SIZE = 1000
+# The web profile ends sessions that sit idle in a transaction for 30s, but
+# the cursor keeps the export's transaction open while the server waits on a
+# slow client. Exports lift that limit for their own transaction only and
+# give each FETCH longer than the web statement timeout.
+EXPORT_POSTGRES_SETTINGS = {'idle_in_transaction_session_timeout': '0', 'statement_timeout': '60s'}
+FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def _bookings():
+    columns = [
+        Booking.id, Booking.booking_date, Booking.appointment_date, Booking.status, Booking.notes,
+        Booking.patient_id, Patient.name.label('patient_name'), Patient.email.label('patient_email'),
+        Booking.clinic_service_id, ClinicService.clinic_id, Clinic.name.label('clinic_name'),
+        ClinicService.service_id, Service.name.label('service_name'), ClinicService.price,
+        Review.rating.label('review_rating'),
+    ]
+    query = (
+        select(*columns)
+        .join(Patient, Patient.id == Booking.patient_id)
+        .join(ClinicService, ClinicService.id == Booking.clinic_service_id)
+        .join(Clinic, Clinic.id == ClinicService.clinic_id)
+        .join(Service, Service.id == ClinicService.service_id)
+        .outerjoin(Review, Review.booking_id == Booking.id)
+    )
+    return query, Booking.id, Booking.appointment_date
+
+
+def _reviews():
+    columns = [
+        Review.id, Review.booking_id, Review.rating, Review.comment, Review.date,
+        Booking.patient_id, Patient.name.label('patient_name'),
+        ClinicService.clinic_id, Clinic.name.label('clinic_name'),
+        ClinicService.service_id, Service.name.label('service_name'), Booking.appointment_date,
+    ]
+    query = (
+        select(*columns)
+        .join(Booking, Booking.id == Review.booking_id)
+        .join(Patient, Patient.id == Booking.patient_id)
+        .join(ClinicService, ClinicService.id == Booking.clinic_service_id)
+        .join(Clinic, Clinic.id == ClinicService.clinic_id)
+        .join(Service, Service.id == ClinicService.service_id)
+    )
+    return query, Review.id, Review.date
+
+
+# name -> builder returning (query, id column, date column filtered by from/to)
+EXPORTS = {'bookings': _bookings, 'reviews': _reviews}
+
+
+def export_query(kind, start=None, end=None, clinic_id=None, after_id=None):
+    query, id_column, date_column = EXPORTS[kind]()
+    if start:
+        query = query.where(date_column >= start)
+    if end:
+        query = query.where(date_column < end)
+    if clinic_id is not None:
+        query = query.where(ClinicService.clinic_id == clinic_id)
+    if after_id is not None:
+        query = query.where(id_column > after_id)
+    return query.order_by(id_column)
+
+
+def _ndjson(result):
+    dumps = current_app.extensions['json_backend']
+    for rows in result.partitions():
+        yield b''.join(dumps(dict(row._mapping)) for row in rows)
+
+
+def _csv(result):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(result.keys())
+    for rows in result.partitions():
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_export(kind, fmt, **filters):
+    """A streaming response with every matching row of export ``kind``."""
+    query = export_query(kind, **filters).execution_options(yield_per=BATCH_SIZE)
+
+    def generate():
+        if db.session.get_bind(clause=query).dialect.name == 'postgresql':
+            for name, value in EXPORT_POSTGRES_SETTINGS.items():
+                db.session.execute(text(f"SET LOCAL {name} = '{value}'"))
+        result = db.session.execute(query)
+        try:
+            yield from (_csv if fmt == 'csv' else _ndjson)(result)
+        finally:
+            result.close()
+
+    response = Response(stream_with_context(generate()), mimetype=FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={kind}.{fmt}'
+    return response
@@ -0,0 +1,30 @@
+# Loaded by gunicorn from the working directory, on top of the command line
+# options in render.yaml.
+import os
+import shutil
+import tempfile
+
+# Each worker writes its Prometheus samples here; /api/admin/metrics merges
+# them. Set before the workers import the app.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'healthhub-metrics'))
+
+
+def on_starting(server):
+    # Samples left over from a previous run would be counted again.
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    # engine_profiles sizes each worker's connection pool from these.
+    os.environ['GUNICORN_WORKERS'] = str(server.cfg.workers)
+    os.environ['GUNICORN_THREADS'] = str(server.cfg.threads)
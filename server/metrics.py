@@ -0,0 +1,101 @@
+import logging
+import os
+import time
+
+from flask import g, request
+
+from query_stats import QueryRecorder, start_recording, stop_recording
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+    )
+except ImportError:  # optional: metrics are switched off without it
+    REGISTRY = None
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics for every flask_restful resource, labelled by resource
+# (its endpoint name) and HTTP method.
+#
+# Under gunicorn each worker writes its samples to files in
+# PROMETHEUS_MULTIPROC_DIR (set up by gunicorn.conf.py) and the metrics
+# endpoint aggregates them, so a scrape sees all workers whichever one
+# answers it.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_metrics = {}
+
+
+def _define():
+    if not _metrics:
+        labels = ('resource', 'method')
+        _metrics.update(
+            latency=Histogram('healthhub_request_duration_seconds', 'Time spent handling the request',
+                              labels, buckets=LATENCY_BUCKETS),
+            db_time=Histogram('healthhub_request_db_seconds', 'Time spent in SQL statements per request',
+                              labels, buckets=LATENCY_BUCKETS),
+            size=Histogram('healthhub_response_size_bytes', 'Response body size, when known up front',
+                           labels, buckets=SIZE_BUCKETS),
+            requests=Counter('healthhub_requests_total', 'Requests handled',
+                             labels + ('status',)),
+        )
+    return _metrics
+
+
+class Metrics:
+    """Records latency, status, DB time and response size per resource."""
+
+    def __init__(self, app=None, api=None):
+        self.enabled = False
+        self.api = None
+        if app is not None:
+            self.init_app(app, api)
+
+    def init_app(self, app, api):
+        self.enabled = app.config.setdefault('METRICS_ENABLED', REGISTRY is not None)
+        if self.enabled and REGISTRY is None:
+            logger.warning('METRICS_ENABLED is set but prometheus_client is not installed')
+            self.enabled = False
+        self.api = api
+        app.extensions['metrics'] = self
+        app.before_request(self._start)
+        app.after_request(self._record)
+        app.teardown_request(self._stop)
+
+    def _start(self):
+        if self.enabled and request.endpoint in self.api.endpoints:
+            g.metrics_started = time.perf_counter()
+            g.metrics_queries = start_recording(QueryRecorder())
+
+    def _record(self, response):
+        started, recorder = g.get('metrics_started'), g.get('metrics_queries')
+        if recorder is None:
+            return response
+        metrics = _define()
+        labels = (request.endpoint, request.method)
+        metrics['latency'].labels(*labels).observe(time.perf_counter() - started)
+        metrics['db_time'].labels(*labels).observe(recorder.seconds)
+        if response.content_length is not None:
+            metrics['size'].labels(*labels).observe(response.content_length)
+        metrics['requests'].labels(*labels, str(response.status_code)).inc()
+        return response
+
+    def _stop(self, exc):
+        g.pop('metrics_started', None)
+        recorder = g.pop('metrics_queries', None)
+        if recorder is not None:
+            stop_recording(recorder)
+
+    def render(self):
+        """``(body, content type)`` for the current samples of every worker."""
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+metrics = Metrics()
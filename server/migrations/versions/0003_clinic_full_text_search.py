@@ -0,0 +1,68 @@
+"""clinic full text search
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 05:02:44.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+COLUMNS = 'name, specialty, description, street, city'
+NEW = 'new.name, new.specialty, new.description, new.street, new.city'
+OLD = 'old.name, old.specialty, old.description, old.street, old.city'
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute(
+            f"CREATE VIRTUAL TABLE clinics_fts USING fts5({COLUMNS}, "
+            "content='clinics', content_rowid='id', tokenize='porter unicode61')"
+        )
+        op.execute(
+            "CREATE TRIGGER clinics_fts_ai AFTER INSERT ON clinics BEGIN "
+            f"INSERT INTO clinics_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW}); END"
+        )
+        op.execute(
+            "CREATE TRIGGER clinics_fts_ad AFTER DELETE ON clinics BEGIN "
+            f"INSERT INTO clinics_fts(clinics_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD}); END"
+        )
+        op.execute(
+            "CREATE TRIGGER clinics_fts_au AFTER UPDATE ON clinics BEGIN "
+            f"INSERT INTO clinics_fts(clinics_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD}); "
+            f"INSERT INTO clinics_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW}); END"
+        )
+        op.execute("INSERT INTO clinics_fts(clinics_fts) VALUES ('rebuild')")
+
+    elif dialect == 'postgresql':
+        op.execute(
+            "ALTER TABLE clinics ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english'::regconfig, coalesce(specialty, '')), 'B') || "
+            "setweight(to_tsvector('english'::regconfig, coalesce(description, '') || ' ' || "
+            "coalesce(street, '') || ' ' || coalesce(city, '')), 'C')) STORED"
+        )
+        op.execute("CREATE INDEX ix_clinics_search_vector ON clinics USING gin (search_vector)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS clinics_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS clinics_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS clinics_fts_ai")
+        op.execute("DROP TABLE IF EXISTS clinics_fts")
+
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_clinics_search_vector")
+        op.execute("ALTER TABLE clinics DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,71 @@
+"""hot path indexes
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 04:52:32.955690
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+# ClinicService rows that repeat an earlier row's clinic and service. The
+# baseline only checked for these with a SELECT before inserting, so they can
+# exist and would make the unique index below fail.
+SURVIVOR = (
+    "SELECT min(keep.id) FROM clinic_service AS keep "
+    "WHERE keep.clinic_id = clinic_service.clinic_id AND keep.service_id = clinic_service.service_id"
+)
+LATER_DUPLICATES = f"SELECT clinic_service.id FROM clinic_service WHERE clinic_service.id > ({SURVIVOR})"
+# Live bookings that would share a slot with an earlier live booking once
+# their clinic services are merged.
+CLASHING_BOOKINGS = (
+    "SELECT bookings.id FROM bookings JOIN clinic_service ON bookings.clinic_service_id = clinic_service.id "
+    "WHERE bookings.status != 'cancelled' AND EXISTS ("
+    "SELECT 1 FROM bookings AS earlier JOIN clinic_service AS other ON earlier.clinic_service_id = other.id "
+    "WHERE other.clinic_id = clinic_service.clinic_id AND other.service_id = clinic_service.service_id "
+    "AND earlier.clinic_service_id != bookings.clinic_service_id "
+    "AND earlier.appointment_date = bookings.appointment_date "
+    "AND earlier.status != 'cancelled' AND earlier.id < bookings.id)"
+)
+
+
+def upgrade():
+    # Merge each duplicate into the earliest row for its clinic and service:
+    # move its bookings over (cancelling any that would now double-book a
+    # slot, as 0005 does) and delete it. The earliest row's price is kept.
+    duplicates = [row[0] for row in op.get_bind().execute(sa.text(LATER_DUPLICATES))]
+    if duplicates:
+        print(f'Merging {len(duplicates)} duplicate clinic services into the earliest per clinic and service: '
+              f'{", ".join(str(id) for id in duplicates[:50])}{" ..." if len(duplicates) > 50 else ""}')
+        op.execute(f"UPDATE bookings SET status = 'cancelled' WHERE id IN ({CLASHING_BOOKINGS})")
+        op.execute(
+            "UPDATE bookings SET clinic_service_id = ("
+            "SELECT min(keep.id) FROM clinic_service AS keep JOIN clinic_service AS own "
+            "ON keep.clinic_id = own.clinic_id AND keep.service_id = own.service_id "
+            "WHERE own.id = bookings.clinic_service_id"
+            f") WHERE clinic_service_id IN ({LATER_DUPLICATES})"
+        )
+        op.execute(f"DELETE FROM clinic_service WHERE id IN ({LATER_DUPLICATES})")
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_index('ix_bookings_appointment_date', 'bookings', ['appointment_date'], unique=False)
+    op.create_index('ix_bookings_patient_id_appointment_date', 'bookings', ['patient_id', 'appointment_date'], unique=False)
+    op.create_index('ix_bookings_status_appointment_date', 'bookings', ['status', 'appointment_date'], unique=False)
+    op.create_index('uq_clinic_service_clinic_id_service_id', 'clinic_service', ['clinic_id', 'service_id'], unique=True)
+    # ### end Alembic commands ###
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_index('uq_clinic_service_clinic_id_service_id', table_name='clinic_service')
+    op.drop_index('ix_bookings_status_appointment_date', table_name='bookings')
+    op.drop_index('ix_bookings_patient_id_appointment_date', table_name='bookings')
+    op.drop_index('ix_bookings_appointment_date', table_name='bookings')
+    # ### end Alembic commands ###
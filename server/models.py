@@ -1,20 +1,25 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy_serializer import SerializerMixin
 from datetime import datetime
-from flask_bcrypt import generate_password_hash, check_password_hash
 import re
+from sqlalchemy import text
 from sqlalchemy.orm import validates
+from passwords import password_hasher
+from replicas import RoutingSession
+from serializers import compile_view
 
 email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Join Table for Clinics and Insurances
 clinic_insurance = db.Table(
     'clinic_insurance',
     db.Column('clinic_id', db.Integer, db.ForeignKey('clinics.id'), primary_key=True),
     db.Column('insurance_id', db.Integer, db.ForeignKey('insurances.id'), primary_key=True),
-    db.Column('created_at', db.DateTime, default=datetime.now)
+    db.Column('created_at', db.DateTime, default=datetime.now),
+    # The primary key covers lookups by clinic; search filters by insurance.
+    db.Index('ix_clinic_insurance_insurance_id_clinic_id', 'insurance_id', 'clinic_id')
 )
 
 # Association Model for Clinic and Service
@@ -29,6 +34,12 @@ class ClinicService(db.Model, SerializerMixin):
         'service',
     )
 
+    __table_args__ = (
+        db.Index('ix_clinic_service_service_id_price_clinic_id', 'service_id', 'price', 'clinic_id'),
+        # A clinic lists each service once; also serves lookups by clinic_id.
+        db.Index('uq_clinic_service_clinic_id_service_id', 'clinic_id', 'service_id', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     clinic_id = db.Column(db.Integer, db.ForeignKey('clinics.id'), nullable=False)
     service_id = db.Column(db.Integer, db.ForeignKey('services.id'), nullable=False)
@@ -39,14 +50,7 @@ class ClinicService(db.Model, SerializerMixin):
     bookings = db.relationship('Booking', back_populates='clinic_service', cascade='all, delete-orphan')
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'clinic_id': self.clinic_id,
-            'service_id': self.service_id,
-            'price': float(self.price) if self.price else None,
-            'clinic': self.clinic.to_dict() if self.clinic else None,
-            'service': self.service.to_dict() if self.service else None
-        }
+        return compile_view('clinic_service')(self)
 
 class Clinic(db.Model, SerializerMixin):
     __tablename__ = 'clinics'
@@ -54,9 +58,16 @@ class Clinic(db.Model, SerializerMixin):
     serialize_rules = (
         '-insurance_accepted.clinics',
         '-service_associations.clinic',
+        '-opening_hours.clinic',
         '-user.clinic',
     )
 
+    __table_args__ = (
+        db.Index('ix_clinics_city_specialty_name', 'city', 'specialty', 'name'),
+        db.Index('ix_clinics_specialty_name', 'specialty', 'name'),
+        db.Index('ix_clinics_rating_average_rating_count', 'rating_average', 'rating_count'),
+    )
+
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(100), nullable=False)
     specialty = db.Column(db.String(100), nullable=False)
@@ -69,6 +80,16 @@ class Clinic(db.Model, SerializerMixin):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), unique=True)
     user = db.relationship('User', back_populates='clinic')
 
+    # Review aggregates, maintained by ratings.apply_rating_change()
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_average = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    rating_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
     service_associations = db.relationship(
         'ClinicService',
         back_populates='clinic',
@@ -79,6 +100,12 @@ class Clinic(db.Model, SerializerMixin):
         secondary=clinic_insurance,
         back_populates='clinics'
     )
+    opening_hours = db.relationship(
+        'OpeningHours',
+        back_populates='clinic',
+        cascade='all, delete-orphan',
+        order_by='(OpeningHours.weekday, OpeningHours.opens_at)'
+    )
 
     @property
     def services(self):
@@ -107,20 +134,41 @@ class Clinic(db.Model, SerializerMixin):
                 raise ValueError("Invalid email format")
         return address
 
+    def to_dict(self):
+        return compile_view('clinic')(self)
+
+class OpeningHours(db.Model, SerializerMixin):
+    __tablename__ = 'opening_hours'
+
+    serialize_rules = ('-clinic.opening_hours',)
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    clinic_id = db.Column(db.Integer, db.ForeignKey('clinics.id'), nullable=False, index=True)
+    weekday = db.Column(db.Integer, nullable=False)  # Monday is 0
+    opens_at = db.Column(db.Time, nullable=False)
+    closes_at = db.Column(db.Time, nullable=False)
+
+    clinic = db.relationship('Clinic', back_populates='opening_hours')
+
+    @validates('weekday')
+    def validate_weekday(self, key, weekday):
+        if weekday is not None and not (0 <= weekday <= 6):
+            raise ValueError("Weekday must be between 0 (Monday) and 6 (Sunday)")
+        return weekday
+
+    @validates('closes_at')
+    def validate_closes_at(self, key, closes_at):
+        if self.opens_at and closes_at and closes_at <= self.opens_at:
+            raise ValueError("Closing time must be after opening time")
+        return closes_at
+
     def to_dict(self):
         return {
             'id': self.id,
-            'name': self.name,
-            'specialty': self.specialty,
-            'description': self.description,
-            'contact': self.contact,
-            'email': self.email,
-            'street': self.street,
-            'city': self.city,
-            'image_url': self.image_url,
-            'user_id': self.user_id,
-            'services': [s.to_dict() for s in self.services],
-            'insurance_accepted': [i.to_dict() for i in self.insurance_accepted]
+            'clinic_id': self.clinic_id,
+            'weekday': self.weekday,
+            'opens_at': self.opens_at.strftime('%H:%M') if self.opens_at else None,
+            'closes_at': self.closes_at.strftime('%H:%M') if self.closes_at else None
         }
 
 class Service(db.Model, SerializerMixin):
@@ -152,11 +200,7 @@ class Service(db.Model, SerializerMixin):
         return bookings
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'duration': self.duration
-        }
+        return compile_view('service')(self)
 
 class Insurance(db.Model, SerializerMixin):
     __tablename__ = 'insurances'
@@ -173,10 +217,7 @@ class Insurance(db.Model, SerializerMixin):
     )
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name
-        }
+        return compile_view('insurance')(self)
 
 class Patient(db.Model, SerializerMixin):
     __tablename__ = 'patients'
@@ -211,18 +252,16 @@ class Patient(db.Model, SerializerMixin):
         return address
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'contact': self.contact,
-            'email': self.email,
-            'date_joined': self.date_joined.isoformat() if self.date_joined else None,
-            'user_id': self.user_id
-        }
+        return compile_view('patient')(self)
 
 class Review(db.Model, SerializerMixin):
     __tablename__ = 'reviews'
 
+    # The analytics backfill reads reviews one date range at a time.
+    __table_args__ = (
+        db.Index('ix_reviews_date', 'date'),
+    )
+
     serialize_rules = (
         '-booking.review',
         'booking.clinic_service.clinic',
@@ -252,15 +291,7 @@ class Review(db.Model, SerializerMixin):
         return rating
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'comment': self.comment,
-            'rating': self.rating,
-            'date': self.date.isoformat() if self.date else None,
-            'booking_id': self.booking_id,
-            'clinic': self.clinic.to_dict() if self.clinic else None,
-            'patient': self.patient.to_dict() if self.patient else None
-        }
+        return compile_view('review')(self)
 
 class Booking(db.Model, SerializerMixin):
     __tablename__ = 'bookings'
@@ -274,6 +305,21 @@ class Booking(db.Model, SerializerMixin):
         'patient',
     )
 
+    __table_args__ = (
+        db.Index('ix_bookings_clinic_service_id_appointment_date', 'clinic_service_id', 'appointment_date'),
+        db.Index('ix_bookings_patient_id_appointment_date', 'patient_id', 'appointment_date'),
+        db.Index('ix_bookings_status_appointment_date', 'status', 'appointment_date'),
+        db.Index('ix_bookings_appointment_date', 'appointment_date'),
+        # At most one live booking per slot; cancelled bookings free it up again.
+        db.Index(
+            'uq_bookings_clinic_service_id_appointment_date_active',
+            'clinic_service_id', 'appointment_date',
+            unique=True,
+            sqlite_where=text("status != 'cancelled'"),
+            postgresql_where=text("status != 'cancelled'")
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     booking_date = db.Column(db.DateTime, default=datetime.now, nullable=False)
     appointment_date = db.Column(db.DateTime, nullable=False)
@@ -311,19 +357,26 @@ class Booking(db.Model, SerializerMixin):
         return status
 
     def to_dict(self):
+        return compile_view('booking')(self)
+
+    def to_summary_dict(self):
+        # For lists already scoped to one clinic: no nested clinic objects.
         return {
             'id': self.id,
-            'booking_date': self.booking_date.isoformat() if self.booking_date else None,
-            'appointment_date': self.appointment_date.isoformat() if self.appointment_date else None,
+            'booking_date': self.booking_date,
+            'appointment_date': self.appointment_date,
             'status': self.status,
             'notes': self.notes,
             'patient_id': self.patient_id,
             'clinic_service_id': self.clinic_service_id,
+            'price': self.clinic_service.price if self.clinic_service else None,
             'patient': self.patient.to_dict() if self.patient else None,
-            'clinic_service': self.clinic_service.to_dict() if self.clinic_service else None,
-            'clinic': self.clinic.to_dict() if self.clinic else None,
             'service': self.service.to_dict() if self.service else None,
-            'review': self.review.to_dict() if self.review else None
+            'review': {
+                'id': self.review.id,
+                'rating': self.review.rating,
+                'comment': self.review.comment
+            } if self.review else None
         }
 
 class User(db.Model, SerializerMixin):
@@ -341,10 +394,10 @@ class User(db.Model, SerializerMixin):
     clinic = db.relationship('Clinic', back_populates='user', uselist=False)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password).decode('utf-8')
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
 
     @validates('role')
     def validate_role(self, key, role):
@@ -358,5 +411,43 @@ class User(db.Model, SerializerMixin):
             'id': self.id,
             'username': self.username,
             'role': self.role,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
+
+class TableVersion(db.Model):
+    __tablename__ = 'table_versions'
+
+    # One row per cached table, bumped on every write (see versioning.py)
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+# Daily aggregates for the admin analytics (see rollups.py). Rows with
+# clinic_id 0 hold the totals over all clinics, so charts across the whole
+# platform read one row per day, service and status.
+class DailyBookingStat(db.Model):
+    __tablename__ = 'daily_booking_stats'
+
+    # Bookings by appointment day; revenue at ClinicService.price
+    clinic_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    service_id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    bookings = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0, server_default='0')
+
+class DailyReviewStat(db.Model):
+    __tablename__ = 'daily_review_stats'
+
+    # Reviews by the day they were written
+    clinic_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    service_id = db.Column(db.Integer, primary_key=True)
+    reviews = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+class DailyPatientStat(db.Model):
+    __tablename__ = 'daily_patient_stats'
+
+    day = db.Column(db.Date, primary_key=True)
+    new_patients = db.Column(db.Integer, nullable=False, default=0, server_default='0')
@@ -0,0 +1,102 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, size):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise PaginationError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise PaginationError('Invalid cursor')
+    return values
+
+
+def parse_limit(raw, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    if raw is None or raw == '':
+        return default
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise PaginationError('limit must be an integer')
+    if limit < 1:
+        raise PaginationError('limit must be at least 1')
+    return min(limit, maximum)
+
+
+def _coerce(column, value):
+    # Cursor values travel as JSON, so restore the column's Python type
+    # before comparing (otherwise SQLite compares numbers against text).
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except (AttributeError, NotImplementedError):
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type in (Decimal, int, float):
+        return python_type(value)
+    return value
+
+
+def _after(ordering, values):
+    # Expands (a, b, c) > (x, y, z) into an OR chain so that every column
+    # can carry its own direction while staying index friendly.
+    clauses = []
+    for i, ((column, direction), value) in enumerate(zip(ordering, values)):
+        step = column < value if direction == 'desc' else column > value
+        ties = [col == val for (col, _), val in zip(ordering[:i], values[:i])]
+        clauses.append(and_(*ties, step))
+    return or_(*clauses)
+
+
+def keyset_page(query, ordering, limit, after=None, key=None):
+    """Return one page of ``query`` ordered by ``ordering`` plus the next cursor.
+
+    ``ordering`` is a sequence of ``(column, 'asc' | 'desc')`` pairs whose last
+    entry must be unique (usually the primary key) so the order is stable.
+    ``key`` extracts the cursor values from a result row and defaults to
+    reading the ordering columns as attributes.
+    """
+    if after:
+        values = decode_cursor(after, len(ordering))
+        try:
+            values = [_coerce(column, value) for (column, _), value in zip(ordering, values)]
+        except (TypeError, ValueError, ArithmeticError):
+            raise PaginationError('Invalid cursor')
+        query = query.filter(_after(ordering, values))
+
+    query = query.order_by(*[
+        column.desc() if direction == 'desc' else column.asc()
+        for column, direction in ordering
+    ])
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if key is None:
+            values = [getattr(last, column.key) for column, _ in ordering]
+        else:
+            values = list(key(last))
+        next_cursor = encode_cursor(values)
+    return rows, next_cursor
@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask_bcrypt import check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full; callers should answer 503."""
+
+
+class PasswordHasher:
+    """Runs bcrypt on a small per-process thread pool.
+
+    bcrypt releases the GIL, so without a cap a burst of logins keeps every
+    core busy hashing and cheap requests queue behind it. At most
+    ``PASSWORD_HASH_WORKERS`` hashes run at once per process; up to
+    ``PASSWORD_HASH_QUEUE`` more wait their turn, and beyond that requests
+    are turned away with HashingBusy instead of piling up.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._pending = 0
+        self._active = 0
+        self.stats = {'completed': 0, 'rejected': 0, 'rehashed': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0}
+        self.rounds = 12
+        self.workers = 2
+        self.queue_size = 64
+        self.timeout = 30
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.rounds = app.config.setdefault('BCRYPT_LOG_ROUNDS', int(os.environ.get('BCRYPT_LOG_ROUNDS', 12)))
+        self.workers = app.config.setdefault('PASSWORD_HASH_WORKERS', int(os.environ.get('PASSWORD_HASH_WORKERS', 2)))
+        self.queue_size = app.config.setdefault('PASSWORD_HASH_QUEUE', int(os.environ.get('PASSWORD_HASH_QUEUE', 64)))
+        self.timeout = app.config.setdefault('PASSWORD_HASH_TIMEOUT', 30)
+        app.extensions['password_hasher'] = self
+
+    def _pool(self):
+        # Created lazily per process so gunicorn workers forked from a
+        # preloaded app each get their own threads.
+        pid = os.getpid()
+        if self._executor_pid != pid:
+            with self._lock:
+                if self._executor_pid != pid:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hash')
+                    self._executor_pid = pid
+                    self._pending = self._active = 0
+        return self._executor
+
+    def _run(self, function, args, submitted_at):
+        waited = time.monotonic() - submitted_at
+        with self._lock:
+            self._active += 1
+            self.stats['wait_seconds'] += waited
+            self.stats['max_wait_seconds'] = max(self.stats['max_wait_seconds'], waited)
+        try:
+            return function(*args)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self.stats['completed'] += 1
+
+    def _submit(self, function, *args):
+        pool = self._pool()
+        with self._lock:
+            if self._pending >= self.workers + self.queue_size:
+                self.stats['rejected'] += 1
+                raise HashingBusy('Too many password checks in progress, try again shortly')
+            self._pending += 1
+        try:
+            return pool.submit(self._run, function, args, time.monotonic()).result(self.timeout)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def hash(self, password):
+        return self._submit(generate_password_hash, password, self.rounds).decode('utf-8')
+
+    def rehash(self, password):
+        """hash() for upgrading an existing user's hash; counted in the stats."""
+        password_hash = self.hash(password)
+        with self._lock:
+            self.stats['rehashed'] += 1
+        return password_hash
+
+    def verify(self, password_hash, password):
+        return self._submit(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when ``password_hash`` was made with a different cost than configured."""
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return True
+
+    def snapshot(self):
+        with self._lock:
+            completed = self.stats['completed']
+            return {
+                'rounds': self.rounds,
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'active': self._active,
+                'queued': self._pending - self._active,
+                'completed': completed,
+                'rejected': self.stats['rejected'],
+                'rehashed': self.stats['rehashed'],
+                'avg_wait_ms': round(self.stats['wait_seconds'] / completed * 1000, 2) if completed else 0.0,
+                'max_wait_ms': round(self.stats['max_wait_seconds'] * 1000, 2),
+            }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Counts the SQL statements a request (or any block of code) issues and the
+# time spent in them, from SQLAlchemy cursor events on every engine.
+#
+# With QUERY_STATS on, each response carries ``X-Query-Count`` and a
+# ``Server-Timing: db;dur=...`` entry. assert_max_queries() pins a block to
+# a statement budget, for tests and benchmarks/query_budgets.py.
+
+_local = threading.local()
+
+
+class QueryRecorder:
+    """Statements seen on this thread while the recorder is active."""
+
+    def __init__(self, keep_statements=False):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = [] if keep_statements else None
+
+
+def _active():
+    return getattr(_local, 'recorders', None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active():
+        conn.info['query_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    recorders = _active()
+    started = conn.info.pop('query_started', None)
+    if not recorders or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    for recorder in recorders:
+        recorder.count += 1
+        recorder.seconds += elapsed
+        if recorder.statements is not None:
+            recorder.statements.append(statement)
+
+
+def _install():
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def start_recording(recorder):
+    _install()
+    _local.__dict__.setdefault('recorders', []).append(recorder)
+    return recorder
+
+
+def stop_recording(recorder):
+    recorders = _active()
+    if recorders and recorder in recorders:
+        recorders.remove(recorder)
+
+
+@contextmanager
+def record_queries(keep_statements=False):
+    """Yield a QueryRecorder counting the statements run on this thread inside the block."""
+    recorder = start_recording(QueryRecorder(keep_statements))
+    try:
+        yield recorder
+    finally:
+        stop_recording(recorder)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """Fail with AssertionError when the block issues more than ``limit`` statements.
+
+    For pytest::
+
+        with assert_max_queries(3):
+            client.get('/api/clinics')
+    """
+    with record_queries(keep_statements=True) as recorder:
+        yield recorder
+    if recorder.count > limit:
+        statements = '\n'.join(f'  {statement}' for statement in recorder.statements)
+        raise AssertionError(f'{recorder.count} queries issued, budget is {limit}:\n{statements}')
+
+
+class QueryStats:
+    """Adds per-request statement counts and DB time to response headers."""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.setdefault(
+            'QUERY_STATS', os.environ.get('QUERY_STATS', '').lower() in ('1', 'true', 'yes')
+        )
+        app.extensions['query_stats'] = self
+        app.before_request(self._start)
+        app.after_request(self._add_headers)
+        app.teardown_request(self._stop)
+
+    def _start(self):
+        if self.enabled:
+            g.query_recorder = start_recording(QueryRecorder())
+
+    def _add_headers(self, response):
+        recorder = g.get('query_recorder')
+        if recorder is not None:
+            response.headers['X-Query-Count'] = str(recorder.count)
+            response.headers.add('Server-Timing', f'db;dur={recorder.seconds * 1000:.2f};desc="{recorder.count} queries"')
+        return response
+
+    def _stop(self, exc):
+        recorder = g.pop('query_recorder', None)
+        if recorder is not None:
+            stop_recording(recorder)
+
+
+query_stats = QueryStats()
@@ -0,0 +1,84 @@
+from sqlalchemy import case, func, select, update
+
+from models import db, Booking, Clinic, ClinicService, Review
+from versioning import bump_versions
+
+HISTOGRAM = {stars: getattr(Clinic, f'rating_{stars}') for stars in range(1, 6)}
+
+
+def apply_rating_change(clinic_id, old_rating=None, new_rating=None):
+    """Adjust a clinic's review aggregates inside the current transaction.
+
+    Pass only ``new_rating`` for a new review, only ``old_rating`` for a
+    deleted one and both for an edit. The increments are done in SQL so
+    concurrent reviews of the same clinic do not lose updates.
+    """
+    count_delta = (new_rating is not None) - (old_rating is not None)
+    sum_delta = (new_rating or 0) - (old_rating or 0)
+    if not count_delta and not sum_delta:
+        return
+
+    count = Clinic.rating_count + count_delta
+    total = Clinic.rating_sum + sum_delta
+    values = {
+        'rating_count': count,
+        'rating_sum': total,
+        'rating_average': case((count > 0, total * 1.0 / count), else_=0),
+    }
+
+    histogram = {}
+    if old_rating is not None:
+        histogram[old_rating] = histogram.get(old_rating, 0) - 1
+    if new_rating is not None:
+        histogram[new_rating] = histogram.get(new_rating, 0) + 1
+    for stars, delta in histogram.items():
+        if delta:
+            values[f'rating_{stars}'] = HISTOGRAM[stars] + delta
+
+    db.session.execute(
+        update(Clinic).where(Clinic.id == clinic_id).values(**values),
+        execution_options={'synchronize_session': False}
+    )
+    bump_versions('clinics')
+
+
+def rebuild_ratings(clinic_ids=None):
+    """Recompute review aggregates from the reviews table.
+
+    Used for backfills and to repair drift (for example after bookings are
+    removed in bulk). Rebuilds every clinic when ``clinic_ids`` is None.
+    Returns the number of clinics that have reviews.
+    """
+    stats = select(
+        ClinicService.clinic_id,
+        func.count(Review.id),
+        func.sum(Review.rating),
+        *[func.sum(case((Review.rating == stars, 1), else_=0)) for stars in HISTOGRAM]
+    ).select_from(Review).join(Booking, Review.booking_id == Booking.id).join(
+        ClinicService, Booking.clinic_service_id == ClinicService.id
+    ).group_by(ClinicService.clinic_id)
+
+    reset = update(Clinic).values(
+        rating_count=0, rating_sum=0, rating_average=0,
+        **{f'rating_{stars}': 0 for stars in HISTOGRAM}
+    )
+    if clinic_ids is not None:
+        stats = stats.where(ClinicService.clinic_id.in_(clinic_ids))
+        reset = reset.where(Clinic.id.in_(clinic_ids))
+
+    rows = [
+        {
+            'id': clinic_id,
+            'rating_count': count,
+            'rating_sum': total,
+            'rating_average': total / count,
+            **{f'rating_{stars}': histogram[stars - 1] for stars in HISTOGRAM},
+        }
+        for clinic_id, count, total, *histogram in db.session.execute(stats)
+    ]
+
+    db.session.execute(reset, execution_options={'synchronize_session': False})
+    if rows:
+        db.session.execute(update(Clinic), rows)
+    bump_versions('clinics')
+    return len(rows)
@@ -0,0 +1,109 @@
+import os
+import random
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+# Sends the reads of GET requests to read replicas.
+#
+# Replicas are listed in SQLALCHEMY_REPLICA_URIS (or DATABASE_REPLICA_URLS,
+# comma separated) and registered as the binds replica_0, replica_1, ...
+# Everything else uses the primary: writes, reads in POST/PUT/PATCH/DELETE
+# handlers, reads after the request has written, and everything outside a
+# request (CLI commands, the cache listener).
+#
+# Replicas lag behind the primary, so a client that has just written is
+# pinned to the primary for REPLICA_STICKY_SECONDS with a cookie: a patient
+# who creates a booking sees it in the booking list that loads next.
+READ_METHODS = frozenset({'GET', 'HEAD'})
+
+
+def replica_uris(app):
+    uris = app.config.get('SQLALCHEMY_REPLICA_URIS')
+    if uris is None:
+        uris = [uri.strip() for uri in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if uri.strip()]
+    return list(uris)
+
+
+class RoutingSession(Session):
+    """db.session class that picks a replica bind for GET request reads."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            replica = replica_router.bind_for(self, mapper, clause)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    """Registers the replica binds and the read-after-write cookie.
+
+    Call init_app before db.init_app.
+    """
+
+    def __init__(self, app=None):
+        self.bind_keys = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        uris = replica_uris(app)
+        self.bind_keys = [f'replica_{number}' for number in range(len(uris))]
+        binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+        for key, uri in zip(self.bind_keys, uris):
+            binds.setdefault(key, uri)
+        self.sticky_seconds = app.config.setdefault('REPLICA_STICKY_SECONDS', 5)
+        self.cookie_name = app.config.setdefault('REPLICA_STICKY_COOKIE', 'read_primary_until')
+        app.extensions['replica_router'] = self
+        app.after_request(self._pin_writer)
+        app.teardown_request(self._forget)
+
+    def bind_for(self, session, mapper, clause):
+        """The replica engine for this statement, or None for the primary."""
+        if not self.bind_keys or not has_request_context():
+            return None
+        if self._writes(session, mapper, clause):
+            g.db_wrote = True
+            return None
+        if request.method not in READ_METHODS or g.get('db_wrote') or self._pinned():
+            return None
+        # One replica per request, so its reads see a single snapshot.
+        if 'db_replica' not in g:
+            g.db_replica = random.choice(self.bind_keys)
+        return session._db.engines[g.db_replica]
+
+    def _writes(self, session, mapper, clause):
+        if session._flushing or getattr(clause, 'is_dml', False):
+            return True
+        if getattr(clause, '_for_update_arg', None) is not None:
+            return True
+        # session.connection() with no statement, as bump_versions and the
+        # bulk loaders use before writing through the connection.
+        return mapper is None and clause is None and request.method not in READ_METHODS
+
+    def _pinned(self):
+        until = request.cookies.get(self.cookie_name)
+        try:
+            return until is not None and float(until) > time.time()
+        except ValueError:
+            return False
+
+    def _pin_writer(self, response):
+        if g.get('db_wrote') and response.status_code < 400 and self.sticky_seconds:
+            config = current_app.config
+            response.set_cookie(
+                self.cookie_name, str(int(time.time() + self.sticky_seconds)),
+                max_age=self.sticky_seconds, httponly=True,
+                secure=config.get('JWT_COOKIE_SECURE', False),
+                samesite=config.get('JWT_COOKIE_SAMESITE'),
+            )
+        return response
+
+    def _forget(self, exc):
+        g.pop('db_wrote', None)
+        g.pop('db_replica', None)
+
+
+replica_router = ReplicaRouter()
@@ -0,0 +1,314 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import db, Booking, ClinicService, DailyBookingStat, DailyPatientStat, DailyReviewStat, Patient, Review
+
+# Daily analytics rollups, kept up to date from the booking, review and
+# patient writes in the same transaction, like the clinic rating aggregates.
+# Every change to a clinic's row is applied to the ALL_CLINICS row as well.
+#
+# Revenue uses the current ClinicService.price when the booking is written;
+# rebuild_rollups() re-prices from the prices at the time it runs.
+ALL_CLINICS = 0
+BOOKING_KEYS = ('clinic_id', 'day', 'service_id', 'status')
+REVIEW_KEYS = ('clinic_id', 'day', 'service_id')
+INTERVALS = ('day', 'week', 'month')
+REVENUE_STATUSES = ('pending', 'confirmed', 'completed')
+
+
+def _booking_key(appointment_date, clinic_id, service_id, status, price):
+    return appointment_date.date(), clinic_id, service_id, status, price
+
+
+def booking_key(booking, clinic_service=None):
+    """``(day, clinic_id, service_id, status, price)`` for apply_booking_changes."""
+    clinic_service = clinic_service or booking.clinic_service
+    return _booking_key(
+        booking.appointment_date, clinic_service.clinic_id, clinic_service.service_id,
+        booking.status, clinic_service.price,
+    )
+
+
+def booking_key_from_row(row, status=None):
+    """booking_key() for a selected row, with ``status`` in place of the row's own if given.
+
+    ``row`` needs appointment_date, clinic_id, service_id, status and price
+    columns; for bulk updates that never load the Booking.
+    """
+    return _booking_key(row.appointment_date, row.clinic_id, row.service_id, status or row.status, row.price)
+
+
+def review_key(review, booking=None):
+    """``(day, clinic_id, service_id)`` for apply_review_change."""
+    clinic_service = (booking or review.booking).clinic_service
+    return (review.date or datetime.now()).date(), clinic_service.clinic_id, clinic_service.service_id
+
+
+def _increment(table, keys, deltas):
+    """Add ``deltas`` ({key tuple: {column: delta}}) to rollup rows, creating missing ones."""
+    rows = [dict(zip(keys, key), **values) for key, values in sorted(deltas.items()) if any(values.values())]
+    if not rows:
+        return
+    insert_ = postgresql_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+    statement = insert_(table)
+    # Rows are sorted so concurrent transactions lock them in the same order.
+    statement = statement.on_conflict_do_update(
+        index_elements=keys,
+        set_={column: table.c[column] + statement.excluded[column] for column in rows[0] if column not in keys},
+    )
+    db.session.execute(statement, rows)
+
+
+def apply_booking_changes(changes):
+    """Move bookings between rollup rows inside the current transaction.
+
+    ``changes`` are ``(old, new)`` pairs of booking_key() values: only ``new``
+    for a new booking, only ``old`` for a deleted one.
+    """
+    deltas = defaultdict(lambda: {'bookings': 0, 'revenue': 0})
+    for old, new in changes:
+        if old == new:
+            continue
+        for key, sign in ((old, -1), (new, 1)):
+            if key is None:
+                continue
+            day, clinic_id, service_id, status, price = key
+            for clinic in (clinic_id, ALL_CLINICS):
+                row = deltas[(clinic, day, service_id, status)]
+                row['bookings'] += sign
+                row['revenue'] += sign * (price or 0)
+    _increment(DailyBookingStat.__table__, BOOKING_KEYS, deltas)
+
+
+def apply_booking_change(old=None, new=None):
+    apply_booking_changes([(old, new)])
+
+
+def apply_review_change(key, old_rating=None, new_rating=None):
+    """Adjust the review rollups for one review; arguments as in apply_rating_change."""
+    count_delta = (new_rating is not None) - (old_rating is not None)
+    sum_delta = (new_rating or 0) - (old_rating or 0)
+    day, clinic_id, service_id = key
+    _increment(DailyReviewStat.__table__, REVIEW_KEYS, {
+        (clinic, day, service_id): {'reviews': count_delta, 'rating_sum': sum_delta}
+        for clinic in (clinic_id, ALL_CLINICS)
+    })
+
+
+def apply_new_patients(day, count=1):
+    """Count ``count`` patients joining on ``day``; negative when they are removed."""
+    _increment(DailyPatientStat.__table__, ('day',), {(day,): {'new_patients': count}})
+
+
+def _window(column, start, end):
+    conditions = []
+    if start is not None:
+        conditions.append(column >= start)
+    if end is not None:
+        conditions.append(column < end)
+    return conditions
+
+
+def _moved_into_totals(table, keys, values, conditions, sign):
+    """Add (or take away) the clinic rows matching ``conditions`` to the ALL_CLINICS rows."""
+    group = [table.c[key] for key in keys if key != 'clinic_id']
+    rows = db.session.execute(
+        select(*group, *[func.sum(table.c[value]) for value in values]).where(*conditions).group_by(*group)
+    )
+    deltas = {}
+    for row in rows:
+        deltas[(ALL_CLINICS, *row[:len(group)])] = {
+            value: sign * (total or 0) for value, total in zip(values, row[len(group):])
+        }
+    _increment(table, keys, deltas)
+
+
+def _rebuild(table, keys, values, source, start, end, clinic_ids):
+    """Replace the rollup rows for a window with ``source`` (an aggregate SELECT).
+
+    With ``clinic_ids`` only those clinics' rows are rebuilt and the
+    ALL_CLINICS rows are adjusted by the difference.
+    """
+    window = _window(table.c.day, start, end)
+    columns = list(keys) + list(values)
+    if clinic_ids is None:
+        db.session.execute(delete(table).where(*window))
+        db.session.execute(insert(table).from_select(columns, source))
+        group = [table.c[key] for key in keys if key != 'clinic_id']
+        db.session.execute(insert(table).from_select(columns, select(
+            literal(ALL_CLINICS), *group, *[func.sum(table.c[value]) for value in values]
+        ).where(table.c.clinic_id != ALL_CLINICS, *window).group_by(*group)))
+        return
+
+    own = [table.c.clinic_id.in_(clinic_ids), *window]
+    _moved_into_totals(table, keys, values, own, -1)
+    db.session.execute(delete(table).where(*own))
+    db.session.execute(insert(table).from_select(columns, source))
+    _moved_into_totals(table, keys, values, own, 1)
+
+
+def rebuild_rollups(start=None, end=None, clinic_ids=None):
+    """Recompute the rollups for the days in ``[start, end)`` from the source tables.
+
+    Used for the backfill and to repair drift. ``None`` bounds are open;
+    with ``clinic_ids`` only those clinics are rebuilt (patient counts are
+    not per clinic and are left alone).
+    """
+    # The statements below are Core statements, which do not autoflush.
+    db.session.flush()
+    day = func.date(Booking.appointment_date)
+    bookings = select(
+        ClinicService.clinic_id, day, ClinicService.service_id, Booking.status,
+        func.count(Booking.id), func.sum(ClinicService.price),
+    ).join(ClinicService, Booking.clinic_service_id == ClinicService.id).where(
+        *_window(Booking.appointment_date, _midnight(start), _midnight(end))
+    ).group_by(ClinicService.clinic_id, day, ClinicService.service_id, Booking.status)
+
+    day = func.date(Review.date)
+    reviews = select(
+        ClinicService.clinic_id, day, ClinicService.service_id, func.count(Review.id), func.sum(Review.rating),
+    ).select_from(Review).join(Booking, Review.booking_id == Booking.id).join(
+        ClinicService, Booking.clinic_service_id == ClinicService.id
+    ).where(*_window(Review.date, _midnight(start), _midnight(end))).group_by(
+        ClinicService.clinic_id, day, ClinicService.service_id
+    )
+
+    if clinic_ids is not None:
+        clinic_ids = list(clinic_ids)
+        bookings = bookings.where(ClinicService.clinic_id.in_(clinic_ids))
+        reviews = reviews.where(ClinicService.clinic_id.in_(clinic_ids))
+
+    _rebuild(DailyBookingStat.__table__, BOOKING_KEYS, ('bookings', 'revenue'), bookings, start, end, clinic_ids)
+    _rebuild(DailyReviewStat.__table__, REVIEW_KEYS, ('reviews', 'rating_sum'), reviews, start, end, clinic_ids)
+
+    if clinic_ids is None:
+        table = DailyPatientStat.__table__
+        day = func.date(Patient.date_joined)
+        db.session.execute(delete(table).where(*_window(table.c.day, start, end)))
+        db.session.execute(insert(table).from_select(['day', 'new_patients'], select(day, func.count(Patient.id)).where(
+            Patient.date_joined.is_not(None), *_window(Patient.date_joined, _midnight(start), _midnight(end))
+        ).group_by(day)))
+
+
+def _midnight(day):
+    return datetime.combine(day, datetime.min.time()) if day is not None else None
+
+
+def source_date_range():
+    """The first and last day that has a booking, review or new patient, or None."""
+    bounds = db.session.execute(select(
+        func.min(Booking.appointment_date), func.max(Booking.appointment_date),
+    )).one()
+    others = [
+        db.session.execute(select(func.min(column), func.max(column))).one()
+        for column in (Review.date, Patient.date_joined)
+    ]
+    firsts = [row[0] for row in [bounds, *others] if row[0] is not None]
+    lasts = [row[1] for row in [bounds, *others] if row[1] is not None]
+    if not firsts:
+        return None
+    return min(firsts).date(), max(lasts).date()
+
+
+def period_start(day, interval):
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def periods(start, end, interval):
+    """Start days of the periods covering ``[start, end]``."""
+    current = period_start(start, interval)
+    while current <= end:
+        yield current
+        if interval == 'month':
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            current += timedelta(days=7 if interval == 'week' else 1)
+
+
+def period_count(start, end, interval):
+    """How many periods periods() yields for ``[start, end]``, without walking them."""
+    first = period_start(start, interval)
+    if first > end:
+        return 0
+    if interval == 'month':
+        return (end.year - first.year) * 12 + end.month - first.month + 1
+    return (end - first).days // (7 if interval == 'week' else 1) + 1
+
+
+def time_series(start, end, interval='day', clinic_id=None, service_id=None):
+    """Per-period analytics for the days ``start`` to ``end`` inclusive, from the rollups only.
+
+    New patients are not per clinic or service and are None when filtered.
+    """
+    series = {
+        period: {
+            'period': period.isoformat(),
+            'bookings': {status: 0 for status in ('pending', 'confirmed', 'cancelled', 'completed')},
+            'total_bookings': 0,
+            'revenue': 0.0,
+            'reviews': 0,
+            'rating_sum': 0,
+            'new_patients': None if clinic_id or service_id else 0,
+        }
+        for period in periods(start, end, interval)
+    }
+    end = end + timedelta(days=1)
+
+    table = DailyBookingStat.__table__
+    conditions = [table.c.clinic_id == (clinic_id or ALL_CLINICS), *_window(table.c.day, start, end)]
+    if service_id:
+        conditions.append(table.c.service_id == service_id)
+    rows = db.session.execute(
+        select(table.c.day, table.c.status, func.sum(table.c.bookings), func.sum(table.c.revenue))
+        .where(*conditions).group_by(table.c.day, table.c.status)
+    )
+    for day, status, count, revenue in rows:
+        entry = series[period_start(day, interval)]
+        entry['bookings'][status] = entry['bookings'].get(status, 0) + count
+        entry['total_bookings'] += count
+        if status in REVENUE_STATUSES:
+            entry['revenue'] += float(revenue or 0)
+
+    table = DailyReviewStat.__table__
+    conditions = [table.c.clinic_id == (clinic_id or ALL_CLINICS), *_window(table.c.day, start, end)]
+    if service_id:
+        conditions.append(table.c.service_id == service_id)
+    rows = db.session.execute(
+        select(table.c.day, func.sum(table.c.reviews), func.sum(table.c.rating_sum))
+        .where(*conditions).group_by(table.c.day)
+    )
+    for day, count, total in rows:
+        entry = series[period_start(day, interval)]
+        entry['reviews'] += count
+        entry['rating_sum'] += total
+
+    if not (clinic_id or service_id):
+        table = DailyPatientStat.__table__
+        rows = db.session.execute(select(table.c.day, table.c.new_patients).where(*_window(table.c.day, start, end)))
+        for day, count in rows:
+            series[period_start(day, interval)]['new_patients'] += count
+
+    result = []
+    for entry in series.values():
+        reviews, rating_sum = entry['reviews'], entry.pop('rating_sum')
+        entry['average_rating'] = round(rating_sum / reviews, 2) if reviews else None
+        entry['revenue'] = round(entry['revenue'], 2)
+        result.append(entry)
+    return result
+
+
+def totals():
+    """All-time booking and new patient counts, from the rollups."""
+    bookings = db.session.execute(
+        select(func.sum(DailyBookingStat.bookings)).where(DailyBookingStat.clinic_id == ALL_CLINICS)
+    ).scalar()
+    patients = db.session.execute(select(func.sum(DailyPatientStat.new_patients))).scalar()
+    return {'bookings': bookings or 0, 'patients': patients or 0}
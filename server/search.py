@@ -0,0 +1,90 @@
+import re
+
+from sqlalchemy import column, event, func, literal, literal_column, or_, select, table
+
+from models import db, Clinic
+
+# Full-text index over clinics. The index is maintained by the database
+# itself (FTS5 triggers on SQLite, a generated tsvector column on Postgres),
+# so every write path that touches a clinic keeps it in sync.
+FTS_TABLE = 'clinics_fts'
+FTS_COLUMNS = ('name', 'specialty', 'description', 'street', 'city')
+
+_columns = ', '.join(FTS_COLUMNS)
+_new_values = ', '.join(f'new.{c}' for c in FTS_COLUMNS)
+_old_values = ', '.join(f'old.{c}' for c in FTS_COLUMNS)
+
+SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{_columns}, content='clinics', content_rowid='id', tokenize='porter unicode61')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON clinics BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON clinics BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_columns} ON clinics BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+POSTGRES_DDL = [
+    "ALTER TABLE clinics ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(specialty, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(description, '') || ' ' || "
+    "coalesce(street, '') || ' ' || coalesce(city, '')), 'C')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_clinics_search_vector ON clinics USING gin (search_vector)",
+]
+
+
+@event.listens_for(Clinic.__table__, 'after_create')
+def create_search_index(target, connection, **kw):
+    statements = {'sqlite': SQLITE_DDL, 'postgresql': POSTGRES_DDL}.get(connection.dialect.name, [])
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Clinic.__table__, 'before_drop')
+def drop_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def tokenize(text):
+    return re.findall(r'\w+', text or '', re.UNICODE)
+
+
+def ranked_matches(text):
+    """Return a subquery of ``(clinic_id, rank)`` for clinics matching ``text``.
+
+    Every term must match. Lower ranks are better on every backend so callers
+    can order ascending.
+    """
+    terms = tokenize(text)
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        fts = table(FTS_TABLE, column('rowid'), column('rank'))
+        match = ' '.join(f'"{term}"' for term in terms)
+        return (
+            select(fts.c.rowid.label('clinic_id'), fts.c.rank.label('rank'))
+            .where(literal_column(FTS_TABLE).op('MATCH')(match))
+            .subquery()
+        )
+
+    if dialect == 'postgresql':
+        vector = literal_column('clinics.search_vector')
+        tsquery = func.plainto_tsquery(literal('english'), ' '.join(terms))
+        return (
+            select(Clinic.id.label('clinic_id'), (-func.ts_rank_cd(vector, tsquery)).label('rank'))
+            .where(vector.op('@@')(tsquery))
+            .subquery()
+        )
+
+    # Unindexed fallback for other backends: substring match on every term.
+    fields = [getattr(Clinic, c) for c in FTS_COLUMNS]
+    return (
+        select(Clinic.id.label('clinic_id'), literal(0.0).label('rank'))
+        .where(*[or_(*[f.ilike(f'%{term}%') for f in fields]) for term in terms])
+        .subquery()
+    )
@@ -0,0 +1,210 @@
+from functools import lru_cache
+
+# Flat, precompiled serializers for the API models.
+#
+# Each view lists a model's scalar fields and the relations it can expand.
+# compile_view() turns a view plus an optional ``fields``/``include``
+# selection into one generated function that builds the response dict as a
+# single literal (plain attribute reads, no per-key calls for plain columns),
+# instead of recursing through every model's to_dict(). Compiled functions
+# are memoized, and the default views are built at import.
+
+
+class SerializationError(ValueError):
+    pass
+
+
+def _rating_average(clinic):
+    return round(clinic.rating_average, 2) if clinic.rating_count else None
+
+
+def _rating_histogram(clinic):
+    return {str(stars): getattr(clinic, f'rating_{stars}') or 0 for stars in range(1, 6)}
+
+
+def _tree(paths):
+    tree = {}
+    for path in paths:
+        node = tree
+        for part in path.split('.'):
+            if not part:
+                raise SerializationError(f'Invalid field path: {path!r}')
+            node = node.setdefault(part, {})
+    return tree
+
+
+def _freeze(tree):
+    return tuple(sorted((key, _freeze(child)) for key, child in tree.items()))
+
+
+class View:
+    """Fields and relations one model exposes.
+
+    ``fields`` holds column names or ``(key, getter)`` pairs, in output order;
+    a getter is called with the object. ``relations`` maps a key to
+    ``(view name, many)`` or ``(view name, many, path)``, where ``path`` is the
+    dotted chain of mapped relationships behind a model property (for a
+    collection, the first hop is the collection). ``include`` lists the
+    relation paths expanded when the caller does not choose.
+    """
+
+    def __init__(self, fields, relations=None, include=()):
+        self.fields = {}
+        for field in fields:
+            key, getter = field if isinstance(field, tuple) else (field, None)
+            self.fields[key] = getter
+        self.relations = {}
+        for key, spec in (relations or {}).items():
+            target, many, path = spec if len(spec) == 3 else spec + (key,)
+            self.relations[key] = (target, many, path.split('.'))
+        self.include = _freeze(_tree(include))
+
+
+VIEWS = {
+    'service': View(('id', 'name', 'duration')),
+    'insurance': View(('id', 'name')),
+    'patient': View(('id', 'name', 'contact', 'email', 'date_joined', 'user_id')),
+    'clinic': View(
+        (
+            'id', 'name', 'specialty', 'description', 'contact', 'email', 'street', 'city',
+            'image_url', 'user_id',
+            ('rating_count', lambda clinic: clinic.rating_count or 0),
+            ('rating_average', _rating_average),
+            ('rating_histogram', _rating_histogram),
+        ),
+        relations={
+            'services': ('service', True, 'service_associations.service'),
+            'insurance_accepted': ('insurance', True),
+        },
+        include=('services', 'insurance_accepted')
+    ),
+    'clinic_service': View(
+        ('id', 'clinic_id', 'service_id', 'price'),
+        relations={'clinic': ('clinic', False), 'service': ('service', False)},
+        include=('clinic', 'service')
+    ),
+    'review': View(
+        ('id', 'comment', 'rating', 'date', 'booking_id'),
+        relations={
+            'clinic': ('clinic', False, 'booking.clinic_service.clinic'),
+            'patient': ('patient', False, 'booking.patient'),
+            'booking': ('booking', False),
+        },
+        include=('clinic', 'patient')
+    ),
+    'booking': View(
+        (
+            'id', 'booking_date', 'appointment_date', 'status', 'notes', 'patient_id', 'clinic_service_id',
+        ),
+        relations={
+            'patient': ('patient', False),
+            'clinic_service': ('clinic_service', False),
+            'clinic': ('clinic', False, 'clinic_service.clinic'),
+            'service': ('service', False, 'clinic_service.service'),
+            'review': ('review', False),
+        },
+        # The clinic and service are expanded once at the top level rather
+        # than again inside clinic_service.
+        include=('patient', 'clinic_service', 'clinic', 'service', 'review')
+    ),
+}
+
+
+def _split(raw):
+    if raw is None:
+        return None
+    if isinstance(raw, str):
+        raw = raw.split(',')
+    return [path.strip() for path in raw if path.strip()]
+
+
+@lru_cache(maxsize=256)
+def compile_view(name, fields=(), include=None):
+    """Build the serializer for view ``name``.
+
+    ``fields`` and ``include`` are frozen path trees (see _freeze). At each
+    level, naming scalar fields keeps only those; naming a relation in either
+    tree expands it. ``include=None`` means the view's default relations.
+    """
+    view = VIEWS[name]
+    fields = dict(fields)
+    include = dict(view.include if include is None else include)
+
+    for key in fields:
+        if key not in view.fields and key not in view.relations:
+            raise SerializationError(f'Unknown field for {name}: {key}')
+    for key in include:
+        if key not in view.relations:
+            raise SerializationError(f'Unknown relation for {name}: {key}')
+
+    # Each key is emitted twice: a fast expression reading loaded state
+    # straight from the instance __dict__, and a fallback through the ORM
+    # attributes for anything expired or not loaded yet.
+    namespace = {}
+    fast, slow = [], []
+    wanted = [key for key in fields if key in view.fields]
+    for key, getter in view.fields.items():
+        if wanted and key not in wanted:
+            continue
+        if getter is None:
+            fast.append(f'{key!r}: d[{key!r}]')
+            slow.append(f'{key!r}: obj.{key}')
+        else:
+            helper = _helper(namespace, getter)
+            fast.append(f'{key!r}: {helper}(obj)')
+            slow.append(f'{key!r}: {helper}(obj)')
+    for key, (target, many, path) in view.relations.items():
+        if key not in include and key not in fields:
+            continue
+        extract = _helper(namespace, compile_view(target, fields.get(key, ()), include.get(key, ())))
+        first, rest = path[0], path[1:]
+        if many:
+            hops_fast = ''.join(f'.__dict__[{hop!r}]' for hop in rest)
+            hops_slow = ''.join(f'.{hop}' for hop in rest)
+            fast.append(f'{key!r}: [{extract}(item{hops_fast}) for item in d[{first!r}]]')
+            slow.append(f'{key!r}: [{extract}(item{hops_slow}) for item in obj.{first}]')
+        else:
+            checks_fast = ''.join(f' or (item := item.__dict__[{hop!r}]) is None' for hop in rest)
+            checks_slow = ''.join(f' or (item := item.{hop}) is None' for hop in rest)
+            fast.append(f'{key!r}: None if (item := d[{first!r}]) is None{checks_fast} else {extract}(item)')
+            slow.append(f'{key!r}: None if (item := obj.{first}) is None{checks_slow} else {extract}(item)')
+
+    source = (
+        'def serialize(obj):\n'
+        '    try:\n'
+        '        d = obj.__dict__\n'
+        f'        return {{{", ".join(fast)}}}\n'
+        '    except KeyError:\n'
+        f'        return {{{", ".join(slow)}}}\n'
+    )
+    exec(compile(source, f'<serializer {name}>', 'exec'), namespace)
+    return namespace['serialize']
+
+
+def _helper(namespace, function):
+    name = f'_{len(namespace)}'
+    namespace[name] = function
+    return name
+
+
+def serializer(name, fields=None, include=None):
+    """Serializer for view ``name`` given comma separated (or listed) dotted paths.
+
+    Raises SerializationError for unknown fields or relations.
+    """
+    fields = _split(fields)
+    include = _split(include)
+    return compile_view(
+        name,
+        _freeze(_tree(fields)) if fields else (),
+        _freeze(_tree(include)) if include is not None else None
+    )
+
+
+def request_serializer(name, args):
+    """Serializer honouring the ``?fields=`` and ``?include=`` query parameters."""
+    return serializer(name, args.get('fields'), args.get('include'))
+
+
+for _name in VIEWS:
+    compile_view(_name)
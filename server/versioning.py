@@ -0,0 +1,122 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, make_response, request
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from models import db, TableVersion
+
+# Tables whose contents back the public catalog endpoints.
+VERSIONED_TABLES = ('clinics', 'clinic_service', 'services', 'insurances', 'clinic_insurance')
+
+# Postgres channel carrying the names of bumped tables, delivered on commit.
+NOTIFY_CHANNEL = 'catalog_changes'
+
+# Callables given ``{name: version}`` whenever versions are read.
+version_observers = []
+
+
+@event.listens_for(TableVersion.__table__, 'after_create')
+def seed_versions(target, connection, **kw):
+    now = datetime.utcnow()
+    connection.execute(insert(target), [
+        {'name': name, 'version': 0, 'updated_at': now} for name in VERSIONED_TABLES
+    ])
+
+
+def bump_versions(*tables, session=None):
+    """Bump the version of ``tables`` in the current transaction.
+
+    The bumped names are kept in ``session.info['bumped_tables']`` until the
+    transaction ends, and announced on ``NOTIFY_CHANNEL`` on Postgres.
+    """
+    tables = sorted(name for name in set(tables) if name in VERSIONED_TABLES)
+    if not tables:
+        return
+    session = session or db.session()
+    connection = session.connection()
+    connection.execute(
+        update(TableVersion.__table__).where(TableVersion.name.in_(tables)).values(
+            version=TableVersion.version + 1, updated_at=datetime.utcnow()
+        )
+    )
+    if connection.dialect.name == 'postgresql':
+        connection.execute(select(func.pg_notify(NOTIFY_CHANNEL, ','.join(tables))))
+    session.info.setdefault('bumped_tables', set()).update(tables)
+
+
+@event.listens_for(Session, 'after_flush')
+def bump_flushed_versions(session, flush_context):
+    tables = set()
+    for obj in list(session.new) + list(session.deleted):
+        tables.add(obj.__table__.name)
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            tables.add(obj.__table__.name)
+            # Collection changes on a clinic land in the association table.
+            if obj.__table__.name == 'clinics':
+                tables.add('clinic_insurance')
+    bump_versions(*tables, session=session)
+
+
+def current_versions(tables):
+    rows = db.session.execute(
+        select(TableVersion.name, TableVersion.version, TableVersion.updated_at)
+        .where(TableVersion.name.in_(tables))
+    ).all()
+    for observer in version_observers:
+        observer({name: version for name, version, _ in rows})
+    return {name: (version, updated_at) for name, version, updated_at in rows}
+
+
+def _cache_control():
+    shared_max_age = current_app.config.get('CATALOG_SHARED_MAX_AGE', 0)
+    if shared_max_age:
+        return f'public, max-age=0, s-maxage={shared_max_age}, must-revalidate'
+    return 'public, no-cache'
+
+
+def conditional(*tables):
+    """Serve ``ETag``/``Last-Modified`` for a GET derived from ``tables``' versions.
+
+    Unchanged data is answered with a 304 after a single lookup in
+    ``table_versions``, before the wrapped resource method runs.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            versions = current_versions(tables)
+            fingerprint = request.full_path + '|' + ','.join(
+                f'{name}:{versions.get(name, (0, None))[0]}' for name in tables
+            )
+            etag = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+            stamps = [updated_at for _, updated_at in versions.values() if updated_at]
+            last_modified = max(stamps).replace(microsecond=0) if stamps else None
+
+            headers = {'ETag': f'"{etag}"', 'Cache-Control': _cache_control()}
+            if last_modified:
+                headers['Last-Modified'] = last_modified.strftime('%a, %d %b %Y %H:%M:%S GMT')
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = bool(since and last_modified and last_modified <= since.replace(tzinfo=None))
+            if not_modified:
+                response = make_response('', 304)
+                response.headers.update(headers)
+                return response
+
+            rv = fn(*args, **kwargs)
+            if not isinstance(rv, tuple):
+                rv = (rv, 200)
+            data, status, extra = (rv + ({},))[:3]
+            if status != 200:
+                return rv
+            return data, status, {**headers, **extra}
+
+        return decorator
+
+    return wrapper